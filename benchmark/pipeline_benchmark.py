@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from utils.config_loader import ConfigLoader
+from utils.logger import setup_logger
+from exchange_rate import RunContext
+from exchange_rate.exchange_rate_analyze import ExchangeRateAnalyzer
+from exchange_rate.exchange_rate_cache import ExchangeRateCache
+from exchange_rate.exchange_rate_preprocess import ExchangeRatePreProcessor, ExchangeRateFramePreProcessor
+from .synthetic_data import SyntheticExchangeRateFetcher, synthetic_pairs, date_window
+
+
+class PipelineBenchmark:
+    def __init__(self, context=None):
+        """
+        Initialize the PipelineBenchmark, times each stage of fetch -> preprocess -> analyze on synthetic data
+        and compares the results with a stored baseline. No network is used.
+
+        context - RunContext with log file, defaults to current configuration
+        """
+        self.context = context or RunContext.from_config()
+
+        # Generate the module configuration file name based on script name
+        config_file = "config_" + os.path.splitext(os.path.basename(__file__))[0] + ".json"
+
+        # Create a ConfigLoader instance and load module specific configurations
+        config_loader = ConfigLoader(module_config_file=config_file)
+        module_config = config_loader.get_module_config()
+
+        # Assigning scenarios and synthetic data settings
+        self.scenarios = module_config.get("scenarios", [])
+        self.end_date = module_config.get("end_date", "2024-07-09")
+        self.seed = module_config.get("seed", 0)
+        self.repeat = module_config.get("repeat", 3)
+
+        # Assigning baseline file (relative to project folder) and allowed slow down before failing
+        self.baseline_file = os.path.join(os.path.dirname(__file__), '..', module_config.get("baseline_file"))
+        self.time_tolerance = module_config.get("time_tolerance", 0.5)
+        self.memory_tolerance = module_config.get("memory_tolerance", 0.25)
+        self.min_seconds = module_config.get("min_seconds", 0.005)
+        self.min_peak_kb = module_config.get("min_peak_kb", 64)
+
+    def run(self, scenario_names=None):
+        """
+        Run all configured scenarios, or only the named ones
+
+        Returns: dict of scenario name to stage results, see run_scenario
+        """
+        scenarios = [scenario for scenario in self.scenarios
+                     if not scenario_names or scenario["name"] in scenario_names]
+        return {scenario["name"]: self.run_scenario(scenario) for scenario in scenarios}
+
+    def run_scenario(self, scenario):
+        """
+        Time each stage of the pipeline for one scenario
+        Each stage runs repeat times and the best time is kept, peak memory is measured in one extra run
+        (tracemalloc slows code down, so it is not enabled while timing)
+
+        sample of argument - {"name": "year_10_pairs", "days": 365, "gap_density": 0.2, "pairs": 10}
+
+        Returns: dict of stage name to {"seconds": best time, "peak_kb": peak memory allocated by the stage}
+        """
+
+        # Set up the logger for the script
+        script_name = os.path.basename(__file__)
+        logger = setup_logger(script_name, self.context.log_file)
+        logger.info(f"Benchmark scenario {scenario}")
+
+        start_date, end_date = date_window(self.end_date, scenario["days"])
+        context = RunContext.from_config(start_date=start_date, end_date=end_date)
+        pairs = synthetic_pairs(scenario["pairs"])
+        fetcher = SyntheticExchangeRateFetcher(scenario.get("gap_density", 0.1), self.seed, context)
+
+        # Inputs of each stage are prepared once, so every stage is timed on its own
+        pair_data = fetcher.get_exchange_rates_batch(pairs)
+        processors = [ExchangeRatePreProcessor(pair_data[pair], target=pair[1], context=context) for pair in pairs]
+        window_dates = list(ExchangeRateCache.date_range(start_date, end_date))
+        series = [processor.process_series(f"{base}/{target}") for processor, (base, target) in zip(processors, pairs)]
+
+        def find_nearest_dates():
+            for processor in processors:
+                processor.sorted_dates = sorted(processor.json_data)
+                for date in window_dates:
+                    processor.find_nearest_dates(processor.json_data, date)
+
+        def analyze():
+            for pair_series in series:
+                analyzer = ExchangeRateAnalyzer(pair_series, context=context)
+                analyzer.trend_analysis()
+                analyzer.get_statistics()
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            stages = {
+                "fetch": lambda: fetcher.get_exchange_rates_batch(pairs),
+                "process_data": lambda: [processor.process_data() for processor in processors],
+                "find_nearest_dates": find_nearest_dates,
+                "process_series": lambda: [processor.process_series() for processor in processors],
+                "frame_preprocess": lambda: ExchangeRateFramePreProcessor.from_pair_data(
+                    pair_data, context=context).process_data(),
+                "analyze": analyze,
+                "visualize": lambda: ExchangeRateAnalyzer(series[0], context=context).render_to_file(output_dir)
+            }
+            results = {stage: self.measure(stage_function) for stage, stage_function in stages.items()}
+
+        for stage, result in results.items():
+            logger.info(f"{scenario['name']} {stage}: {result['seconds']:.4f}s peak {result['peak_kb']} KB")
+        return results
+
+    def measure(self, stage_function):
+        """
+        Returns: {"seconds": best time of repeat runs, "peak_kb": peak memory of one run}
+        """
+        timings = []
+        for _ in range(self.repeat):
+            start_time = time.perf_counter()
+            stage_function()
+            timings.append(time.perf_counter() - start_time)
+
+        tracemalloc.start()
+        try:
+            stage_function()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {"seconds": round(min(timings), 6), "peak_kb": peak // 1024}
+
+    def compare(self, results, baseline):
+        """
+        Compare results with the baseline, a stage is a regression when it is slower (or uses more memory)
+        than the baseline by more than the tolerance and by more than the minimum absolute difference
+
+        Returns: list of regression messages, empty when there is no regression
+        """
+        regressions = []
+        for scenario, stages in results.items():
+            for stage, result in stages.items():
+                expected = baseline.get(scenario, {}).get(stage)
+                if expected is None:
+                    continue
+                if result["seconds"] > expected["seconds"] * (1 + self.time_tolerance) \
+                        and result["seconds"] - expected["seconds"] > self.min_seconds:
+                    regressions.append(f"{scenario} {stage} time {result['seconds']:.4f}s, "
+                                       f"baseline {expected['seconds']:.4f}s")
+                if result["peak_kb"] > expected["peak_kb"] * (1 + self.memory_tolerance) \
+                        and result["peak_kb"] - expected["peak_kb"] > self.min_peak_kb:
+                    regressions.append(f"{scenario} {stage} peak memory {result['peak_kb']} KB, "
+                                       f"baseline {expected['peak_kb']} KB")
+        return regressions
+
+    def load_baseline(self):
+        """
+        Returns: stored baseline results, None when no baseline was saved yet
+        """
+        if not os.path.exists(self.baseline_file):
+            return None
+        with open(self.baseline_file) as baseline_file:
+            return json.load(baseline_file)
+
+    def save_baseline(self, results):
+        os.makedirs(os.path.dirname(os.path.abspath(self.baseline_file)), exist_ok=True)
+        with open(self.baseline_file, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+
+
+def main():
+    """
+    Run the benchmarks, exit with status 1 when a stage regressed against the baseline
+    The first run (or --update-baseline) saves the results as the baseline
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the fetch/preprocess/analyze pipeline offline")
+    parser.add_argument("--scenario", action="append", help="name of a configured scenario, default all")
+    parser.add_argument("--update-baseline", action="store_true", help="save the results as the new baseline")
+    arguments = parser.parse_args()
+
+    benchmark = PipelineBenchmark()
+    results = benchmark.run(arguments.scenario)
+    for scenario, stages in results.items():
+        for stage, result in stages.items():
+            print(f"{scenario:<20} {stage:<20} {result['seconds']:>10.4f}s {result['peak_kb']:>10} KB")
+
+    baseline = benchmark.load_baseline()
+    if baseline is None or arguments.update_baseline:
+        benchmark.save_baseline({**(baseline or {}), **results})
+        print(f"Baseline saved to {os.path.abspath(benchmark.baseline_file)}")
+        return
+
+    regressions = benchmark.compare(results, baseline)
+    if regressions:
+        print("Performance regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("No performance regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import random
+from datetime import datetime, timedelta
+from exchange_rate.exchange_rate_fetcher import ExchangeRateFetcher
+
+# Currencies used to build synthetic pairs, pairs are taken in order e.g. AUD/NZD, AUD/USD, ...
+CURRENCIES = ["AUD", "NZD", "USD", "EUR", "GBP", "JPY", "CAD", "CHF", "SGD", "HKD", "SEK", "NOK"]
+
+
+def synthetic_pairs(pair_count):
+    """
+    Returns: list of (base, target) pairs e.g. [('AUD', 'NZD'), ('AUD', 'USD')], same list for the same count
+    """
+    pairs = [(base, target) for base in CURRENCIES for target in CURRENCIES if base != target]
+    if pair_count > len(pairs):
+        raise ValueError(f"At most {len(pairs)} synthetic pairs are available, {pair_count} requested")
+    return pairs[:pair_count]
+
+
+def date_window(end_date, days):
+    """
+    Returns: start date and end date of a window of days ending on end_date
+    """
+    start_date = datetime.strptime(end_date, '%Y-%m-%d') - timedelta(days=days - 1)
+    return start_date.strftime('%Y-%m-%d'), end_date
+
+
+def generate_timeseries(base, symbols, start_date, end_date, gap_density=0.1, seed=0):
+    """
+    Generate a timeseries API response with a random walk rate per symbol
+    gap_density - share of dates missing from the response (first and last date are always present)
+    seed - same seed, base and symbols give the same response
+
+    Returns: JSON data shaped like the timeseries end point response
+    """
+    generator = random.Random(f"{seed}-{base}-{','.join(symbols)}")
+    levels = {symbol: 0.5 + generator.random() for symbol in symbols}
+
+    rates = {}
+    iteration_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+    end_date_dt = datetime.strptime(end_date, '%Y-%m-%d').date()
+    while iteration_date <= end_date_dt:
+        for symbol in symbols:
+            levels[symbol] *= 1 + generator.gauss(0, 0.004)
+        is_edge = iteration_date.strftime('%Y-%m-%d') in (start_date, end_date)
+        if is_edge or generator.random() >= gap_density:
+            rates[iteration_date.strftime('%Y-%m-%d')] = {symbol: round(levels[symbol], 6) for symbol in symbols}
+        iteration_date += timedelta(days=1)
+
+    return {"success": True, "timeseries": True, "start_date": start_date, "end_date": end_date,
+            "base": base, "rates": rates}
+
+
+class SyntheticExchangeRateFetcher(ExchangeRateFetcher):
+    def __init__(self, gap_density=0.1, seed=0, context=None):
+        """
+        Offline stub of ExchangeRateFetcher, every request is answered with generated data instead of the API
+        so batch, concurrent and cache code paths of the fetcher run unchanged without network
+        """
+        super().__init__(context)
+        self.gap_density = gap_density
+        self.seed = seed
+
+    def fetch_timeseries(self, base, symbols, logger, window_start=None, window_end=None, session=None):
+        return generate_timeseries(base, symbols, window_start or self.context.start_date,
+                                   window_end or self.context.end_date, self.gap_density, self.seed)
@@ -1,18 +1,32 @@
+import heapq
 import os
-import pandas as pd
-import matplotlib.pyplot as plt
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from utils.config_loader import ConfigLoader
+from utils.lazy_import import LazyModule
 from utils.logger import setup_logger
-from . import *
+from utils.metrics import metrics
+from .rate_series import RateSeries
+from .run_context import RunContext
+
+# Heavy libraries are imported on first use, matplotlib only when a chart is drawn
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+plt = LazyModule('matplotlib.pyplot')
+matplotlib_figure = LazyModule('matplotlib.figure')
 
 
 class ExchangeRateAnalyzer:
-    def __init__(self, exchange_rate_dict):
+    def __init__(self, exchange_rate_dict, pair=None, context=None):
         """
         Initialize the ExchangeRateAnalyzer
 
         sample of argument - { '2024-07-09' : 1.0789, '2024-07-08' : 1.0785, ... and so on }
+                             or a RateSeries (output of ExchangeRatePreProcessor.process_series)
+        pair - optional currency pair name e.g. 'AUD/NZD', shown in chart titles and used for chart file names
+        context - RunContext with currencies and log file, defaults to current configuration
         """
+        self.context = context or RunContext.from_config()
 
         # Generate the module configuration file name based on script name
         config_file = "config_" + os.path.splitext(os.path.basename(__file__))[0] + ".json"
@@ -23,8 +37,22 @@ class ExchangeRateAnalyzer:
 
         # Assigning Module Variables from configurations
         self.moving_average = module_config.get("moving_average")
+        self.volatility_window = module_config.get("volatility_window", 30)
+        self.ema_span = module_config.get("ema_span", 20)
+        self.annualization_days = module_config.get("annualization_days")
         self.fig_width = module_config.get("fig_width")
         self.fig_height = module_config.get("fig_height")
+        self.render_mode = module_config.get("render_mode", "show")
+        self.output_dir = os.path.join(os.path.dirname(__file__), '..', module_config.get("output_dir", "output"))
+        self.output_format = module_config.get("output_format", "png")
+        self.pair = pair
+
+        # RateSeries arrays are used directly, without parsing date strings
+        if isinstance(exchange_rate_dict, RateSeries):
+            self.pair = pair or exchange_rate_dict.pair
+            self.df = pd.DataFrame({'Date': exchange_rate_dict.dates().astype('datetime64[ns]'),
+                                    'Exchange Rate': exchange_rate_dict.rates})
+            return
 
         # Initialize DataFrame from exchange_rate_data_dict for ease in generating statistics later
         self.df = pd.DataFrame(list(exchange_rate_dict.items()), columns=['Date', 'Exchange Rate'])
@@ -33,6 +61,18 @@ class ExchangeRateAnalyzer:
         self.df['Date'] = pd.to_datetime(self.df['Date'])
         self.df['Exchange Rate'] = pd.to_numeric(self.df['Exchange Rate'])
 
+    @classmethod
+    def from_archive(cls, archive, pair, window_start=None, window_end=None, context=None):
+        """
+        Build the analyzer from a date range of one pair of a memory-mapped ExchangeRateArchive
+
+        archive - ExchangeRateArchive (opened on first read)
+        pair - currency pair name e.g. 'AUD/NZD'
+
+        Returns: ExchangeRateAnalyzer of the archived rates
+        """
+        return cls(archive.get_series(pair, window_start, window_end), pair=pair, context=context)
+
     def get_statistics(self):
         """
         Calculate statistics for the exchange rate data
@@ -40,11 +80,8 @@ class ExchangeRateAnalyzer:
         Returns:
             Mean, median, standard deviation, minimum, and maximum of the exchange rates
         """
-        mean_rate = self.df['Exchange Rate'].mean()
-        median_rate = self.df['Exchange Rate'].median()
-        std_dev = self.df['Exchange Rate'].std()
-        min_rate = self.df['Exchange Rate'].min()
-        max_rate = self.df['Exchange Rate'].max()
+        with metrics.timer("analyze_seconds", step="statistics"):
+            mean_rate, median_rate, std_dev, min_rate, max_rate = fused_statistics(self.df['Exchange Rate'].to_numpy())
 
         return mean_rate, median_rate, std_dev, min_rate, max_rate
 
@@ -52,8 +89,23 @@ class ExchangeRateAnalyzer:
         """
         Trend analysis on the exchange rate data
         """
-        self.df['Moving Average'] = self.df['Exchange Rate'].rolling(window=self.moving_average).mean()
-        self.df['Rate of Change'] = self.df['Exchange Rate'].diff()
+        with metrics.timer("analyze_seconds", step="trend"):
+            moving_average, rate_of_change = fused_trend(self.df['Exchange Rate'].to_numpy(), self.moving_average)
+        self.df['Moving Average'] = moving_average
+        self.df['Rate of Change'] = rate_of_change
+
+    def extended_analysis(self):
+        """
+        Rolling volatility of log returns, exponential moving average and drawdown from the running peak
+
+        Returns: max drawdown of the series
+        """
+        with metrics.timer("analyze_seconds", step="extended"):
+            values = self.df['Exchange Rate'].to_numpy()
+            self.df['Volatility'] = rolling_volatility(values, self.volatility_window, self.annualization_days)
+            self.df['EMA'] = exponential_moving_average(values, self.ema_span)
+            self.df['Drawdown'] = drawdown(values)
+            return float(self.df['Drawdown'].min()) if len(values) else float('nan')
 
     def visualize_data(self):
         """
@@ -62,27 +114,85 @@ class ExchangeRateAnalyzer:
 
         # Set up the logger for the script
         script_name = os.path.basename(__file__)
-        logger = setup_logger(script_name, log_file)
-        logger.info(f"Subplot 1 - Generation")
+        logger = setup_logger(script_name, self.context.log_file)
 
         # Create a figure with specified dimensions
-        plt.figure(figsize=(self.fig_width, self.fig_height))
+        with metrics.timer("render_seconds", mode="show"):
+            plt.figure(figsize=(self.fig_width, self.fig_height))
+            self.draw_figure(plt.gcf(), logger)
+
+        # Display plots
+        plt.show()
+
+    def render_to_file(self, output_dir=None, file_format=None):
+        """
+        Render the exchange rate chart to a file without a display
+        Uses the object oriented Figure API (no pyplot global state), so charts can be rendered at the same time
+
+        Returns: path of the written chart file
+        """
+
+        # Set up the logger for the script
+        script_name = os.path.basename(__file__)
+        logger = setup_logger(script_name, self.context.log_file)
+
+        output_dir = output_dir or self.output_dir
+        file_format = file_format or self.output_format
+        os.makedirs(output_dir, exist_ok=True)
+
+        # Chart file name is based on pair (if known) and date range of the data
+        pair_name = (self.pair or f"{self.context.base_currency}/{self.context.target_currency}").replace('/', '_')
+        date_range = f"{self.df['Date'].min():%Y-%m-%d}_{self.df['Date'].max():%Y-%m-%d}" if len(self.df) else "empty"
+        file_path = os.path.join(output_dir, f"exchange_rate_{pair_name}_{date_range}.{file_format}")
+
+        with metrics.timer("render_seconds", mode="file"):
+            figure = matplotlib_figure.Figure(figsize=(self.fig_width, self.fig_height))
+            self.draw_figure(figure, logger)
+            figure.savefig(file_path, format=file_format)
+        logger.info(f"Chart written to {file_path}")
+
+        return file_path
+
+    def draw_figure(self, fig, logger):
+        """
+        Draw exchange rate, moving average and statistics onto a matplotlib figure
+        """
+        logger.info(f"Subplot 1 - Generation")
 
         # Executing Trend Analysis and Statistics before generating plot
         self.trend_analysis()
+        max_drawdown_rate = self.extended_analysis()
         mean_rate, median_rate, std_dev, min_rate, max_rate = self.get_statistics()
 
-        # Subplot 1: Exchange Rate and Moving Average
-        plt.subplot(2, 1, 1)
-        plt.plot(self.df['Date'], self.df['Exchange Rate'],
-                 marker='o', linestyle='-', color='b', label='Exchange Rate')
-        plt.plot(self.df['Date'], self.df['Moving Average'],
-                 linestyle='--', color='r', label=f'{self.moving_average}-day Moving Average')
-        plt.title(f'Exchange Rate and Moving Average ({self.moving_average} days)')
-        plt.xlabel('Date')
-        plt.ylabel('Exchange Rate')
-        plt.xticks(rotation=45)  # Rotate x-axis labels by 45 degrees
-        plt.legend()
+        # Subplot 1: Exchange Rate, Moving Average and Exponential Moving Average
+        title_prefix = f"{self.pair} " if self.pair else ""
+        ax = fig.add_subplot(2, 1, 1)
+        ax.plot(self.df['Date'], self.df['Exchange Rate'],
+                marker='o', linestyle='-', color='b', label='Exchange Rate')
+        ax.plot(self.df['Date'], self.df['Moving Average'],
+                linestyle='--', color='r', label=f'{self.moving_average}-day Moving Average')
+        ax.plot(self.df['Date'], self.df['EMA'],
+                linestyle=':', color='g', label=f'{self.ema_span}-day EMA')
+        ax.set_title(f'{title_prefix}Exchange Rate and Moving Average ({self.moving_average} days)')
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Exchange Rate')
+        ax.tick_params(axis='x', labelrotation=45)  # Rotate x-axis labels by 45 degrees
+        ax.legend()
+
+        # Subplot 2: Rolling Volatility and Drawdown
+        logger.info(f"Subplot 2 - Generation")
+        ax_risk = fig.add_subplot(2, 1, 2)
+        ax_risk.plot(self.df['Date'], self.df['Volatility'], color='purple',
+                     label=f'{self.volatility_window}-day Volatility')
+        ax_risk.set_ylabel('Volatility')
+        ax_drawdown = ax_risk.twinx()
+        ax_drawdown.fill_between(self.df['Date'], self.df['Drawdown'], 0, color='orange', alpha=0.3, label='Drawdown')
+        ax_drawdown.set_ylabel('Drawdown')
+        ax_risk.set_title(f'{title_prefix}Volatility and Drawdown (Max Drawdown {max_drawdown_rate:.2%})')
+        ax_risk.set_xlabel('Date')
+        ax_risk.tick_params(axis='x', labelrotation=45)
+        ax_risk.legend(loc='upper left')
+        ax_drawdown.legend(loc='lower left')
 
         # Log the addition of statistical information to the plot
         logger.info(f"Adding statistics information to plot")
@@ -90,14 +200,425 @@ class ExchangeRateAnalyzer:
                     f'\nMin: {min_rate:.4f}\nMax: {max_rate:.4f}'
                     f'\nMean: {mean_rate:.4f}\nMedian: {median_rate:.4f}')
 
-        # To display text outside the plot area at the bottom of the figure
-        fig = plt.gcf()
-        fig.text(0.9, 0.2,
-                 f'Standard Deviation: {std_dev:.4f}'
-                 f'\nMin: {min_rate:.4f}\nMax: {max_rate:.4f}'
-                 f'\nMean: {mean_rate:.4f}\nMedian: {median_rate:.4f}',
-                 verticalalignment='bottom', horizontalalignment='right', fontsize=12)
+        # To display text in the lower right corner of the first subplot (second subplot shows volatility)
+        ax.text(0.99, 0.02,
+                f'Standard Deviation: {std_dev:.4f}'
+                f'\nMin: {min_rate:.4f}\nMax: {max_rate:.4f}'
+                f'\nMean: {mean_rate:.4f}\nMedian: {median_rate:.4f}',
+                transform=ax.transAxes, verticalalignment='bottom', horizontalalignment='right', fontsize=10,
+                bbox={'facecolor': 'white', 'alpha': 0.8})
 
-        # Adjust layout and display plots
-        plt.tight_layout()
-        plt.show()
+        # Adjust layout
+        fig.tight_layout()
+
+
+class IncrementalExchangeRateAnalyzer:
+    def __init__(self, exchange_rate_dict=None):
+        """
+        Initialize the IncrementalExchangeRateAnalyzer, which keeps running statistics of an exchange rate series
+        Each appended rate updates the statistics in constant time (logarithmic for median)
+
+        sample of argument - { '2024-07-09' : 1.0789, '2024-07-08' : 1.0785, ... and so on } (optional initial data)
+        """
+
+        # Generate the module configuration file name based on script name
+        config_file = "config_" + os.path.splitext(os.path.basename(__file__))[0] + ".json"
+
+        # Create a ConfigLoader instance and load module specific configurations
+        config_loader = ConfigLoader(module_config_file=config_file)
+        module_config = config_loader.get_module_config()
+
+        # Assigning Module Variables from configurations
+        self.moving_average = module_config.get("moving_average")
+
+        # Welford running mean and sum of squared differences
+        self.count = 0
+        self.mean = 0.0
+        self.squared_diff_sum = 0.0
+
+        # Streaming min/max and last values
+        self.min_rate = None
+        self.max_rate = None
+        self.last_date = None
+        self.last_rate = None
+        self.rate_of_change = None
+
+        # Two heaps for median - lower half as max heap (negated values) and upper half as min heap
+        self.lower_half = []
+        self.upper_half = []
+
+        # Rolling window values and their running sum for moving average
+        self.window = deque()
+        self.window_sum = 0.0
+
+        for date, rate in sorted((exchange_rate_dict or {}).items()):
+            self.append(date, rate)
+
+    def append(self, date, rate):
+        """
+        Add the rate of the next date to the running statistics
+        Dates ('YYYY-MM-DD' or day ordinals) must be after the last appended date, so a rate is never counted twice
+
+        sample of argument - ('2024-07-10', 1.0991)
+        """
+        if self.last_date is not None and date <= self.last_date:
+            raise ValueError(f"Date {date} is not after the last appended date {self.last_date}")
+        rate = float(rate)
+
+        # Welford update of mean and variance
+        self.count += 1
+        delta = rate - self.mean
+        self.mean += delta / self.count
+        self.squared_diff_sum += delta * (rate - self.mean)
+
+        # Min, max and rate of change
+        self.min_rate = rate if self.min_rate is None else min(self.min_rate, rate)
+        self.max_rate = rate if self.max_rate is None else max(self.max_rate, rate)
+        self.rate_of_change = None if self.last_rate is None else rate - self.last_rate
+        self.last_date = date
+        self.last_rate = rate
+
+        # Median heaps, keep lower half the same size or one larger than upper half
+        if self.lower_half and rate > -self.lower_half[0]:
+            heapq.heappush(self.upper_half, rate)
+        else:
+            heapq.heappush(self.lower_half, -rate)
+        if len(self.lower_half) > len(self.upper_half) + 1:
+            heapq.heappush(self.upper_half, -heapq.heappop(self.lower_half))
+        elif len(self.upper_half) > len(self.lower_half):
+            heapq.heappush(self.lower_half, -heapq.heappop(self.upper_half))
+
+        # Rolling window of the configured moving average size
+        self.window.append(rate)
+        self.window_sum += rate
+        if len(self.window) > self.moving_average:
+            self.window_sum -= self.window.popleft()
+
+    def get_moving_average(self):
+        """
+        Moving average of the last moving_average rates, None until the window is full (same as pandas rolling)
+        """
+        if len(self.window) < self.moving_average:
+            return None
+        return self.window_sum / self.moving_average
+
+    def get_statistics(self):
+        """
+        Statistics of all appended rates
+
+        Returns:
+            Mean, median, standard deviation (sample), minimum, and maximum of the exchange rates
+        """
+        if not self.count:
+            return None, None, None, None, None
+
+        if len(self.lower_half) > len(self.upper_half):
+            median_rate = -self.lower_half[0]
+        else:
+            median_rate = (-self.lower_half[0] + self.upper_half[0]) / 2
+
+        std_dev = (self.squared_diff_sum / (self.count - 1)) ** 0.5 if self.count > 1 else float('nan')
+        return self.mean, median_rate, std_dev, self.min_rate, self.max_rate
+
+
+def fused_statistics(values):
+    """
+    Statistics of one series (1-D array) or many series at once (2-D array of dates x pairs, column-wise)
+    The values are converted once to a contiguous float64 array and all statistics are computed from it.
+    Missing values (NaN) are skipped like pandas does, a series without any value gives NaN statistics
+
+    Returns:
+        Mean, median, standard deviation (sample), minimum, and maximum - scalars for 1-D input, arrays per column for 2-D
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    count = values.shape[0]
+    if count == 0:
+        empty = np.full(values.shape[1:], np.nan)
+        return empty, empty, empty, empty, empty
+    missing = np.isnan(values)
+    if missing.any():
+        return nan_statistics(values, missing)
+
+    # Mean and sample standard deviation from the same array
+    mean_rate = np.add.reduce(values, axis=0) / count
+    centered = values - mean_rate
+    std_dev = np.sqrt(np.add.reduce(centered * centered, axis=0) / (count - 1)) if count > 1 \
+        else np.full(values.shape[1:], np.nan)[()]
+
+    # Min, max and median (partition places the middle values without a full sort)
+    min_rate = np.minimum.reduce(values, axis=0)
+    max_rate = np.maximum.reduce(values, axis=0)
+    middle = count // 2
+    if count % 2:
+        median_rate = np.partition(values, middle, axis=0)[middle]
+    else:
+        partitioned = np.partition(values, [middle - 1, middle], axis=0)
+        median_rate = (partitioned[middle - 1] + partitioned[middle]) / 2
+
+    return mean_rate, median_rate, std_dev, min_rate, max_rate
+
+
+def nan_statistics(values, missing):
+    """
+    Statistics of fused_statistics for values with missing rates, each column uses only its available values
+    """
+    count = np.add.reduce(~missing, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_rate = np.add.reduce(np.where(missing, 0.0, values), axis=0) / count
+        centered = np.where(missing, 0.0, values - mean_rate)
+        std_dev = np.where(count > 1, np.sqrt(np.add.reduce(centered * centered, axis=0) / (count - 1)), np.nan)
+
+    # Missing values are ignored by min/max, columns without values stay NaN
+    no_values = count == 0
+    min_rate = np.where(no_values, np.nan, np.minimum.reduce(np.where(missing, np.inf, values), axis=0))
+    max_rate = np.where(no_values, np.nan, np.maximum.reduce(np.where(missing, -np.inf, values), axis=0))
+
+    # Median of the available values, missing values are sorted after all values
+    sorted_values = np.sort(values, axis=0)
+    lower = np.maximum((count - 1) // 2, 0)
+    upper = np.maximum(count // 2, 0)
+    median_rate = np.where(no_values, np.nan,
+                           (np.take_along_axis(sorted_values, np.expand_dims(lower, 0), axis=0)[0]
+                            + np.take_along_axis(sorted_values, np.expand_dims(upper, 0), axis=0)[0]) / 2)
+
+    return mean_rate[()], median_rate[()], std_dev[()], min_rate[()], max_rate[()]
+
+
+def fused_trend(values, window):
+    """
+    Moving average and rate of change of one series (1-D array) or many series at once (2-D array, column-wise)
+    The moving average uses cumulative sums of values and of available values, so each window costs one subtraction
+    instead of a full window sum, and a missing value only affects the windows containing it
+
+    Returns: moving average and rate of change arrays shaped like values, NaN where not available (same as pandas)
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    moving_average = np.full(values.shape, np.nan)
+    if window and values.shape[0] >= window:
+        window_sums, window_counts = window_totals(values, window)
+        moving_average[window - 1:] = np.where(window_counts == window, window_sums / window, np.nan)
+
+    rate_of_change = np.full(values.shape, np.nan)
+    rate_of_change[1:] = values[1:] - values[:-1]
+    return moving_average, rate_of_change
+
+
+def window_totals(values, window):
+    """
+    Sum of the available values and number of available values of every full window (rows window - 1 onwards)
+    """
+    missing = np.isnan(values)
+    zero_row = np.zeros((1,) + values.shape[1:])
+    cumulative = np.concatenate([zero_row, np.cumsum(np.where(missing, 0.0, values), axis=0)])
+    cumulative_counts = np.concatenate([zero_row, np.cumsum(~missing, axis=0)])
+    return cumulative[window:] - cumulative[:-window], cumulative_counts[window:] - cumulative_counts[:-window]
+
+
+def log_returns(values):
+    """
+    Daily log returns of one series (1-D array) or many series at once (2-D array of dates x pairs, column-wise)
+
+    Returns: array shaped like values, first row NaN
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    returns = np.full(values.shape, np.nan)
+    returns[1:] = np.diff(np.log(values), axis=0)
+    return returns
+
+
+def rolling_volatility(values, window, annualization_days=None):
+    """
+    Rolling volatility, the sample standard deviation of the log returns of the last window days
+    Sums of returns and squared returns are accumulated once, so each window costs a subtraction.
+    A window containing a missing return is NaN, the same as pandas rolling
+
+    annualization_days - when set, volatility is scaled by sqrt(annualization_days) e.g. 365 for daily calendar rates
+
+    Returns: array shaped like values, NaN until window returns are available
+    """
+    returns = log_returns(values)[1:]
+    volatility = np.full(np.shape(values), np.nan)
+    if window < 2 or returns.shape[0] < window:
+        return volatility
+
+    # Sum and sum of squares of every window, only windows with window available returns are used
+    window_sums, window_counts = window_totals(returns, window)
+    window_squares, _ = window_totals(returns * returns, window)
+    variance = np.maximum(window_squares - window_sums * window_sums / window, 0.0) / (window - 1)
+
+    volatility[window:] = np.where(window_counts == window, np.sqrt(variance), np.nan)
+    if annualization_days:
+        volatility *= np.sqrt(annualization_days)
+    return volatility
+
+
+def exponential_moving_average(values, span):
+    """
+    Exponential moving average with smoothing 2 / (span + 1), same as pandas ewm(span=span, adjust=False).mean()
+    The recursion runs over dates, each step updates all pairs at once. On a missing value the previous average is
+    kept and its weight keeps decaying, so the next value gets the weight pandas gives it
+
+    Returns: array shaped like values, NaN before the first available value
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    average = np.empty_like(values)
+    if not values.shape[0]:
+        return average
+    alpha = 2.0 / (span + 1)
+    average[0] = values[0]
+    missing = np.isnan(values)
+    if not missing.any():
+        for index in range(1, values.shape[0]):
+            average[index] = average[index - 1] + alpha * (values[index] - average[index - 1])
+        return average
+
+    # Weight of the previous average, decays on every date (also missing dates) and is reset by each value
+    previous_weight = np.ones(values.shape[1:])
+    for index in range(1, values.shape[0]):
+        previous = average[index - 1]
+        started = ~np.isnan(previous)
+        observed = ~missing[index]
+        previous_weight = np.where(started, previous_weight * (1 - alpha), previous_weight)
+        with np.errstate(invalid='ignore'):
+            weighted = (previous_weight * previous + alpha * values[index]) / (previous_weight + alpha)
+        average[index] = np.where(observed, np.where(started, weighted, values[index]), previous)
+        previous_weight = np.where(observed, 1.0, previous_weight)
+    return average
+
+
+def drawdown(values):
+    """
+    Drawdown from the running peak, e.g. -0.05 when the rate is 5% below the highest rate so far
+    Missing values are skipped by the running peak and are NaN in the result
+
+    Returns: array shaped like values, 0 on new peaks
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    return values / np.fmax.accumulate(values, axis=0) - 1.0
+
+
+def max_drawdown(values):
+    """
+    Returns: largest drawdown (most negative value of drawdown), scalar for 1-D input and array per column for 2-D,
+             NaN when there are no values
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if not values.shape[0]:
+        return np.full(values.shape[1:], np.nan)[()]
+    return np.fmin.reduce(drawdown(values), axis=0)
+
+
+def correlation_matrix(values):
+    """
+    Pairwise correlation of the log returns of all pairs (2-D array of dates x pairs)
+    Returns are standardized once and the matrix is a single matrix product. With missing values each pair of
+    columns uses the dates both have returns on (same as pandas corr), from matrix products of the masked returns
+
+    Returns: pairs x pairs array, NaN for pairs with constant rates or fewer than 2 common returns
+    """
+    returns = log_returns(values)[1:]
+    if returns.shape[0] < 2:
+        return np.full((returns.shape[1], returns.shape[1]), np.nan)
+    missing = np.isnan(returns)
+    if missing.any():
+        return masked_correlation(returns, missing)
+    centered = returns - returns.mean(axis=0)
+    norms = np.sqrt(np.einsum('ij,ij->j', centered, centered))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        standardized = centered / norms
+    correlation = standardized.T @ standardized
+    np.clip(correlation, -1.0, 1.0, out=correlation)
+    return correlation
+
+
+def masked_correlation(returns, missing):
+    """
+    Correlation of returns with missing values, counts and sums over the common dates of each pair of columns
+    """
+    available = (~missing).astype(np.float64)
+    filled = np.where(missing, 0.0, returns)
+
+    # Entry [i, j] sums column i over the dates where columns i and j both have returns
+    counts = available.T @ available
+    sums = filled.T @ available
+    squares = (filled * filled).T @ available
+    products = filled.T @ filled
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        covariance = counts * products - sums * sums.T
+        variance = counts * squares - sums * sums
+        correlation = covariance / np.sqrt(variance * variance.T)
+    correlation[(counts < 2) | ~np.isfinite(correlation)] = np.nan
+    np.clip(correlation, -1.0, 1.0, out=correlation)
+    return correlation
+
+
+def analytics_by_pair(rates_frame, window, span, annualization_days=None):
+    """
+    Extended analytics of many pairs at once, e.g. output of ExchangeRateFramePreProcessor (dates x pairs DataFrame)
+    Volatility and EMA are taken on the latest date they are available, so pairs with missing rates at the end
+    (e.g. an archive frame) still get values
+
+    Returns: pandas DataFrame indexed by pair with Volatility and EMA (latest available) and Max Drawdown columns
+    """
+    values = rates_frame.to_numpy(dtype=np.float64)
+    volatility = rolling_volatility(values, window, annualization_days)
+    average = exponential_moving_average(values, span)
+    return pd.DataFrame({'Volatility': latest_available(volatility),
+                         'EMA': latest_available(average),
+                         'Max Drawdown': max_drawdown(values)}, index=rates_frame.columns)
+
+
+def latest_available(values):
+    """
+    Returns: last value that is not NaN of each column (NaN for columns without values)
+    """
+    available = ~np.isnan(values)
+    if not values.shape[0]:
+        return np.full(values.shape[1:], np.nan)
+    last_index = values.shape[0] - 1 - np.argmax(available[::-1], axis=0)
+    return np.where(available.any(axis=0), np.take_along_axis(values, last_index[None], axis=0)[0], np.nan)
+
+
+def correlation_by_pair(rates_frame):
+    """
+    Returns: pandas DataFrame of the correlation of log returns, pairs x pairs
+    """
+    return pd.DataFrame(correlation_matrix(rates_frame.to_numpy(dtype=np.float64)),
+                        index=rates_frame.columns, columns=rates_frame.columns)
+
+
+def statistics_by_pair(rates_frame):
+    """
+    Statistics of many pairs at once, e.g. output of ExchangeRateFramePreProcessor (dates x pairs DataFrame)
+
+    Returns: pandas DataFrame indexed by pair with Mean, Median, Standard Deviation, Min and Max columns
+    """
+    mean_rate, median_rate, std_dev, min_rate, max_rate = fused_statistics(rates_frame.to_numpy())
+    return pd.DataFrame({'Mean': mean_rate, 'Median': median_rate, 'Standard Deviation': std_dev,
+                         'Min': min_rate, 'Max': max_rate}, index=rates_frame.columns)
+
+
+def render_pair(pair, exchange_rate_dict, output_dir=None, file_format=None, context=None):
+    """
+    Render the chart of one pair to a file, used by worker processes of render_pairs
+
+    Returns: path of the written chart file
+    """
+    return ExchangeRateAnalyzer(exchange_rate_dict, pair=pair, context=context).render_to_file(output_dir, file_format)
+
+
+def render_pairs(pair_rates, output_dir=None, file_format=None, max_workers=None, context=None):
+    """
+    Render charts of many pairs in parallel worker processes
+
+    sample of argument - { 'AUD/NZD' : { '2024-07-09' : 1.0789, ... }, 'AUD/USD' : { ... }, ... and so on }
+                         values can also be RateSeries, which are sent to the workers as compact arrays
+
+    Returns: dict of pair and path of the written chart file
+    """
+    context = context or RunContext.from_config()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {pair: executor.submit(render_pair, pair, exchange_rate_dict, output_dir, file_format, context)
+                   for pair, exchange_rate_dict in pair_rates.items()}
+        return {pair: future.result() for pair, future in futures.items()}
@@ -0,0 +1,208 @@
+import os
+import struct
+from utils.config_loader import ConfigLoader
+from utils.lazy_import import LazyModule
+from utils.logger import setup_logger
+from utils.metrics import metrics
+from .rate_series import RateSeries
+from .run_context import RunContext
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+# Archive layout (little endian)
+#   header     - magic, version, pair count, first day (days since 1970-01-01), day count, pair index offset, data offset
+#   pair index - pair names e.g. b'AUD/NZD', fixed width and zero padded
+#   data       - float64 matrix, one row per day and one column per pair, NaN when a pair has no rate on that day
+ARCHIVE_MAGIC = b"XRARCHV1"
+ARCHIVE_VERSION = 1
+ARCHIVE_HEADER = struct.Struct("<8sIIqqQQ")
+HEADER_BYTES = 64
+PAIR_NAME_BYTES = 16
+DATA_ALIGNMENT = 64
+
+
+class ExchangeRateArchive:
+    def __init__(self, archive_file=None, context=None):
+        """
+        Initialize the ExchangeRateArchive, a binary file of processed rates of many pairs that is memory-mapped on read
+        Rows of a date range are contiguous, so readers slice dates and pairs of the mapped file without parsing or
+        copying, and processes mapping the same file share one physical copy through the page cache
+
+        archive_file - path of the archive, defaults to the configured archive file (relative to project folder)
+        context - RunContext with log file, defaults to current configuration
+        """
+        self.context = context or RunContext.from_config()
+
+        # Generate the module configuration file name based on script name
+        config_file = "config_" + os.path.splitext(os.path.basename(__file__))[0] + ".json"
+
+        # Create a ConfigLoader instance and load module specific configurations
+        config_loader = ConfigLoader(module_config_file=config_file)
+        module_config = config_loader.get_module_config()
+
+        # Assigning archive file from argument or configuration
+        self.archive_file = archive_file or os.path.join(os.path.dirname(__file__), '..',
+                                                         module_config.get("archive_file"))
+
+        # Filled by open
+        self.matrix = None
+        self.pairs = []
+        self.first_day = 0
+
+    def __getstate__(self):
+        """
+        Pickle the archive by path e.g. when sent to worker processes, each process maps the file again
+        """
+        state = self.__dict__.copy()
+        state.update(matrix=None, pairs=[], first_day=0)
+        return state
+
+    def write(self, rates_frame):
+        """
+        Write processed rates of many pairs (e.g. output of ExchangeRateFramePreProcessor.process_data) to the archive
+        Dates are reindexed onto every calendar day. The file is written next to the archive and renamed, so readers
+        that mapped the previous archive keep a consistent copy.
+
+        sample of argument -
+                        AUD/NZD   AUD/USD
+            2024-06-08  1.07895   0.66321
+            2024-06-09  1.07901   0.66362
+
+        Returns: the archive, opened for reading
+        """
+
+        # Set up the logger for the script
+        script_name = os.path.basename(__file__)
+        logger = setup_logger(script_name, self.context.log_file)
+
+        if rates_frame.empty:
+            raise ValueError("No rates to archive")
+        pairs = [str(pair) for pair in rates_frame.columns]
+        for pair in pairs:
+            if not pair.isascii() or len(pair) > PAIR_NAME_BYTES:
+                raise ValueError(f"Pair name '{pair}' must be ASCII of at most {PAIR_NAME_BYTES} characters")
+
+        with metrics.timer("archive_seconds", step="write"):
+            # One row per calendar day between first and last date
+            rates_frame = rates_frame.copy()
+            rates_frame.index = pd.to_datetime(rates_frame.index)
+            rates_frame = rates_frame.sort_index()
+            rates_frame = rates_frame.reindex(pd.date_range(rates_frame.index[0], rates_frame.index[-1], freq='D'))
+            values = np.ascontiguousarray(rates_frame.to_numpy(dtype=np.float64), dtype='<f8')
+            first_day = int(rates_frame.index[0].to_datetime64().astype('datetime64[D]').astype(np.int64))
+
+            index_offset = HEADER_BYTES
+            data_offset = -(-(index_offset + len(pairs) * PAIR_NAME_BYTES) // DATA_ALIGNMENT) * DATA_ALIGNMENT
+            header = ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, len(pairs), first_day, len(values),
+                                         index_offset, data_offset)
+
+            os.makedirs(os.path.dirname(os.path.abspath(self.archive_file)), exist_ok=True)
+            temp_file = f"{self.archive_file}.tmp"
+            with open(temp_file, "wb") as archive:
+                archive.write(header.ljust(HEADER_BYTES, b"\0"))
+                archive.write(np.array(pairs, dtype=f"S{PAIR_NAME_BYTES}").tobytes())
+                archive.write(b"\0" * (data_offset - archive.tell()))
+                values.tofile(archive)
+            os.replace(temp_file, self.archive_file)
+
+        logger.info(f"Archived {len(pairs)} pairs x {len(values)} days to {self.archive_file}")
+        self.close()
+        return self.open()
+
+    def open(self):
+        """
+        Read header and pair index and memory-map the rate matrix (read only)
+
+        Returns: the archive
+        """
+        with open(self.archive_file, "rb") as archive:
+            header = archive.read(HEADER_BYTES)
+        if len(header) < HEADER_BYTES or header[:len(ARCHIVE_MAGIC)] != ARCHIVE_MAGIC:
+            raise ValueError(f"{self.archive_file} is not an exchange rate archive")
+        _, version, pair_count, first_day, day_count, index_offset, data_offset = ARCHIVE_HEADER.unpack_from(header)
+        if version != ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported archive version {version}, expected {ARCHIVE_VERSION}")
+        if os.path.getsize(self.archive_file) < data_offset + day_count * pair_count * 8:
+            raise ValueError(f"{self.archive_file} is truncated")
+
+        names = np.fromfile(self.archive_file, dtype=f"S{PAIR_NAME_BYTES}", count=pair_count, offset=index_offset)
+        self.pairs = [name.decode("ascii") for name in names.tolist()]
+        self.first_day = first_day
+        self.matrix = np.memmap(self.archive_file, dtype='<f8', mode='r', offset=data_offset,
+                                shape=(day_count, pair_count))
+        metrics.increment("archive_bytes_mapped_total", day_count * pair_count * 8)
+        return self
+
+    def close(self):
+        """
+        Drop the mapping, views handed out earlier keep the file mapped until they are released
+        """
+        self.matrix = None
+
+    def mapped_matrix(self):
+        return self.matrix if self.matrix is not None else self.open().matrix
+
+    def day_ordinals(self, window_start=None, window_end=None):
+        """
+        Returns: int64 array of the days (since 1970-01-01) of the rows in the window
+        """
+        rows = self.window_rows(window_start, window_end)
+        return np.arange(self.first_day + rows.start, self.first_day + rows.stop, dtype=np.int64)
+
+    def window_rows(self, window_start=None, window_end=None):
+        """
+        Returns: slice of the matrix rows between start and end date (both inclusive), clipped to the archived days
+        """
+        day_count = self.mapped_matrix().shape[0]
+        start_index = 0 if window_start is None else \
+            int(np.datetime64(window_start, 'D').astype(np.int64)) - self.first_day
+        end_index = day_count if window_end is None else \
+            int(np.datetime64(window_end, 'D').astype(np.int64)) - self.first_day + 1
+        start_index = min(max(start_index, 0), day_count)
+        return slice(start_index, max(min(end_index, day_count), start_index))
+
+    def pair_column(self, pair):
+        self.mapped_matrix()
+        if pair not in self.pairs:
+            raise KeyError(f"Unknown pair '{pair}'")
+        return self.pairs.index(pair)
+
+    def get_matrix(self, window_start=None, window_end=None, pairs=None):
+        """
+        Rates of the window, all pairs (or a list of pairs) as columns
+        All pairs are returned as a view of the mapped file, selecting a list of pairs copies only the window
+
+        Returns: days x pairs float64 array
+        """
+        matrix = self.mapped_matrix()[self.window_rows(window_start, window_end)]
+        if pairs is None:
+            return matrix
+        return matrix[:, [self.pair_column(pair) for pair in pairs]]
+
+    def get_rates(self, pair, window_start=None, window_end=None):
+        """
+        Returns: float64 array of the rates of a pair in the window, a strided view of the mapped file
+        """
+        return self.mapped_matrix()[self.window_rows(window_start, window_end), self.pair_column(pair)]
+
+    def get_series(self, pair, window_start=None, window_end=None):
+        """
+        Rates of a pair in the window as RateSeries (e.g. for ExchangeRateAnalyzer), days without a rate are left out
+
+        Returns: RateSeries of the pair
+        """
+        rates = self.get_rates(pair, window_start, window_end)
+        available = ~np.isnan(rates)
+        return RateSeries(self.day_ordinals(window_start, window_end)[available], rates[available], pair)
+
+    def get_frame(self, window_start=None, window_end=None, pairs=None):
+        """
+        Rates of the window as a dates x pairs DataFrame e.g. for statistics_by_pair or analytics_by_pair
+        Dates without a rate (gaps and dates before a pair starts) are NaN, which these functions skip
+
+        Returns: pandas DataFrame indexed by date with one column per pair
+        """
+        return pd.DataFrame(self.get_matrix(window_start, window_end, pairs),
+                            index=self.day_ordinals(window_start, window_end).astype('datetime64[D]'),
+                            columns=list(pairs) if pairs is not None else self.pairs)
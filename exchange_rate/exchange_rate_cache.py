@@ -0,0 +1,173 @@
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta
+from utils.config_loader import ConfigLoader
+from .run_context import RunContext
+
+# Rows written to SQLite in one executemany call while storing streamed rates
+INSERT_BATCH_ROWS = 10000
+
+
+class ExchangeRateCache:
+    def __init__(self, cache_file=None, context=None):
+        """
+        Initialize the ExchangeRateCache, a SQLite store of fetched exchange rates keyed by (base, target, date)
+
+        cache_file - path of the SQLite file, defaults to the configured cache file (relative to project folder)
+        context - RunContext, its current date decides which missing dates may still be published
+        """
+        self.context = context or RunContext.from_config()
+
+        # Generate the module configuration file name based on script name
+        config_file = "config_" + os.path.splitext(os.path.basename(__file__))[0] + ".json"
+
+        # Create a ConfigLoader instance and load module specific configurations
+        config_loader = ConfigLoader(module_config_file=config_file)
+        module_config = config_loader.get_module_config()
+
+        # Assigning cache file from argument or configuration
+        self.cache_file = cache_file or os.path.join(os.path.dirname(__file__), '..', module_config.get("cache_file"))
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_file)), exist_ok=True)
+
+        # Rates table, a NULL rate records a date that was requested but not returned by the API
+        with closing(sqlite3.connect(self.cache_file)) as connection, connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS rates ("
+                               "base TEXT NOT NULL, target TEXT NOT NULL, date TEXT NOT NULL, rate REAL, "
+                               "PRIMARY KEY (base, target, date))")
+
+    def store_timeseries(self, json_data, symbols, window_start, window_end):
+        """
+        Store the rates of the requested symbols from a timeseries API response
+        Dates of the window missing in the response are stored as NULL (except current date, which may be published later)
+        so they are not requested again. Responses without rates (API errors) are not stored.
+
+        Returns: number of rates stored
+        """
+        if "rates" not in json_data:
+            return 0
+
+        return self.store_rate_items(json_data.get("base"), json_data["rates"].items(), symbols, window_start, window_end)
+
+    def store_rate_items(self, base, rate_items, symbols, window_start, window_end):
+        """
+        Store rates date by date as they are read e.g. from TimeseriesStreamParser, rows are written in batches
+        so memory does not grow with the size of the response. Nothing is stored if reading the rates fails.
+
+        rate_items - iterable of (date, day rates) e.g. [('2024-07-09', {'NZD': 1.0789}), ... and so on ]
+
+        Returns: number of rates stored
+        """
+        received_dates = set()
+        rows = []
+        stored_count = 0
+        with closing(sqlite3.connect(self.cache_file)) as connection, connection:
+            for date, day_rates in rate_items:
+                if not window_start <= date <= window_end:
+                    continue
+                received_dates.add(date)
+                for symbol in symbols:
+                    if day_rates.get(symbol) is not None:
+                        rows.append((base, symbol, date, day_rates[symbol]))
+                    elif date < self.context.current_date:
+                        rows.append((base, symbol, date, None))
+                if len(rows) >= INSERT_BATCH_ROWS:
+                    stored_count += self.insert_rows(connection, rows)
+                    rows = []
+
+            # Dates of the window not in the response
+            for date in self.date_range(window_start, window_end):
+                if date not in received_dates and date < self.context.current_date:
+                    rows.extend((base, symbol, date, None) for symbol in symbols)
+            stored_count += self.insert_rows(connection, rows)
+
+        return stored_count
+
+    @staticmethod
+    def insert_rows(connection, rows):
+        connection.executemany("INSERT OR REPLACE INTO rates (base, target, date, rate) VALUES (?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def get_rates(self, base, target, window_start, window_end):
+        """
+        Read cached rates of a currency pair, this can be passed directly to ExchangeRateAnalyzer
+
+        Returns: dict of date and rate e.g. { '2024-07-09' : 1.0789, '2024-07-08' : 1.0785, ... and so on }
+        """
+        with closing(sqlite3.connect(self.cache_file)) as connection:
+            rows = connection.execute("SELECT date, rate FROM rates WHERE base = ? AND target = ? "
+                                      "AND date BETWEEN ? AND ? AND rate IS NOT NULL ORDER BY date",
+                                      (base, target, window_start, window_end)).fetchall()
+        return dict(rows)
+
+    def get_timeseries(self, base, target, window_start, window_end):
+        """
+        Read cached rates of a currency pair in the structure of the API response, to be passed to ExchangeRatePreProcessor
+
+        Returns: JSON data containing exchange rates between two currencies
+        """
+        rates = self.get_rates(base, target, window_start, window_end)
+        return {
+            "success": True,
+            "timeseries": True,
+            "start_date": window_start,
+            "end_date": window_end,
+            "base": base,
+            "rates": {date: {target: rate} for date, rate in rates.items()}
+        }
+
+    def missing_ranges(self, base, target, window_start, window_end):
+        """
+        Find the date ranges of a currency pair that are not yet in the cache
+
+        Returns: list of (start date, end date) tuples, empty list when the whole window is cached
+        """
+        with closing(sqlite3.connect(self.cache_file)) as connection:
+            rows = connection.execute("SELECT date FROM rates WHERE base = ? AND target = ? AND date BETWEEN ? AND ?",
+                                      (base, target, window_start, window_end)).fetchall()
+        cached_dates = {row[0] for row in rows}
+
+        # Group consecutive missing dates into ranges
+        ranges = []
+        for date in self.date_range(window_start, window_end):
+            if date in cached_dates:
+                continue
+            if ranges and ranges[-1][1] == self.previous_date(date):
+                ranges[-1] = (ranges[-1][0], date)
+            else:
+                ranges.append((date, date))
+        return ranges
+
+    @staticmethod
+    def merge_ranges(ranges):
+        """
+        Merge overlapping or adjacent date ranges
+
+        Returns: sorted list of (start date, end date) tuples
+        """
+        merged = []
+        for range_start, range_end in sorted(ranges):
+            if merged and range_start <= ExchangeRateCache.next_date(merged[-1][1]):
+                merged[-1] = (merged[-1][0], max(merged[-1][1], range_end))
+            else:
+                merged.append((range_start, range_end))
+        return merged
+
+    @staticmethod
+    def date_range(window_start, window_end):
+        """
+        Generate every date between start and end date (both inclusive) as 'YYYY-MM-DD' strings
+        """
+        iteration_date = datetime.strptime(window_start, '%Y-%m-%d').date()
+        end_date_dt = datetime.strptime(window_end, '%Y-%m-%d').date()
+        while iteration_date <= end_date_dt:
+            yield iteration_date.strftime('%Y-%m-%d')
+            iteration_date += timedelta(days=1)
+
+    @staticmethod
+    def next_date(date):
+        return (datetime.strptime(date, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+
+    @staticmethod
+    def previous_date(date):
+        return (datetime.strptime(date, '%Y-%m-%d') - timedelta(days=1)).strftime('%Y-%m-%d')
@@ -1,18 +1,43 @@
 import requests
 import os
-import sys
+import random
+import time
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
 # Import project utilities to assist logging and loading configurations
 from utils.config_loader import ConfigLoader
 from utils.logger import setup_logger
-# Import all modules from the current package
-from . import *
+from utils.metrics import metrics
+from utils.rate_limiter import HostRateLimiter
+from .exchange_rate_replay import RecordingAdapter, ReplayAdapter
+from .rate_stream import TimeseriesStreamParser, stream_to_series
+from .run_context import RunContext
+
+# Transport modes, see exchange_rate_replay.py for record and replay
+TRANSPORT_MODES = ("live", "record", "replay")
+
+# HTTP status codes worth retrying - rate limited or temporary server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """
+    Raised when an API request still fails after all retries
+    """
 
 
 class ExchangeRateFetcher:
-    def __init__(self):
+    def __init__(self, context=None):
         """
         Initialize the instance of the class ExchangeRateFetcher with module level variables
+
+        context - RunContext with date range, currencies, access key and log file, defaults to current configuration
         """
+        self.context = context or RunContext.from_config()
 
         # Generate the module configuration file name based on script name
         config_file = "config_" + os.path.splitext(os.path.basename(__file__))[0] + ".json"
@@ -25,25 +50,374 @@ class ExchangeRateFetcher:
         self.api_url = module_config.get("api_url")
         self.end_point = module_config.get("end_point")
 
-    def get_exchange_rates(self):
+        # Assigning concurrency limit and per host rate limit used in concurrent fetch mode
+        self.max_workers = module_config.get("max_workers", 8)
+        self.rate_limiter = HostRateLimiter(module_config.get("rate_limit_per_second"))
+
+        # Assigning backfill date range and maximum days the API returns in one request
+        self.configure_start_date = module_config.get("configure_start_date")
+        self.configure_end_date = module_config.get("configure_end_date")
+        self.backfill_window_days = module_config.get("backfill_window_days", 365)
+
+        # Assigning retry, backoff and timeout settings
+        self.max_retries = module_config.get("max_retries", 3)
+        self.backoff_base_seconds = module_config.get("backoff_base_seconds", 1)
+        self.backoff_max_seconds = module_config.get("backoff_max_seconds", 60)
+        self.request_timeout = module_config.get("request_timeout_seconds", 30)
+
+        # Assigning streaming settings, streamed responses are parsed date by date into the cache
+        self.stream_responses = module_config.get("stream_responses", False)
+        self.stream_chunk_size = module_config.get("stream_chunk_size", 65536)
+
+        # Assigning transport mode - live, record (live and saved to fixtures) or replay (fixtures only, no network)
+        self.transport_mode = module_config.get("transport_mode", "live")
+        if self.transport_mode not in TRANSPORT_MODES:
+            raise ValueError(f"Unknown transport mode '{self.transport_mode}', expected one of {TRANSPORT_MODES}")
+        self.fixture_dir = os.path.join(os.path.dirname(__file__), '..', module_config.get("fixture_dir", "fixtures"))
+        self.replay_latency_seconds = module_config.get("replay_latency_seconds", 0)
+
+        # Record and replay requests go through a session with the fixture transport mounted
+        self.transport_session = self.create_session() if self.transport_mode != "live" else None
+
+        # Pairs that failed in the last batch or backfill, with the error message
+        self.failed_pairs = {}
+
+    def get_exchange_rates(self, cache=None):
         """
         Fetch exchange rates from an API using configured parameters
+        When an ExchangeRateCache is passed, only the dates missing from the cache are requested
 
-        Returns: JSON data containing exchange rates of between two currencies
+        Returns: JSON data containing exchange rates of between two currencies, raises FetchError when the request fails
         """
 
         # Setup Logger
         script_name = os.path.basename(__file__)
-        logger = setup_logger(script_name, log_file)
+        logger = setup_logger(script_name, self.context.log_file)
         logger.info(f"Preparing Parameters for API request")
 
+        if cache is not None:
+            pair = (self.context.base_currency, self.context.target_currency)
+            pair_data = self.get_exchange_rates_batch([pair], cache=cache)
+            if pair in self.failed_pairs:
+                raise FetchError(self.failed_pairs[pair])
+            return pair_data[pair]
+
+        return self.fetch_timeseries(self.context.base_currency, [self.context.target_currency], logger)
+
+    def get_exchange_rates_batch(self, currency_pairs, concurrent=False, cache=None):
+        """
+        Fetch exchange rates for many currency pairs using one API request per base currency
+
+        sample of argument - [('AUD', 'NZD'), ('AUD', 'USD'), ('EUR', 'GBP'), ... and so on ]
+        concurrent - when True, requests for all base currencies are sent at the same time
+        cache - ExchangeRateCache, when passed only date ranges missing from the cache are requested
+                and the returned series are read back from the cache
+        A failed request does not stop the batch, its pairs are left out of the result and recorded in failed_pairs
+        so they can be fetched again with retry_failed
+
+        Returns: dict keyed by (base, target) pair, each value shaped like a single pair API response
+        """
+
+        # Setup Logger
+        script_name = os.path.basename(__file__)
+        logger = setup_logger(script_name, self.context.log_file)
+
+        # Group the target currencies by base currency (order preserved, duplicates dropped)
+        symbols_by_base = self.group_pairs_by_base(currency_pairs)
+
+        # One timeseries request per base currency (and per missing date range when cache is used)
+        if cache is None:
+            fetch_requests = [(base, symbols, self.context.start_date, self.context.end_date)
+                              for base, symbols in symbols_by_base.items()]
+        else:
+            fetch_requests = self.get_missing_requests(symbols_by_base, cache,
+                                                       self.context.start_date, self.context.end_date)
+        logger.info(f"Fetching {len(currency_pairs)} pairs using {len(fetch_requests)} API requests")
+
+        # With a cache, streamed responses are written to the cache while they are parsed
+        streaming = cache is not None and self.stream_responses
+        fetch = partial(self.stream_timeseries, cache=cache) if streaming else self.fetch_rates
+
+        self.failed_pairs = {}
+        if concurrent:
+            responses = self.get_exchange_rates_concurrent(fetch_requests, fetch=fetch)
+        else:
+            responses = []
+            for fetch_request in fetch_requests:
+                base, symbols, window_start, window_end = fetch_request
+                try:
+                    responses.append(fetch(base, symbols, logger, window_start, window_end))
+                except FetchError as e:
+                    self.record_failure(fetch_request, e)
+                    responses.append(None)
+
+        # Split each response back into one series per pair
+        pair_data = {}
+        if cache is None:
+            for (base, symbols, _, _), data in zip(fetch_requests, responses):
+                if data is not None:
+                    pair_data.update(self.split_by_pair(data, base, symbols))
+            self.log_failures(logger, len(pair_data))
+            return pair_data
+
+        # Store fetched rates and read the full date range of every successful pair from the cache
+        for (base, symbols, window_start, window_end), data in zip(fetch_requests, responses):
+            if data is not None and not streaming:
+                cache.store_timeseries(data, symbols, window_start, window_end)
+        for base, symbols in symbols_by_base.items():
+            for symbol in symbols:
+                if (base, symbol) not in self.failed_pairs:
+                    pair_data[(base, symbol)] = cache.get_timeseries(base, symbol, self.context.start_date,
+                                                                     self.context.end_date)
+        self.log_failures(logger, len(pair_data))
+        return pair_data
+
+    def retry_failed(self, concurrent=False, cache=None):
+        """
+        Fetch again only the pairs that failed in the last batch
+
+        Returns: dict keyed by (base, target) pair of the pairs fetched now, failed_pairs holds the ones still failing
+        """
+        return self.get_exchange_rates_batch(list(self.failed_pairs), concurrent=concurrent, cache=cache)
+
+    def record_failure(self, fetch_request, error):
+        """
+        Record every pair of a failed request with the error message
+        """
+        base, symbols, window_start, window_end = fetch_request
+        for symbol in symbols:
+            self.failed_pairs[(base, symbol)] = f"{window_start} to {window_end}: {error}"
+
+    def log_failures(self, logger, success_count):
+        """
+        Report successful and failed pairs at the end of a batch
+        """
+        if not self.failed_pairs:
+            logger.info(f"Fetched {success_count} pairs")
+            return
+        logger.error(f"Fetched {success_count} pairs, {len(self.failed_pairs)} pairs failed")
+        for (base, symbol), error in self.failed_pairs.items():
+            logger.error(f"Failed {base}/{symbol} - {error}")
+
+    def backfill(self, currency_pairs, cache, backfill_start=None, backfill_end=None):
+        """
+        Backfill a long date range into the cache
+        The range is split into windows of at most backfill_window_days, windows are fetched concurrently and each
+        window is stored in the cache as soon as it completes. The cache is the checkpoint, so running the backfill
+        again after an interruption only fetches the windows that were not stored.
+
+        backfill_start/backfill_end - defaults to configure_start_date/configure_end_date, then to configured date range
+
+        Returns: dict keyed by (base, target) pair, each value shaped like a single pair API response (dates in order)
+        """
+
+        # Setup Logger
+        script_name = os.path.basename(__file__)
+        logger = setup_logger(script_name, self.context.log_file)
+
+        backfill_start = backfill_start or self.configure_start_date or self.context.start_date
+        backfill_end = backfill_end or self.configure_end_date or self.context.end_date
+
+        # Requests for missing ranges only, split into API sized windows
+        self.failed_pairs = {}
+        symbols_by_base = self.group_pairs_by_base(currency_pairs)
+        fetch_requests = [(base, symbols, window_start, window_end)
+                          for base, symbols, range_start, range_end
+                          in self.get_missing_requests(symbols_by_base, cache, backfill_start, backfill_end)
+                          for window_start, window_end
+                          in self.split_window(range_start, range_end, self.backfill_window_days)]
+        logger.info(f"Backfilling {backfill_start} to {backfill_end} using {len(fetch_requests)} windows")
+
+        # Checkpoint each window into the cache as it completes, streamed windows are already stored by the worker
+        def store_window(fetch_request, data):
+            base, symbols, window_start, window_end = fetch_request
+            if not self.stream_responses:
+                cache.store_timeseries(data, symbols, window_start, window_end)
+            logger.info(f"Backfill window stored - {base} {window_start} to {window_end}")
+
+        fetch = partial(self.stream_timeseries, cache=cache) if self.stream_responses else None
+        self.get_exchange_rates_concurrent(fetch_requests, on_result=store_window, fetch=fetch)
+
+        # Merge all windows in date order by reading the full range back from the cache
+        # Pairs with failed windows are left out, running the backfill again fetches only those windows
+        pair_data = {(base, symbol): cache.get_timeseries(base, symbol, backfill_start, backfill_end)
+                     for base, symbols in symbols_by_base.items() for symbol in symbols
+                     if (base, symbol) not in self.failed_pairs}
+        self.log_failures(logger, len(pair_data))
+        return pair_data
+
+    @staticmethod
+    def get_missing_requests(symbols_by_base, cache, window_start, window_end):
+        """
+        Build the requests needed to fill the cache for the date range
+        Missing ranges of all symbols of a base currency are merged, so each range is one request per base
+
+        Returns: list of (base, symbols, start date, end date) tuples
+        """
+        fetch_requests = []
+        for base, symbols in symbols_by_base.items():
+            ranges = []
+            for symbol in symbols:
+                ranges.extend(cache.missing_ranges(base, symbol, window_start, window_end))
+            for range_start, range_end in cache.merge_ranges(ranges):
+                fetch_requests.append((base, symbols, range_start, range_end))
+        return fetch_requests
+
+    @staticmethod
+    def split_window(window_start, window_end, window_days):
+        """
+        Split a date range into consecutive windows of at most window_days days
+
+        Returns: list of (start date, end date) tuples in date order
+        """
+        windows = []
+        iteration_date = datetime.strptime(window_start, '%Y-%m-%d').date()
+        end_date_dt = datetime.strptime(window_end, '%Y-%m-%d').date()
+        while iteration_date <= end_date_dt:
+            chunk_end = min(iteration_date + timedelta(days=window_days - 1), end_date_dt)
+            windows.append((iteration_date.strftime('%Y-%m-%d'), chunk_end.strftime('%Y-%m-%d')))
+            iteration_date = chunk_end + timedelta(days=1)
+        return windows
+
+    def get_exchange_rates_concurrent(self, fetch_requests, on_result=None, fetch=None):
+        """
+        Fetch many base currency/date window requests at the same time
+        Requests share one keep-alive session, run on at most max_workers threads and are rate limited per host
+
+        sample of argument - [('AUD', ['NZD', 'USD'], '2024-06-09', '2024-07-09'), ... and so on ]
+        on_result - optional callback(fetch_request, data), called in the calling thread as each request completes
+        fetch - function making each request, with the arguments of fetch_rates (default) or stream_timeseries
+
+        Returns: list of JSON data in the same order as the requests, None for failed requests (recorded in failed_pairs)
+        """
+
+        # Setup Logger
+        script_name = os.path.basename(__file__)
+        logger = setup_logger(script_name, self.context.log_file)
+        logger.info(f"Fetching {len(fetch_requests)} requests with {self.max_workers} workers")
+
+        fetch = fetch or self.fetch_rates
+        with self.create_session() as session, ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(fetch, base, symbols, logger, window_start, window_end, session): index
+                       for index, (base, symbols, window_start, window_end) in enumerate(fetch_requests)}
+            results = [None] * len(fetch_requests)
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except FetchError as e:
+                    self.record_failure(fetch_requests[index], e)
+                    continue
+                if on_result is not None:
+                    on_result(fetch_requests[index], results[index])
+            return results
+
+    def create_session(self):
+        """
+        Create a requests session with a connection pool large enough for all workers
+        In record and replay mode the fixture transport is mounted instead of the plain connection pool
+
+        Returns: requests.Session
+        """
+        session = requests.Session()
+        if self.transport_mode == "record":
+            adapter = RecordingAdapter(self.fixture_dir, pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        elif self.transport_mode == "replay":
+            adapter = ReplayAdapter(self.fixture_dir, self.replay_latency_seconds)
+        else:
+            adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def fetch_timeseries(self, base, symbols, logger, window_start=None, window_end=None, session=None):
+        """
+        Make a single API request for one base currency and a list of target currencies
+        Date window defaults to the start and end dates of the run context, session defaults to a new connection
+
+        Returns: JSON data containing exchange rates of base currency against all the symbols
+        """
+        response = self.request_timeseries(base, symbols, logger, window_start, window_end, session)
+        metrics.increment("fetch_response_bytes_total", len(response.content))
+        try:
+            return response.json()
+        except ValueError as e:
+            logger.error(f"Error decoding data: {e}")
+            raise FetchError(f"Error decoding {base} {','.join(symbols)}: {e}") from e
+
+    def fetch_rates(self, base, symbols, logger, window_start=None, window_end=None, session=None):
+        """
+        Same as fetch_timeseries, used by batch, concurrent and backfill requests
+        An API error body (success false or no rates) raises FetchError, so its pairs are reported in failed_pairs
+        and fetched again by retry_failed instead of being returned with empty rates
+
+        Returns: JSON data containing exchange rates of base currency against all the symbols
+        """
+        data = self.fetch_timeseries(base, symbols, logger, window_start, window_end, session)
+        if data.get("success") is False or "rates" not in data:
+            logger.error(f"API returned no rates for {base} {','.join(symbols)}: {data.get('error', data)}")
+            raise FetchError(f"API returned no rates for {base} {','.join(symbols)}: {data.get('error', data)}")
+        return data
+
+    def stream_timeseries(self, base, symbols, logger, window_start=None, window_end=None, session=None, cache=None):
+        """
+        Make a single API request and parse the rates date by date while the response is downloaded
+        The full response is never loaded, so memory stays flat as the date range or number of symbols grows
+
+        cache - ExchangeRateCache, when passed each date is written to the cache instead of arrays
+
+        Returns: number of rates stored when cache is passed,
+                 otherwise dict keyed by (base, target) pair of RateSeries covering every date of the window
+        """
+        window_start = window_start or self.context.start_date
+        window_end = window_end or self.context.end_date
+        response = self.request_timeseries(base, symbols, logger, window_start, window_end, session, stream=True)
+
+        try:
+            with closing(response):
+                parser = TimeseriesStreamParser(self.count_bytes(response.iter_content(self.stream_chunk_size)))
+                rate_items = self.iter_checked_rates(parser)
+                if cache is not None:
+                    return cache.store_rate_items(base, rate_items, symbols, window_start, window_end)
+                return stream_to_series(rate_items, base, symbols, window_start, window_end)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.error(f"Error streaming data: {e}")
+            raise FetchError(f"Error streaming {base} {','.join(symbols)}: {e}") from e
+
+    @staticmethod
+    def iter_checked_rates(parser):
+        """
+        Pass the parsed rates through and raise ValueError at the end of an API error body (success false or no rates)
+        The error is raised before the missing dates of the window are written, so they are fetched again later
+        """
+        yield from parser.iter_rates()
+        if parser.header.get("success") is False or not parser.has_rates:
+            raise ValueError(f"API returned no rates: {parser.header.get('error', parser.header)}")
+
+    @staticmethod
+    def count_bytes(chunks):
+        """
+        Pass chunks through while adding their size to the response bytes metric
+        """
+        for chunk in chunks:
+            metrics.increment("fetch_response_bytes_total", len(chunk))
+            yield chunk
+
+    def request_timeseries(self, base, symbols, logger, window_start=None, window_end=None, session=None, stream=False):
+        """
+        Send the API request, retrying rate limited/temporary server errors, connection errors and timeouts
+        stream - when True the body is not downloaded yet, it is read from the returned response
+
+        Returns: requests.Response with a successful status, raises FetchError when all retries fail
+        """
+
         # Prepare parameters for API request
         params = {
-            "access_key": access_key,
-            "start_date": start_date,
-            "end_date": end_date,
-            "base": base_currency,
-            "symbols": target_currency
+            "access_key": self.context.access_key,
+            "start_date": window_start or self.context.start_date,
+            "end_date": window_end or self.context.end_date,
+            "base": base,
+            "symbols": ",".join(symbols)
         }
 
         # Display parameters except for access_key
@@ -51,14 +425,95 @@ class ExchangeRateFetcher:
         params_for_log_display.pop("access_key", None)
         logger.debug(f"Parameters for API request: {params_for_log_display}")
 
-        try:
-            url = f"{self.api_url}/{self.end_point}"
-            logger.info(f"Making GET request to the API - {url}")
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-
-            return data
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching data: {e}")
-            sys.exit(1)  # Exit with a non-zero status to indicate an error
+        url = f"{self.api_url}/{self.end_point}"
+        http = session or self.transport_session or requests
+        for attempt in range(self.max_retries + 1):
+            try:
+                logger.info(f"Making GET request to the API - {url}")
+                self.rate_limiter.wait(url)
+                with metrics.timer("fetch_request_seconds", end_point=self.end_point):
+                    response = http.get(url, params=params, timeout=self.request_timeout, stream=stream)
+                metrics.increment("fetch_requests_total", status=response.status_code)
+
+                # Rate limited or temporary server error, wait (Retry-After when sent) and try again
+                if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                    delay = self.get_retry_delay(attempt, response.headers.get("Retry-After"))
+                    logger.warning(f"API responded {response.status_code}, retrying in {delay:.1f} seconds")
+                    metrics.increment("fetch_retries_total", reason=response.status_code)
+                    response.close()
+                    time.sleep(delay)
+                    continue
+
+                response.raise_for_status()
+                return response
+            except requests.exceptions.RequestException as e:
+                if attempt >= self.max_retries or not self.is_retryable(e):
+                    logger.error(f"Error fetching data: {e}")
+                    metrics.increment("fetch_errors_total", error=type(e).__name__)
+                    raise FetchError(f"Error fetching {base} {','.join(symbols)}: {e}") from e
+                delay = self.get_retry_delay(attempt)
+                logger.warning(f"Error fetching data: {e}, retrying in {delay:.1f} seconds")
+                metrics.increment("fetch_retries_total", reason=type(e).__name__)
+                time.sleep(delay)
+
+    @staticmethod
+    def is_retryable(error):
+        """
+        Connection errors, timeouts and retryable HTTP status codes are retried, other errors fail immediately
+        """
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+        response = getattr(error, "response", None)
+        return isinstance(error, requests.exceptions.HTTPError) and response is not None \
+            and response.status_code in RETRY_STATUS_CODES
+
+    def get_retry_delay(self, attempt, retry_after=None):
+        """
+        Seconds to wait before the next attempt
+        Retry-After header (seconds or HTTP date) is respected, otherwise exponential backoff with full jitter
+
+        Returns: delay in seconds, at most backoff_max_seconds
+        """
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                try:
+                    delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(max(delay, 0.0), self.backoff_max_seconds)
+
+        return random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt))
+
+    @staticmethod
+    def group_pairs_by_base(currency_pairs):
+        """
+        Group currency pairs by base currency
+
+        Returns: dict of base currency and list of target currencies e.g. { 'AUD': ['NZD', 'USD'], ... }
+        """
+        symbols_by_base = {}
+        for base, target in currency_pairs:
+            symbols = symbols_by_base.setdefault(base, [])
+            if target not in symbols:
+                symbols.append(target)
+        return symbols_by_base
+
+    @staticmethod
+    def split_by_pair(data, base, symbols):
+        """
+        Split a multi symbol API response into one response per currency pair
+        Each split response keeps the same structure as the API, so it can be passed to ExchangeRatePreProcessor
+
+        Returns: dict keyed by (base, target) pair
+        """
+        rates = data["rates"]
+        pair_data = {}
+        for symbol in symbols:
+            pair_json = {key: value for key, value in data.items() if key != "rates"}
+            pair_json["rates"] = {date: {symbol: day_rates[symbol]}
+                                  for date, day_rates in rates.items() if symbol in day_rates}
+            pair_data[(base, symbol)] = pair_json
+        return pair_data
@@ -0,0 +1,178 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Optional
+from utils.config_loader import ConfigLoader
+from utils.logger import setup_logger
+from utils.metrics import metrics
+from .exchange_rate_analyze import ExchangeRateAnalyzer
+from .exchange_rate_cache import ExchangeRateCache
+from .exchange_rate_fetcher import ExchangeRateFetcher
+from .exchange_rate_preprocess import ExchangeRatePreProcessor
+from .rate_series import RateSeries
+from .run_context import RunContext
+
+# Names of the statistics returned by ExchangeRateAnalyzer.get_statistics, in order
+STATISTICS = ("mean", "median", "std_dev", "min", "max")
+
+
+@dataclass
+class PairResult:
+    """
+    Result of the pipeline for one currency pair, error is set instead of statistics when a stage failed
+
+    sample - PairResult(pair='AUD/NZD', statistics={'mean': 1.0891, ...}, chart_file='output/...png', seconds=0.41)
+    """
+    pair: str
+    statistics: dict = field(default_factory=dict)
+    chart_file: Optional[str] = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+
+class ExchangeRatePipeline:
+    def __init__(self, context=None):
+        """
+        Initialize the ExchangeRatePipeline, runs fetch -> preprocess -> analyze -> render for many pairs
+        Fetching is I/O bound and runs in this process, the CPU bound stages are sharded across worker processes
+
+        context - RunContext with date range and log file, defaults to current configuration
+        """
+        self.context = context or RunContext.from_config()
+
+        # Generate the module configuration file name based on script name
+        config_file = "config_" + os.path.splitext(os.path.basename(__file__))[0] + ".json"
+
+        # Create a ConfigLoader instance and load module specific configurations
+        config_loader = ConfigLoader(module_config_file=config_file)
+        module_config = config_loader.get_module_config()
+
+        # Assigning worker processes (default one per CPU) and pairs sent to a worker in one task
+        self.max_workers = module_config.get("max_workers") or os.cpu_count()
+        self.pairs_per_task = module_config.get("pairs_per_task", 8)
+
+        # Assigning pairs and stages
+        self.currency_pairs = [tuple(pair) for pair in module_config.get("currency_pairs", [])]
+        self.render = module_config.get("render", True)
+        self.use_cache = module_config.get("use_cache", True)
+
+    def run(self, currency_pairs=None, pair_data=None, output_dir=None):
+        """
+        Run the pipeline for many pairs
+
+        currency_pairs - list of (base, target) pairs, defaults to configured pairs
+        pair_data - optional fetcher output (dict keyed by (base, target) of API responses), fetched when not passed
+        output_dir - folder of chart files, defaults to output folder of the analyzer
+
+        Returns: dict of pair name e.g. 'AUD/NZD' and PairResult, in the order of the pairs
+        """
+
+        # Set up the logger for the script
+        script_name = os.path.basename(__file__)
+        logger = setup_logger(script_name, self.context.log_file)
+
+        currency_pairs = [tuple(pair) for pair in (currency_pairs or self.currency_pairs)]
+        results = {f"{base}/{target}": PairResult(f"{base}/{target}") for base, target in currency_pairs}
+
+        # Fetch all pairs in this process, failed pairs are reported as errors
+        if pair_data is None:
+            with metrics.timer("pipeline_stage_seconds", stage="fetch"):
+                fetcher = ExchangeRateFetcher(self.context)
+                cache = ExchangeRateCache(context=self.context) if self.use_cache else None
+                pair_data = fetcher.get_exchange_rates_batch(currency_pairs, concurrent=True, cache=cache)
+            for (base, target), error in fetcher.failed_pairs.items():
+                results[f"{base}/{target}"].error = f"Fetch failed: {error}"
+
+        # Known rates of each pair are sent to the workers as compact arrays, not as dicts of date strings
+        tasks = []
+        for base, target in currency_pairs:
+            pair = f"{base}/{target}"
+            if results[pair].error is None:
+                if (base, target) in pair_data:
+                    tasks.append((pair, target, RateSeries.from_timeseries(pair_data[(base, target)], target, pair)))
+                else:
+                    results[pair].error = "Fetch failed: no data returned"
+
+        chunks = [tasks[index:index + self.pairs_per_task] for index in range(0, len(tasks), self.pairs_per_task)]
+        logger.info(f"Processing {len(tasks)} pairs in {len(chunks)} tasks with {self.max_workers} workers")
+
+        with metrics.timer("pipeline_stage_seconds", stage="process_pairs"), \
+                ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(process_pairs_task, chunk, self.render, output_dir, self.context): chunk
+                       for chunk in chunks}
+            for future in as_completed(futures):
+                try:
+                    chunk_results, worker_metrics = future.result()
+                    metrics.merge(worker_metrics)
+                except Exception as e:
+                    # Worker process died, every pair of its task is reported
+                    chunk_results = [PairResult(pair, error=f"Worker failed: {e!r}") for pair, _, _ in futures[future]]
+                for pair_result in chunk_results:
+                    results[pair_result.pair] = pair_result
+                    metrics.observe("pipeline_pair_seconds", pair_result.seconds)
+
+        failed = [pair_result for pair_result in results.values() if pair_result.error]
+        metrics.increment("pipeline_pairs_total", len(results) - len(failed), result="success")
+        metrics.increment("pipeline_pairs_total", len(failed), result="error")
+        logger.info(f"Pipeline finished, {len(results) - len(failed)} pairs succeeded, {len(failed)} failed")
+        for pair_result in failed:
+            logger.error(f"Pipeline failed for {pair_result.pair} - {pair_result.error}")
+
+        return results
+
+
+def process_pairs_task(tasks, render=True, output_dir=None, context=None):
+    """
+    Run process_pairs in a worker process and collect the metrics it records (preprocess, analyze and render),
+    the registry of the worker is cleared first so only the metrics of this task are returned
+
+    Returns: list of PairResult and metrics snapshot of the task, merged into the registry of the parent process
+    """
+    metrics.reset()
+    return process_pairs(tasks, render, output_dir, context), metrics.snapshot()
+
+
+def process_pairs(tasks, render=True, output_dir=None, context=None):
+    """
+    Preprocess, analyze and optionally render a task of pairs, runs in a worker process
+    An error of one pair is returned in its PairResult and does not stop the other pairs
+
+    sample of argument - [('AUD/NZD', 'NZD', RateSeries of known rates), ... and so on ]
+
+    Returns: list of PairResult in the order of the tasks
+    """
+    results = []
+    for pair, target, known in tasks:
+        start_time = time.perf_counter()
+        try:
+            if not len(known):
+                raise ValueError("no rates returned for the date range")
+
+            processor = ExchangeRatePreProcessor({'rates': {}}, target=target, context=context)
+            processed = processor.fill_series(known, pair)
+
+            analyzer = ExchangeRateAnalyzer(processed, pair=pair, context=context)
+            statistics = dict(zip(STATISTICS, (float(value) for value in analyzer.get_statistics())))
+            chart_file = analyzer.render_to_file(output_dir) if render else None
+
+            results.append(PairResult(pair, statistics, chart_file, seconds=time.perf_counter() - start_time))
+        except Exception as e:
+            results.append(PairResult(pair, error=f"{type(e).__name__}: {e}", seconds=time.perf_counter() - start_time))
+    return results
+
+
+def main():
+    """
+    Run the pipeline for the configured pairs and print a summary of each pair
+    """
+    results = ExchangeRatePipeline().run()
+    for pair_result in results.values():
+        if pair_result.error:
+            print(f"{pair_result.pair}: FAILED {pair_result.error}")
+        else:
+            print(f"{pair_result.pair}: mean {pair_result.statistics['mean']:.6f} chart {pair_result.chart_file}")
+
+
+if __name__ == "__main__":
+    main()
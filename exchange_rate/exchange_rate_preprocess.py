@@ -1,12 +1,21 @@
 import os
+import time
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
 from utils.config_loader import ConfigLoader
+from utils.lazy_import import LazyModule
 from utils.logger import setup_logger
-from . import *
+from utils.metrics import metrics
+from .rate_series import RateSeries
+from .run_context import RunContext
+
+# Heavy libraries are imported on first use (only the vectorized preprocessing needs them)
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
 
 
 class ExchangeRatePreProcessor:
-    def __init__(self, json_data):
+    def __init__(self, json_data, target=None, context=None):
         """
         Initialize the ExchangeRatePreProcessor with Json Data containing exchange rates
 
@@ -26,8 +35,14 @@ class ExchangeRatePreProcessor:
             ...
             ...
         }
+
+        target is the currency to read from each date of the rates, defaults to target currency of the run context
+        context is the RunContext with date range and log file, defaults to current configuration
             """
+        self.context = context or RunContext.from_config()
         self.json_data = json_data['rates']
+        self.target_currency = target or self.context.target_currency
+        self.sorted_dates = None
 
         # Generate the module configuration file name based on script name
         config_file = "config_" + os.path.splitext(os.path.basename(__file__))[0] + ".json"
@@ -36,9 +51,11 @@ class ExchangeRatePreProcessor:
         config_loader = ConfigLoader(module_config_file=config_file)
         module_config = config_loader.get_module_config()
 
-        # PLACEHOLDER - Assigning Variables from configurations
-        self.place_holder_var1 = module_config.get("place_holder_var1")
-        # self.place_holder_var2 = module_config.get("place_holder_var2")
+        # Assigning interpolation strategy from configurations
+        self.interpolation = module_config.get("interpolation", "midpoint")
+        if self.interpolation not in INTERPOLATION_KERNELS:
+            raise ValueError(f"Unknown interpolation strategy '{self.interpolation}', "
+                             f"expected one of {list(INTERPOLATION_KERNELS)}")
 
     def process_data(self):
         """
@@ -46,22 +63,30 @@ class ExchangeRatePreProcessor:
         a. Fixes any missing dates (if any) in the last 30 days date range
         b. Interpolates missing values by taking average of previous and next values.
            In absence of either of them i.e. previous or next, then same value is used for both whichever is available
+        Other interpolation strategies can be configured, see INTERPOLATION_KERNELS
         """
 
         # Set up the logger for the script
         script_name = os.path.basename(__file__)
-        logger = setup_logger(script_name, log_file)
+        logger = setup_logger(script_name, self.context.log_file)
         logger.info("Setting up Variables")
 
-        # List of dates available in the json data
-        existing_dates = list(self.json_data.keys())
+        # Other interpolation strategies use the vectorized kernels
+        if self.interpolation != "midpoint":
+            logger.info(f"Interpolating with {self.interpolation} strategy")
+            return self.process_series().to_dict()
+        start_time = time.perf_counter()
+
+        # Set of dates available in the json data, sorted once for nearest date lookups during interpolation
+        existing_dates = set(self.json_data.keys())
+        self.sorted_dates = sorted(existing_dates)
 
         # List to hold all required dates
         required_dates = []
 
         # Converting start and end dates from string to date objects as date operation is required later
-        iteration_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-        end_date_dt = datetime.strptime(end_date, '%Y-%m-%d').date()
+        iteration_date = datetime.strptime(self.context.start_date, '%Y-%m-%d').date()
+        end_date_dt = datetime.strptime(self.context.end_date, '%Y-%m-%d').date()
 
         # Generating Required Dates Dict for comparison with extracted dates
         while iteration_date <= end_date_dt:
@@ -71,16 +96,66 @@ class ExchangeRatePreProcessor:
 
         # Interpolating missing data (required dates was already derived earlier)
         processed_data = {}
+        filled_count = 0
         for iteration_date in required_dates:
             if iteration_date not in existing_dates:
                 processed_data[iteration_date] = self.interpolate_value(self.json_data, iteration_date)
+                filled_count += 1
             else:
-                processed_data[iteration_date] = self.json_data[iteration_date][target_currency]
+                processed_data[iteration_date] = self.json_data[iteration_date][self.target_currency]
+
+        self.record_metrics(len(required_dates), filled_count, time.perf_counter() - start_time)
 
         # Returned data will be dict of a key value pair of date and exchange rate
         # example - { '2024-07-09' : 1.0789, '2024-07-08' : 1.0785, ... and so on }
         return processed_data
 
+    def process_series(self, pair=None):
+        """
+        Preprocessing the data into a compact RateSeries (int32 day ordinals and float64 rates) with array operations
+        Same result as process_data, without building a dict of date strings
+
+        Returns: RateSeries covering every date (business days only for business_day strategy) of the date range
+        """
+        return self.fill_series(RateSeries.from_timeseries({'rates': self.json_data}, self.target_currency), pair)
+
+    def fill_series(self, known, pair=None):
+        """
+        Fill the date range from a RateSeries of the known rates, e.g. arrays received by a worker process
+        instead of json data
+
+        Returns: RateSeries covering every date (business days only for business_day strategy) of the date range
+        """
+        start_time = time.perf_counter()
+        window_start = np.datetime64(self.context.start_date, 'D').astype(np.int64)
+        window_end = np.datetime64(self.context.end_date, 'D').astype(np.int64)
+
+        # Full calendar also covers known dates outside the range, as they are used as previous/next values
+        calendar_start = min(window_start, known.day_ordinals[0]) if len(known) else window_start
+        calendar_end = max(window_end, known.day_ordinals[-1]) if len(known) else window_end
+        calendar = np.arange(calendar_start, calendar_end + 1, dtype=np.int64)
+        values = np.full(len(calendar), np.nan)
+        values[known.day_ordinals - calendar_start] = known.rates
+
+        # Day 0 (1970-01-01) is a Thursday, weekdays are Monday=0 to Sunday=6
+        if self.interpolation == "business_day":
+            business_days = (calendar + 3) % 7 < 5
+            calendar, values = calendar[business_days], values[business_days]
+
+        filled = INTERPOLATION_KERNELS[self.interpolation](values[:, None], calendar)[:, 0]
+        in_window = (calendar >= window_start) & (calendar <= window_end)
+        self.record_metrics(int(in_window.sum()), int(np.isnan(values[in_window]).sum()),
+                            time.perf_counter() - start_time)
+        return RateSeries(calendar[in_window], filled[in_window], pair)
+
+    def record_metrics(self, date_count, filled_count, seconds):
+        """
+        Add dates processed, dates filled by interpolation and processing time to the run metrics
+        """
+        metrics.increment("preprocess_dates_total", date_count, strategy=self.interpolation)
+        metrics.increment("preprocess_dates_filled_total", filled_count, strategy=self.interpolation)
+        metrics.observe("preprocess_seconds", seconds, strategy=self.interpolation)
+
     def interpolate_value(self, rates_data, date):
         """
         Interpolates missing values by taking average of previous and next values.
@@ -93,14 +168,14 @@ class ExchangeRatePreProcessor:
             return None
 
         if prev_date is None:
-            prev_rate = rates_data[next_date][target_currency]
+            prev_rate = rates_data[next_date][self.target_currency]
         else:
-            prev_rate = rates_data[prev_date][target_currency]
+            prev_rate = rates_data[prev_date][self.target_currency]
 
         if next_date is None:
-            next_rate = rates_data[prev_date][target_currency]
+            next_rate = rates_data[prev_date][self.target_currency]
         else:
-            next_rate = rates_data[next_date][target_currency]
+            next_rate = rates_data[next_date][self.target_currency]
         interpolated_value = (prev_rate + next_rate) / 2
         return interpolated_value
 
@@ -109,15 +184,198 @@ class ExchangeRatePreProcessor:
         Finds dates on the left/right side of the date passed as an argument inside the dictionary
         This also works if more than one date is missing
 
+        Dates are sorted only once per process_data call and searched with binary search
+
         Returns: two dates - previous date and next date available in dict
         """
-        dates = list(rates_data.keys())
-        dates.sort()
-        prev_date, next_date = None, None
-        for iter_date in dates:
-            if iter_date <= date:
-                prev_date = iter_date
-            if iter_date >= date:
-                next_date = iter_date
-                break
+        if rates_data is self.json_data and self.sorted_dates is not None:
+            dates = self.sorted_dates
+        else:
+            dates = sorted(rates_data.keys())
+
+        # Last date on or before the date and first date on or after the date
+        prev_index = bisect_right(dates, date)
+        next_index = bisect_left(dates, date)
+        prev_date = dates[prev_index - 1] if prev_index > 0 else None
+        next_date = dates[next_index] if next_index < len(dates) else None
         return prev_date, next_date
+
+
+class ExchangeRateFramePreProcessor:
+    def __init__(self, rates_frame, interpolation=None, context=None):
+        """
+        Initialize the ExchangeRateFramePreProcessor with exchange rates of many currency pairs at once
+
+        rates_frame - pandas DataFrame indexed by date with one column per currency pair, missing rates as NaN
+        sample of argument -
+                        AUD/NZD   AUD/USD
+            2024-06-08  1.07895   0.66321
+            2024-06-10      NaN   0.66402
+        interpolation - one of INTERPOLATION_KERNELS, defaults to configured interpolation strategy
+        context - RunContext with date range and log file, defaults to current configuration
+        """
+        self.context = context or RunContext.from_config()
+        self.rates_frame = rates_frame.copy()
+        self.rates_frame.index = pd.to_datetime(self.rates_frame.index)
+        self.rates_frame = self.rates_frame.sort_index().astype('float64')
+
+        # Generate the module configuration file name based on script name
+        config_file = "config_" + os.path.splitext(os.path.basename(__file__))[0] + ".json"
+
+        # Create a ConfigLoader instance and load module specific configurations
+        config_loader = ConfigLoader(module_config_file=config_file)
+        module_config = config_loader.get_module_config()
+
+        # Assigning interpolation strategy from argument or configurations
+        self.interpolation = interpolation or module_config.get("interpolation", "midpoint")
+        if self.interpolation not in INTERPOLATION_KERNELS:
+            raise ValueError(f"Unknown interpolation strategy '{self.interpolation}', "
+                             f"expected one of {list(INTERPOLATION_KERNELS)}")
+
+    @classmethod
+    def from_pair_data(cls, pair_data, interpolation=None, context=None):
+        """
+        Build the preprocessor from fetcher output of many pairs, i.e. dict keyed by (base, target) of API responses
+
+        Returns: ExchangeRateFramePreProcessor with one column per pair named 'BASE/TARGET'
+        """
+        columns = {}
+        for (base, target), json_data in pair_data.items():
+            rates = json_data['rates']
+            columns[f"{base}/{target}"] = pd.Series([rates[date].get(target) for date in rates],
+                                                    index=list(rates.keys()), dtype='float64')
+        return cls(pd.DataFrame(columns), interpolation, context)
+
+    @classmethod
+    def from_series(cls, series_by_pair, interpolation=None, context=None):
+        """
+        Build the preprocessor from RateSeries of many pairs e.g. output of ExchangeRateFetcher.stream_timeseries,
+        the rate arrays are used as columns without building dicts of dates
+
+        Returns: ExchangeRateFramePreProcessor with one column per pair named 'BASE/TARGET'
+        """
+        columns = {f"{base}/{target}": pd.Series(series.rates, index=series.dates())
+                   for (base, target), series in series_by_pair.items()}
+        return cls(pd.DataFrame(columns), interpolation, context)
+
+    def process_data(self, window_start=None, window_end=None):
+        """
+        Preprocessing the data of all pairs with array operations
+        a. Reindexes all pairs onto every calendar date (business days only for business_day strategy)
+           between start and end date in one operation
+        b. Interpolates missing values with the kernel of the configured interpolation strategy
+
+        Returns: pandas DataFrame indexed by every date of the range with one column per currency pair
+        """
+
+        # Set up the logger for the script
+        script_name = os.path.basename(__file__)
+        logger = setup_logger(script_name, self.context.log_file)
+        logger.info(f"Preprocessing {self.rates_frame.shape[1]} pairs with {self.interpolation} strategy")
+
+        start_time = time.perf_counter()
+        window_start = pd.Timestamp(window_start or self.context.start_date)
+        window_end = pd.Timestamp(window_end or self.context.end_date)
+
+        # Full calendar also covers known dates outside the range, as they are used as previous/next values
+        calendar_start = min([window_start] + list(self.rates_frame.index[:1]))
+        calendar_end = max([window_end] + list(self.rates_frame.index[-1:]))
+        if self.interpolation == "business_day":
+            calendar = pd.bdate_range(calendar_start, calendar_end)
+        else:
+            calendar = pd.date_range(calendar_start, calendar_end, freq='D')
+        frame = self.rates_frame.reindex(calendar)
+
+        # Fill all pairs at once with the strategy kernel, dates are passed as day ordinals for time based kernels
+        day_ordinals = calendar.to_numpy().astype('datetime64[D]').astype('int64')
+        filled = INTERPOLATION_KERNELS[self.interpolation](frame.to_numpy(), day_ordinals)
+        processed_frame = pd.DataFrame(filled, index=calendar, columns=frame.columns)
+
+        # Cells of the date range filled by interpolation, all pairs together
+        in_window = (calendar >= window_start) & (calendar <= window_end)
+        metrics.increment("preprocess_dates_total", int(in_window.sum()) * frame.shape[1], strategy=self.interpolation)
+        metrics.increment("preprocess_dates_filled_total", int(frame[in_window].isna().to_numpy().sum()),
+                          strategy=self.interpolation)
+        metrics.observe("preprocess_seconds", time.perf_counter() - start_time, strategy=self.interpolation)
+        return processed_frame.loc[window_start:window_end]
+
+
+def nearest_known_indexes(values):
+    """
+    Find for every cell of a dates x pairs array the row index of the previous and next known (not NaN) value
+
+    Returns: two int arrays shaped like values, previous index (-1 if none) and next index (-1 if none)
+    """
+    row_count = values.shape[0]
+    known = ~np.isnan(values)
+    rows = np.arange(row_count)[:, None]
+
+    prev_index = np.maximum.accumulate(np.where(known, rows, -1), axis=0)
+    next_index = np.minimum.accumulate(np.where(known, rows, row_count)[::-1], axis=0)[::-1]
+    next_index = np.where(next_index == row_count, -1, next_index)
+    return prev_index, next_index
+
+
+def take_rows(values, row_index):
+    """
+    Pick values[row_index[i, j], j] for every cell, NaN where row_index is -1
+    """
+    picked = np.take_along_axis(values, np.maximum(row_index, 0), axis=0)
+    return np.where(row_index >= 0, picked, np.nan)
+
+
+def neighbour_values(values):
+    """
+    Previous and next known value of every cell, at the borders each side falls back to the other
+
+    Returns: previous values, next values, previous row index, next row index
+    """
+    prev_index, next_index = nearest_known_indexes(values)
+    forward = take_rows(values, prev_index)
+    backward = take_rows(values, next_index)
+    prev_values = np.where(np.isnan(forward), backward, forward)
+    next_values = np.where(np.isnan(backward), forward, backward)
+    return prev_values, next_values, prev_index, next_index
+
+
+def midpoint_fill(values, day_ordinals):
+    """
+    Missing values are the average of previous and next known values (original preprocessing rule)
+    """
+    prev_values, next_values, _, _ = neighbour_values(values)
+    return np.where(np.isnan(values), (prev_values + next_values) / 2, values)
+
+
+def forward_fill(values, day_ordinals):
+    """
+    Missing values take the previous known value, leading missing values take the next known value
+    """
+    prev_values, _, _, _ = neighbour_values(values)
+    return np.where(np.isnan(values), prev_values, values)
+
+
+def linear_fill(values, day_ordinals):
+    """
+    Missing values are interpolated linearly by time between previous and next known values,
+    at the borders the only available value is used
+    """
+    prev_values, next_values, prev_index, next_index = neighbour_values(values)
+    days = day_ordinals.astype('float64')[:, None]
+    prev_days = np.take(days, np.maximum(prev_index, 0))
+    next_days = np.take(days, np.maximum(next_index, 0))
+
+    # Weight is 0 on the previous known date and 1 on the next known date, 0 when one side is missing
+    span = next_days - prev_days
+    both_known = (prev_index >= 0) & (next_index >= 0) & (span > 0)
+    weight = np.where(both_known, (days - prev_days) / np.where(span > 0, span, 1), 0.0)
+    return np.where(np.isnan(values), prev_values + (next_values - prev_values) * weight, values)
+
+
+# Interpolation strategies selectable in config_exchange_rate_preprocess.json, each kernel fills a dates x pairs array
+# business_day uses a calendar of business days only (weekends are skipped) and the midpoint rule
+INTERPOLATION_KERNELS = {
+    "midpoint": midpoint_fill,
+    "forward_fill": forward_fill,
+    "linear": linear_fill,
+    "business_day": midpoint_fill
+}
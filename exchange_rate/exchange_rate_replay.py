@@ -0,0 +1,116 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from urllib.parse import urlparse, parse_qsl, urlencode
+from requests import Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.exceptions import RequestException
+from requests.structures import CaseInsensitiveDict
+
+# Query parameters never written to fixtures and ignored when matching a request
+SECRET_PARAMS = {"access_key"}
+
+# Response headers kept in fixtures
+RECORDED_HEADERS = ("Content-Type", "Retry-After")
+
+
+class FixtureMissing(RequestException):
+    """
+    Raised in replay mode when no fixture was recorded for a request
+    """
+
+
+def fixture_key(url):
+    """
+    Identify a request by its path and query parameters (sorted, access key removed), independent of the API host
+
+    Returns: tuple of (path, sanitized query string)
+    """
+    parsed = urlparse(url)
+    params = sorted((key, value) for key, value in parse_qsl(parsed.query) if key not in SECRET_PARAMS)
+    return parsed.path, urlencode(params)
+
+
+def fixture_path(fixture_dir, url):
+    """
+    Returns: path of the compressed fixture file of a request e.g. fixtures/timeseries_3f2a9c1d0b7e4a56.json.gz
+    """
+    path, query = fixture_key(url)
+    digest = hashlib.sha256(f"{path}?{query}".encode()).hexdigest()[:16]
+    name = os.path.basename(path.rstrip("/")) or "root"
+    return os.path.join(fixture_dir, f"{name}_{digest}.json.gz")
+
+
+class RecordingAdapter(HTTPAdapter):
+    def __init__(self, fixture_dir, **kwargs):
+        """
+        Transport adapter sending requests to the real API and saving every response to a gzip fixture file
+        First line of the file is the response metadata as json, the rest is the response body as received
+
+        fixture_dir - folder of the fixture files, created when missing
+        """
+        super().__init__(**kwargs)
+        self.fixture_dir = fixture_dir
+        os.makedirs(fixture_dir, exist_ok=True)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+
+        # Reading content downloads the body, the response can still be iterated afterwards
+        path, query = fixture_key(request.url)
+        metadata = {
+            "method": request.method,
+            "path": path,
+            "query": query,
+            "status_code": response.status_code,
+            "reason": response.reason,
+            "headers": {header: response.headers[header] for header in RECORDED_HEADERS if header in response.headers}
+        }
+        with gzip.open(fixture_path(self.fixture_dir, request.url), "wb") as fixture_file:
+            fixture_file.write(json.dumps(metadata).encode() + b"\n")
+            fixture_file.write(response.content)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    def __init__(self, fixture_dir, latency_seconds=0):
+        """
+        Transport adapter serving recorded fixture files instead of sending requests, no network is used
+        Bodies are decompressed while they are read, so streamed responses stay streamed
+
+        fixture_dir - folder of the fixture files written by RecordingAdapter
+        latency_seconds - fixed delay added to every response, for deterministic timing in benchmarks
+        """
+        super().__init__()
+        self.fixture_dir = fixture_dir
+        self.latency_seconds = latency_seconds
+
+    def send(self, request, stream=False, **kwargs):
+        path = fixture_path(self.fixture_dir, request.url)
+        if not os.path.exists(path):
+            _, query = fixture_key(request.url)
+            raise FixtureMissing(f"No fixture recorded for {urlparse(request.url).path}?{query} in {self.fixture_dir}",
+                                 request=request)
+
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+        fixture_file = gzip.open(path, "rb")
+        metadata = json.loads(fixture_file.readline())
+
+        response = Response()
+        response.status_code = metadata["status_code"]
+        response.reason = metadata.get("reason")
+        response.headers = CaseInsensitiveDict(metadata.get("headers", {}))
+        response.url = request.url
+        response.request = request
+        response.raw = fixture_file
+        if not stream:
+            with fixture_file:
+                response._content = fixture_file.read()
+        return response
+
+    def close(self):
+        pass
@@ -0,0 +1,312 @@
+import json
+import os
+import threading
+from datetime import date as date_type
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from utils.config_loader import ConfigLoader
+from utils.lazy_import import LazyModule
+from utils.logger import setup_logger
+from .run_context import RunContext
+from .exchange_rate_analyze import fused_statistics, rolling_volatility, exponential_moving_average, \
+    max_drawdown, correlation_matrix, latest_available
+from .exchange_rate_cache import ExchangeRateCache
+from .exchange_rate_fetcher import ExchangeRateFetcher
+from .exchange_rate_preprocess import ExchangeRateFramePreProcessor
+
+np = LazyModule('numpy')
+
+# Date ordinal (days since 0001-01-01) of 1970-01-01, the epoch of numpy datetime64[D]
+EPOCH_ORDINAL = date_type(1970, 1, 1).toordinal()
+
+
+class RateStore:
+    def __init__(self):
+        """
+        In memory store of preprocessed rates, per pair an int64 array of date ordinals and a float64 array of rates
+        Dates are looked up with a binary search, so frames without weekends (business_day interpolation) are kept as is
+        A pair is replaced as a whole on refresh, so readers never see a partially updated series
+        """
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def load_frame(self, processed_frame):
+        """
+        Load a dates x pairs DataFrame (output of ExchangeRateFramePreProcessor), dates in order
+        """
+        if processed_frame.empty:
+            return
+        day_ordinals = processed_frame.index.values.astype('datetime64[D]').astype(np.int64) + EPOCH_ORDINAL
+        values = np.ascontiguousarray(processed_frame.to_numpy(), dtype=np.float64)
+        with self.lock:
+            for column_index, pair in enumerate(processed_frame.columns):
+                self.series[pair] = (day_ordinals, values[:, column_index].copy())
+
+    def get_series(self, pair):
+        series = self.series.get(pair)
+        if series is None:
+            raise KeyError(f"Unknown pair '{pair}'")
+        return series
+
+    def pairs(self):
+        return sorted(self.series)
+
+    def rate_at(self, pair, date):
+        """
+        Returns: rate of the pair on the date ('YYYY-MM-DD'), None when the date is not stored
+        """
+        day_ordinals, values = self.get_series(pair)
+        day_ordinal = date_type.fromisoformat(date).toordinal()
+        index = np.searchsorted(day_ordinals, day_ordinal)
+        if index >= len(day_ordinals) or day_ordinals[index] != day_ordinal:
+            return None
+        return self.to_json_number(values[index])
+
+    def get_range(self, pair, window_start, window_end):
+        """
+        Returns: dict of date and rate for the stored dates between start and end date (both inclusive)
+        """
+        day_ordinals, values = self.get_series(pair)
+        start_index, end_index = self.window_indexes(day_ordinals, window_start, window_end)
+        return {date_type.fromordinal(int(day_ordinals[index])).isoformat(): self.to_json_number(values[index])
+                for index in range(start_index, end_index)}
+
+    def get_statistics(self, pair, window_start, window_end):
+        """
+        Returns: dict of mean, median, standard deviation, min and max of the rates in the window, None when not available
+        """
+        day_ordinals, values = self.get_series(pair)
+        start_index, end_index = self.window_indexes(day_ordinals, window_start, window_end)
+        if end_index == start_index:
+            return {'count': 0, 'mean': None, 'median': None, 'std_dev': None, 'min': None, 'max': None}
+        mean_rate, median_rate, std_dev, min_rate, max_rate = fused_statistics(values[start_index:end_index])
+        return {'count': end_index - start_index, 'mean': self.to_json_number(mean_rate),
+                'median': self.to_json_number(median_rate), 'std_dev': self.to_json_number(std_dev),
+                'min': self.to_json_number(min_rate), 'max': self.to_json_number(max_rate)}
+
+    def get_analytics(self, pair, window_start, window_end, volatility_window, ema_span, annualization_days=None):
+        """
+        Returns: dict of volatility and exponential moving average on the last date of the window they are available
+                 and max drawdown within the window, None when not available
+        """
+        day_ordinals, values = self.get_series(pair)
+        start_index, end_index = self.window_indexes(day_ordinals, window_start, window_end)
+        window_values = values[start_index:end_index]
+        if not len(window_values):
+            return {'count': 0, 'volatility': None, 'ema': None, 'max_drawdown': None}
+        volatility = latest_available(rolling_volatility(window_values, volatility_window, annualization_days))
+        ema = latest_available(exponential_moving_average(window_values, ema_span))
+        return {'count': len(window_values), 'volatility': self.to_json_number(volatility),
+                'ema': self.to_json_number(ema), 'max_drawdown': self.to_json_number(max_drawdown(window_values))}
+
+    def get_correlation(self, pairs, window_start, window_end):
+        """
+        Correlation of log returns of the pairs over the dates all pairs have in the window
+
+        Returns: dict of pairs, date range used and correlation matrix as nested lists (None where not available)
+        """
+        series = [self.get_series(pair) for pair in pairs]
+
+        # Dates stored for every pair within the window
+        common_ordinals = None
+        for day_ordinals, _ in series:
+            start_index, end_index = self.window_indexes(day_ordinals, window_start, window_end)
+            window_ordinals = day_ordinals[start_index:end_index]
+            common_ordinals = window_ordinals if common_ordinals is None else \
+                np.intersect1d(common_ordinals, window_ordinals, assume_unique=True)
+        if common_ordinals is None or not len(common_ordinals):
+            return {'pairs': pairs, 'start': None, 'end': None, 'matrix': [[None] * len(pairs) for _ in pairs]}
+
+        # Dates x pairs matrix of the common dates
+        matrix = np.column_stack([values[np.searchsorted(day_ordinals, common_ordinals)]
+                                  for day_ordinals, values in series])
+        correlation = correlation_matrix(matrix)
+        return {'pairs': pairs,
+                'start': date_type.fromordinal(int(common_ordinals[0])).isoformat(),
+                'end': date_type.fromordinal(int(common_ordinals[-1])).isoformat(),
+                'matrix': [[self.to_json_number(value) for value in row] for row in correlation]}
+
+    @staticmethod
+    def to_json_number(value):
+        return None if np.isnan(value) else float(value)
+
+    @staticmethod
+    def window_indexes(day_ordinals, window_start, window_end):
+        """
+        Returns: (start index, end index) of the stored dates between start and end date (both inclusive),
+                 start index equals end index when no date is stored in the window
+        """
+        start_index = np.searchsorted(day_ordinals, date_type.fromisoformat(window_start).toordinal(), side='left')
+        end_index = np.searchsorted(day_ordinals, date_type.fromisoformat(window_end).toordinal(), side='right')
+        return int(start_index), int(max(end_index, start_index))
+
+
+class ExchangeRateService:
+    def __init__(self, currency_pairs=None, context=None):
+        """
+        Initialize the ExchangeRateService, a long running process that keeps preprocessed rates in memory
+        and answers rate, range and statistics queries
+
+        currency_pairs - list of (base, target) pairs, defaults to configured pairs or the run context pair
+        context - RunContext used for the first refresh, later refreshes build a new context (current date range)
+        """
+        self.context = context or RunContext.from_config()
+
+        # Generate the module configuration file name based on script name
+        config_file = "config_" + os.path.splitext(os.path.basename(__file__))[0] + ".json"
+
+        # Create a ConfigLoader instance and load module specific configurations
+        config_loader = ConfigLoader(module_config_file=config_file)
+        module_config = config_loader.get_module_config()
+
+        # Assigning Module Variables from configurations
+        self.refresh_interval = module_config.get("refresh_interval_seconds", 3600)
+        self.host = module_config.get("host", "127.0.0.1")
+        self.port = module_config.get("port", 8080)
+        self.volatility_window = module_config.get("volatility_window", 30)
+        self.ema_span = module_config.get("ema_span", 20)
+        self.annualization_days = module_config.get("annualization_days")
+        configured_pairs = [tuple(pair) for pair in module_config.get("currency_pairs", [])]
+        self.currency_pairs = currency_pairs or configured_pairs \
+            or [(self.context.base_currency, self.context.target_currency)]
+
+        self.store = RateStore()
+        self.stop_event = threading.Event()
+        self.refresh_thread = None
+        self.server = None
+
+    def refresh(self):
+        """
+        Fetch (only dates missing from cache), preprocess all pairs at once and replace the stored series
+        """
+        script_name = os.path.basename(__file__)
+        logger = setup_logger(script_name, self.context.log_file)
+        logger.info(f"Refreshing {len(self.currency_pairs)} pairs")
+
+        fetcher = ExchangeRateFetcher(self.context)
+        pair_data = fetcher.get_exchange_rates_batch(self.currency_pairs, concurrent=True,
+                                                     cache=ExchangeRateCache(context=self.context))
+        processed_frame = ExchangeRateFramePreProcessor.from_pair_data(pair_data, context=self.context).process_data()
+        self.store.load_frame(processed_frame)
+
+    def start_refresh(self):
+        """
+        Refresh now and then every refresh_interval seconds on a background thread
+        """
+        self.refresh()
+        self.refresh_thread = threading.Thread(target=self.refresh_loop, daemon=True)
+        self.refresh_thread.start()
+
+    def refresh_loop(self):
+        script_name = os.path.basename(__file__)
+        while not self.stop_event.wait(self.refresh_interval):
+            try:
+                self.context = RunContext.from_config()
+                self.refresh()
+            except Exception as e:
+                # Keep serving the last loaded rates when a refresh fails
+                setup_logger(script_name, self.context.log_file).error(f"Refresh failed: {e}")
+
+    def rate_at(self, pair, date):
+        return self.store.rate_at(pair, date)
+
+    def get_range(self, pair, window_start, window_end):
+        return self.store.get_range(pair, window_start, window_end)
+
+    def get_statistics(self, pair, window_start, window_end):
+        return self.store.get_statistics(pair, window_start, window_end)
+
+    def get_analytics(self, pair, window_start, window_end):
+        return self.store.get_analytics(pair, window_start, window_end, self.volatility_window, self.ema_span,
+                                        self.annualization_days)
+
+    def get_correlation(self, pairs, window_start, window_end):
+        return self.store.get_correlation(pairs or self.store.pairs(), window_start, window_end)
+
+    def serve_http(self, host=None, port=None):
+        """
+        Start the local HTTP query API on a background thread
+
+        GET /pairs
+        GET /rate?pair=AUD/NZD&date=2024-07-09
+        GET /range?pair=AUD/NZD&start=2024-07-01&end=2024-07-09
+        GET /stats?pair=AUD/NZD&start=2024-07-01&end=2024-07-09
+        GET /analytics?pair=AUD/NZD&start=2024-01-01&end=2024-07-09
+        GET /correlation?pairs=AUD/NZD,AUD/USD&start=2024-01-01&end=2024-07-09 (all pairs when pairs is not passed)
+
+        Returns: (host, port) the server is listening on
+        """
+        service = self
+
+        class QueryHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                try:
+                    if url.path == '/pairs':
+                        body = service.store.pairs()
+                    elif url.path == '/rate':
+                        body = {'pair': params['pair'], 'date': params['date'],
+                                'rate': service.rate_at(params['pair'], params['date'])}
+                    elif url.path == '/range':
+                        body = service.get_range(params['pair'], params['start'], params['end'])
+                    elif url.path == '/stats':
+                        body = service.get_statistics(params['pair'], params['start'], params['end'])
+                    elif url.path == '/analytics':
+                        body = service.get_analytics(params['pair'], params['start'], params['end'])
+                    elif url.path == '/correlation':
+                        pairs = params['pairs'].split(',') if params.get('pairs') else None
+                        body = service.get_correlation(pairs, params['start'], params['end'])
+                    else:
+                        self.send_json(404, {'error': f"Unknown path '{url.path}'"})
+                        return
+                except KeyError as e:
+                    self.send_json(404, {'error': f"Missing or unknown value: {e}"})
+                    return
+                except ValueError as e:
+                    self.send_json(400, {'error': str(e)})
+                    return
+                self.send_json(200, body)
+
+            def send_json(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host or self.host, self.port if port is None else port), QueryHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server.server_address
+
+    def stop(self):
+        """
+        Stop refresh thread and HTTP server
+        """
+        self.stop_event.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def main():
+    """
+    Run the rate service until interrupted
+    """
+    service = ExchangeRateService()
+    service.start_refresh()
+    host, port = service.serve_http()
+    print(f"Exchange rate service listening on http://{host}:{port}")
+    try:
+        service.stop_event.wait()
+    except KeyboardInterrupt:
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
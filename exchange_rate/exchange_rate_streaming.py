@@ -0,0 +1,233 @@
+import os
+from dataclasses import dataclass
+from typing import Any, Optional
+from utils.config_loader import ConfigLoader
+from utils.lazy_import import LazyModule
+from utils.logger import setup_logger
+from .exchange_rate_analyze import IncrementalExchangeRateAnalyzer, fused_trend
+from .exchange_rate_fetcher import ExchangeRateFetcher
+from .exchange_rate_preprocess import INTERPOLATION_KERNELS
+from .rate_series import RateSeries
+from .run_context import RunContext
+
+np = LazyModule('numpy')
+
+
+@dataclass
+class TrendChunk:
+    """
+    Date ordered chunk of a processed pair, with moving average and rate of change of each date
+
+    sample - TrendChunk(day_ordinals=array([19913, 19914]), rates=array([1.0789, 1.0785]),
+                        moving_average=array([nan, 1.0787]), rate_of_change=array([nan, -0.0004]), pair='AUD/NZD')
+    """
+    day_ordinals: Any
+    rates: Any
+    moving_average: Any
+    rate_of_change: Any
+    pair: Optional[str] = None
+
+    def __len__(self):
+        return len(self.rates)
+
+
+class StreamingGapFiller:
+    def __init__(self, interpolation="midpoint"):
+        """
+        Fill missing rates of date ordered chunks with an interpolation kernel, carrying state across chunks
+        Dates after the last known rate of a chunk wait for the next known rate (next chunk), so the result is the same
+        as filling the whole series at once. Only the last known rate and the waiting dates are kept.
+
+        interpolation - one of INTERPOLATION_KERNELS
+        """
+        if interpolation not in INTERPOLATION_KERNELS:
+            raise ValueError(f"Unknown interpolation strategy '{interpolation}', "
+                             f"expected one of {list(INTERPOLATION_KERNELS)}")
+        self.interpolation = interpolation
+        self.kernel = INTERPOLATION_KERNELS[interpolation]
+        self.last_known = None
+        self.pending_ordinals = None
+
+    def process(self, chunk):
+        """
+        Fill a chunk of consecutive dates, missing rates as NaN
+
+        Returns: RateSeries of the dates that can be filled now (dates waiting for a next known rate are held back)
+        """
+        day_ordinals = chunk.day_ordinals.astype(np.int64)
+        rates = chunk.rates
+
+        # Day 0 (1970-01-01) is a Thursday, weekdays are Monday=0 to Sunday=6
+        if self.interpolation == "business_day":
+            business_days = (day_ordinals + 3) % 7 < 5
+            day_ordinals, rates = day_ordinals[business_days], rates[business_days]
+
+        # Dates held back from earlier chunks come first
+        if self.pending_ordinals is not None:
+            day_ordinals = np.concatenate([self.pending_ordinals, day_ordinals])
+            rates = np.concatenate([np.full(len(self.pending_ordinals), np.nan), rates])
+
+        # Forward fill only needs a previous rate, other kernels need the next known rate as well
+        known_index = np.flatnonzero(~np.isnan(rates))
+        ready_count = known_index[-1] + 1 if len(known_index) else 0
+        if self.interpolation == "forward_fill" and (ready_count or self.last_known is not None):
+            ready_count = len(rates)
+
+        self.pending_ordinals = day_ordinals[ready_count:]
+        return RateSeries(day_ordinals[:ready_count], self.fill(day_ordinals[:ready_count], rates[:ready_count]),
+                          chunk.pair)
+
+    def finish(self, pair=None):
+        """
+        Fill the dates still waiting at the end of the series, they take the last known rate (same as at the border
+        of a whole series)
+
+        Returns: RateSeries of the remaining dates
+        """
+        day_ordinals = self.pending_ordinals if self.pending_ordinals is not None else np.empty(0, dtype=np.int64)
+        self.pending_ordinals = None
+        return RateSeries(day_ordinals, self.fill(day_ordinals, np.full(len(day_ordinals), np.nan)), pair)
+
+    def fill(self, day_ordinals, rates):
+        """
+        Apply the kernel with the last known rate of the earlier chunks as first row, so it is used as previous value
+        """
+        if not len(rates):
+            return rates
+        if self.last_known is not None:
+            day_ordinals = np.concatenate([[self.last_known[0]], day_ordinals])
+            rates = np.concatenate([[self.last_known[1]], rates])
+            filled = self.kernel(rates[:, None], day_ordinals)[1:, 0]
+            day_ordinals = day_ordinals[1:]
+        else:
+            filled = self.kernel(rates[:, None], day_ordinals)[:, 0]
+        if not np.isnan(filled[-1]):
+            self.last_known = (day_ordinals[-1], filled[-1])
+        return filled
+
+
+class StreamingTrend:
+    def __init__(self, moving_average):
+        """
+        Moving average, rate of change and statistics of date ordered chunks of filled rates
+        The last moving_average - 1 rates are carried to the next chunk, so windows span chunk boundaries
+
+        moving_average - number of days of the moving average window
+        """
+        self.moving_average = moving_average
+        self.tail = np.empty(0)
+        self.statistics = IncrementalExchangeRateAnalyzer()
+
+    def process(self, chunk):
+        """
+        Returns: TrendChunk of the chunk, moving average is NaN until a full window was seen (same as pandas)
+        """
+        values = np.concatenate([self.tail, chunk.rates])
+        moving_average, rate_of_change = fused_trend(values, self.moving_average)
+        carried = len(self.tail)
+        self.tail = values[-max((self.moving_average or 1) - 1, 1):]
+
+        for day_ordinal, rate in zip(chunk.day_ordinals.tolist(), chunk.rates.tolist()):
+            self.statistics.append(day_ordinal, rate)
+
+        return TrendChunk(chunk.day_ordinals, chunk.rates, moving_average[carried:], rate_of_change[carried:],
+                          chunk.pair)
+
+
+class ExchangeRateStreamingPipeline:
+    def __init__(self, context=None):
+        """
+        Initialize the ExchangeRateStreamingPipeline, fetch windows, gap filling and trend analysis are chained as
+        generators over date ordered chunks, so decades of daily data are processed without holding a full history
+
+        context - RunContext with date range and log file, defaults to current configuration
+        """
+        self.context = context or RunContext.from_config()
+
+        # Generate the module configuration file name based on script name
+        config_file = "config_" + os.path.splitext(os.path.basename(__file__))[0] + ".json"
+
+        # Create a ConfigLoader instance and load module specific configurations
+        config_loader = ConfigLoader(module_config_file=config_file)
+        module_config = config_loader.get_module_config()
+
+        # Assigning days per chunk (one API request each), interpolation strategy and moving average window
+        self.window_days = module_config.get("window_days", 365)
+        self.interpolation = module_config.get("interpolation", "midpoint")
+        self.moving_average = module_config.get("moving_average", 7)
+
+    def iter_windows(self, base, target, window_start=None, window_end=None, cache=None):
+        """
+        Fetch a pair one window at a time, each response is streamed into arrays (or into the cache and read back)
+
+        Returns: generator of RateSeries covering every date of each window, missing rates as NaN
+        """
+
+        # Set up the logger for the script
+        script_name = os.path.basename(__file__)
+        logger = setup_logger(script_name, self.context.log_file)
+
+        fetcher = ExchangeRateFetcher(self.context)
+        pair = f"{base}/{target}"
+        for chunk_start, chunk_end in fetcher.split_window(window_start or self.context.start_date,
+                                                           window_end or self.context.end_date, self.window_days):
+            logger.info(f"Streaming {pair} {chunk_start} to {chunk_end}")
+            if cache is None:
+                yield fetcher.stream_timeseries(base, [target], logger, chunk_start, chunk_end)[(base, target)]
+                continue
+
+            if cache.missing_ranges(base, target, chunk_start, chunk_end):
+                fetcher.stream_timeseries(base, [target], logger, chunk_start, chunk_end, cache=cache)
+            known = RateSeries.from_dict(cache.get_rates(base, target, chunk_start, chunk_end))
+            first_day = np.datetime64(chunk_start, 'D').astype(np.int64)
+            day_ordinals = np.arange(first_day, np.datetime64(chunk_end, 'D').astype(np.int64) + 1)
+            rates = np.full(len(day_ordinals), np.nan)
+            rates[known.day_ordinals - first_day] = known.rates
+            yield RateSeries(day_ordinals, rates, pair)
+
+    def fill_chunks(self, chunks, pair=None):
+        """
+        Returns: generator of filled RateSeries chunks, see StreamingGapFiller
+        """
+        gap_filler = StreamingGapFiller(self.interpolation)
+        for chunk in chunks:
+            filled = gap_filler.process(chunk)
+            if len(filled):
+                yield filled
+        remaining = gap_filler.finish(pair)
+        if len(remaining):
+            yield remaining
+
+    def trend_chunks(self, chunks, trend=None):
+        """
+        Returns: generator of TrendChunk, statistics of all chunks are kept in trend.statistics
+        """
+        trend = trend or StreamingTrend(self.moving_average)
+        for chunk in chunks:
+            yield trend.process(chunk)
+
+    def iter_pair(self, base, target, window_start=None, window_end=None, cache=None, trend=None):
+        """
+        Chain fetch, gap filling and trend analysis of one pair
+
+        Returns: generator of TrendChunk in date order
+        """
+        windows = self.iter_windows(base, target, window_start, window_end, cache)
+        return self.trend_chunks(self.fill_chunks(windows, f"{base}/{target}"), trend)
+
+    def run(self, currency_pairs, window_start=None, window_end=None, cache=None, on_chunk=None):
+        """
+        Stream every pair through the pipeline, one pair and one chunk at a time
+
+        on_chunk - optional callback(pair, TrendChunk) e.g. to write each chunk to a file
+
+        Returns: dict of pair name e.g. 'AUD/NZD' and its statistics (mean, median, std dev, min, max)
+        """
+        statistics = {}
+        for base, target in currency_pairs:
+            trend = StreamingTrend(self.moving_average)
+            for trend_chunk in self.iter_pair(base, target, window_start, window_end, cache, trend):
+                if on_chunk is not None:
+                    on_chunk(f"{base}/{target}", trend_chunk)
+            statistics[f"{base}/{target}"] = trend.statistics.get_statistics()
+        return statistics
@@ -0,0 +1,115 @@
+import os
+from utils.config_loader import ConfigLoader
+from utils.lazy_import import LazyModule
+from utils.logger import setup_logger
+from .run_context import RunContext
+from .exchange_rate_fetcher import ExchangeRateFetcher
+from .exchange_rate_preprocess import ExchangeRateFramePreProcessor
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+
+class ExchangeRateTriangulator:
+    def __init__(self, pivot_frame, pivot_currency=None, context=None):
+        """
+        Initialize the ExchangeRateTriangulator with rates of all currencies against one pivot currency
+        Any cross pair is derived as rate(pivot -> target) / rate(pivot -> base), so one API request per day
+        serves the full cross rate grid
+
+        pivot_frame - pandas DataFrame indexed by date with one column per currency (rate of 1 pivot in that currency)
+        sample of argument -
+                        AUD      NZD      JPY
+            2024-07-08  1.6046   1.7629   174.21
+        pivot_currency - defaults to configured pivot currency
+        """
+        self.context = context or RunContext.from_config()
+
+        # Generate the module configuration file name based on script name
+        config_file = "config_" + os.path.splitext(os.path.basename(__file__))[0] + ".json"
+
+        # Create a ConfigLoader instance and load module specific configurations
+        config_loader = ConfigLoader(module_config_file=config_file)
+        module_config = config_loader.get_module_config()
+
+        # Assigning Module Variables from configurations
+        self.pivot_currency = pivot_currency or module_config.get("pivot_currency", "EUR")
+        self.cache_matrix = module_config.get("cache_matrix", True)
+        self.cross_matrix_cache = None
+
+        # Pivot itself is a column of ones, so pairs with the pivot currency are derived the same way
+        self.pivot_frame = pivot_frame.astype('float64').sort_index()
+        if self.pivot_currency not in self.pivot_frame.columns:
+            self.pivot_frame[self.pivot_currency] = 1.0
+        self.currencies = list(self.pivot_frame.columns)
+        self.pivot_values = np.ascontiguousarray(self.pivot_frame.to_numpy())
+
+    @classmethod
+    def fetch(cls, currencies, pivot_currency=None, cache=None, context=None):
+        """
+        Fetch all currencies against the pivot currency with a single API request (per missing date range when cached),
+        fill missing dates and build the triangulator
+
+        Returns: ExchangeRateTriangulator
+        """
+        context = context or RunContext.from_config()
+        triangulator_pivot = pivot_currency or cls.configured_pivot_currency()
+        pairs = [(triangulator_pivot, currency) for currency in currencies if currency != triangulator_pivot]
+
+        script_name = os.path.basename(__file__)
+        logger = setup_logger(script_name, context.log_file)
+        logger.info(f"Fetching {len(pairs)} currencies against pivot {triangulator_pivot}")
+
+        pair_data = ExchangeRateFetcher(context).get_exchange_rates_batch(pairs, cache=cache)
+        processed_frame = ExchangeRateFramePreProcessor.from_pair_data(pair_data, context=context).process_data()
+        processed_frame.columns = [column.split('/')[1] for column in processed_frame.columns]
+        return cls(processed_frame, triangulator_pivot, context)
+
+    @classmethod
+    def configured_pivot_currency(cls):
+        config_file = "config_" + os.path.splitext(os.path.basename(__file__))[0] + ".json"
+        return ConfigLoader(module_config_file=config_file).get_module_config().get("pivot_currency", "EUR")
+
+    def currency_index(self, currency):
+        try:
+            return self.currencies.index(currency)
+        except ValueError:
+            raise KeyError(f"Currency '{currency}' is not available against pivot {self.pivot_currency}")
+
+    def cross_rate(self, base, target):
+        """
+        Rate of base currency in target currency for every date
+
+        Returns: pandas Series indexed by date
+        """
+        values = self.pivot_values[:, self.currency_index(target)] / self.pivot_values[:, self.currency_index(base)]
+        return pd.Series(values, index=self.pivot_frame.index, name=f"{base}/{target}")
+
+    def cross_pairs(self, currency_pairs):
+        """
+        Rates of many cross pairs at once, ready for statistics_by_pair or the analyzer
+
+        sample of argument - [('NZD', 'JPY'), ('AUD', 'USD'), ... and so on ]
+
+        Returns: pandas DataFrame indexed by date with one column per pair named 'BASE/TARGET'
+        """
+        base_indexes = [self.currency_index(base) for base, _ in currency_pairs]
+        target_indexes = [self.currency_index(target) for _, target in currency_pairs]
+        values = self.pivot_values[:, target_indexes] / self.pivot_values[:, base_indexes]
+        return pd.DataFrame(values, index=self.pivot_frame.index,
+                            columns=[f"{base}/{target}" for base, target in currency_pairs])
+
+    def cross_matrix(self):
+        """
+        Full cross rate grid for every date, matrix[d, i, j] is the rate of currencies[i] in currencies[j] on date d
+        Computed with one broadcast division and kept in memory when cache_matrix is enabled
+
+        Returns: numpy array shaped (dates, currencies, currencies)
+        """
+        if self.cross_matrix_cache is not None:
+            return self.cross_matrix_cache
+
+        matrix = self.pivot_values[:, None, :] / self.pivot_values[:, :, None]
+        if self.cache_matrix:
+            self.cross_matrix_cache = matrix
+        return matrix
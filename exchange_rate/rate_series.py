@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+from typing import Any, Optional
+from utils.lazy_import import LazyModule
+
+np = LazyModule('numpy')
+
+
+@dataclass
+class RateSeries:
+    """
+    Compact representation of the rates of one currency pair
+    day_ordinals - int32 array of days since 1970-01-01 (numpy datetime64[D] epoch), in date order
+    rates - float64 array of the rate on each day, NaN when not available
+
+    sample - RateSeries(day_ordinals=array([19913, 19914]), rates=array([1.0789, 1.0785]), pair='AUD/NZD')
+    """
+    day_ordinals: Any
+    rates: Any
+    pair: Optional[str] = None
+
+    def __post_init__(self):
+        self.day_ordinals = np.ascontiguousarray(self.day_ordinals, dtype=np.int32)
+        self.rates = np.ascontiguousarray(self.rates, dtype=np.float64)
+        if self.day_ordinals.shape != self.rates.shape:
+            raise ValueError(f"day_ordinals {self.day_ordinals.shape} and rates {self.rates.shape} must have the same shape")
+
+    def __len__(self):
+        return len(self.rates)
+
+    @classmethod
+    def from_dict(cls, exchange_rate_dict, pair=None):
+        """
+        Build from the dict format e.g. { '2024-07-09' : 1.0789, '2024-07-08' : 1.0785, ... and so on }
+        """
+        dates = np.array(list(exchange_rate_dict.keys()), dtype='datetime64[D]')
+        rates = np.array([np.nan if rate is None else rate for rate in exchange_rate_dict.values()], dtype=np.float64)
+        order = np.argsort(dates, kind='stable')
+        return cls(dates[order].astype(np.int64), rates[order], pair)
+
+    @classmethod
+    def from_timeseries(cls, json_data, target, pair=None):
+        """
+        Build from a timeseries API response, reading the rate of the target currency on each date
+        """
+        rates = json_data['rates']
+        return cls.from_dict({date: day_rates.get(target) for date, day_rates in rates.items()}, pair)
+
+    def dates(self):
+        """
+        Returns: numpy datetime64[D] array of the dates
+        """
+        return self.day_ordinals.astype('datetime64[D]')
+
+    def to_dict(self):
+        """
+        Adapter to the dict format used by process_data
+
+        Returns: dict of date and rate e.g. { '2024-07-09' : 1.0789, '2024-07-08' : 1.0785, ... and so on }
+        """
+        return dict(zip(self.dates().astype(str).tolist(), self.rates.tolist()))
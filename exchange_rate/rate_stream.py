@@ -0,0 +1,140 @@
+import codecs
+import json
+from datetime import date as date_type
+from utils.lazy_import import LazyModule
+from .rate_series import RateSeries
+
+np = LazyModule('numpy')
+
+# Characters skipped between JSON tokens
+WHITESPACE = ' \t\n\r'
+
+
+class TimeseriesStreamParser:
+    def __init__(self, chunks):
+        """
+        Incremental parser of a timeseries API response, the "rates" object is read one date at a time
+        so the full response is never held in memory
+
+        chunks - iterable of bytes (or str) pieces of the response e.g. response.iter_content(65536)
+        """
+        self.chunks = iter(chunks)
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+        self.exhausted = False
+
+        # Top level fields other than rates e.g. {'success': True, 'base': 'AUD', ...}, filled while parsing
+        self.header = {}
+        self.has_rates = False
+
+    def iter_rates(self):
+        """
+        Parse the response and yield each date of the rates object in response order
+
+        Returns: generator of (date, day rates) e.g. ('2024-07-09', {'NZD': 1.0789, 'USD': 0.6712})
+        """
+        self.expect('{')
+        while self.peek() != '}':
+            if self.peek() == ',':
+                self.position += 1
+                continue
+            key = self.decode_value()
+            self.expect(':')
+            if key == 'rates':
+                self.has_rates = True
+                yield from self.iter_object()
+            else:
+                self.header[key] = self.decode_value()
+        self.position += 1
+
+    def iter_object(self):
+        """
+        Yield (key, value) of the object at the current position, each value is decoded on its own
+        """
+        self.expect('{')
+        while self.peek() != '}':
+            if self.peek() == ',':
+                self.position += 1
+                continue
+            key = self.decode_value()
+            self.expect(':')
+            yield key, self.decode_value()
+        self.position += 1
+
+    def peek(self):
+        """
+        Returns: next character that is not whitespace, reading more of the response when needed
+        """
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.read_more():
+                raise ValueError("Unexpected end of timeseries response")
+
+    def expect(self, character):
+        if self.peek() != character:
+            raise ValueError(f"Expected '{character}' at '{self.buffer[self.position:self.position + 20]}'")
+        self.position += 1
+
+    def decode_value(self):
+        """
+        Decode the JSON value at the current position, reading more of the response until the value is complete
+        A value ending exactly at the end of the buffer may be a cut number, so it is decoded again with more data
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.position)
+                if end < len(self.buffer) or self.exhausted or not self.read_more():
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if not self.read_more():
+                    raise ValueError("Malformed timeseries response")
+
+    def read_more(self):
+        """
+        Append the next chunk to the buffer, the part already parsed is dropped
+
+        Returns: False when the response is exhausted
+        """
+        if self.exhausted:
+            return False
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.exhausted = True
+            self.buffer = self.buffer[self.position:] + self.text_decoder.decode(b'', final=True)
+        else:
+            text = self.text_decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+            self.buffer = self.buffer[self.position:] + text
+        self.position = 0
+        return chunk is not None
+
+
+def stream_to_series(rate_items, base, symbols, window_start, window_end):
+    """
+    Write the rates of each date straight into preallocated arrays, one per symbol, covering every date of the window
+    Dates outside the window are ignored, dates missing in the response stay NaN
+
+    rate_items - iterable of (date, day rates) e.g. TimeseriesStreamParser(chunks).iter_rates()
+
+    Returns: dict keyed by (base, target) pair of RateSeries
+    """
+    first_day = date_type.fromisoformat(window_start).toordinal()
+    day_count = date_type.fromisoformat(window_end).toordinal() - first_day + 1
+    values = {symbol: np.full(day_count, np.nan) for symbol in symbols}
+
+    for date, day_rates in rate_items:
+        row = date_type.fromisoformat(date).toordinal() - first_day
+        if not 0 <= row < day_count:
+            continue
+        for symbol, rate in day_rates.items():
+            if rate is not None and symbol in values:
+                values[symbol][row] = rate
+
+    day_ordinals = np.arange(day_count, dtype=np.int64) + np.datetime64(window_start, 'D').astype(np.int64)
+    return {(base, symbol): RateSeries(day_ordinals, rates, f"{base}/{symbol}") for symbol, rates in values.items()}
@@ -0,0 +1,50 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from utils.config_loader import ConfigLoader
+
+
+@dataclass(frozen=True)
+class RunContext:
+    """
+    Parameters of one run, passed explicitly to fetcher, cache, preprocessor and analyzer
+
+    sample - RunContext(log_file='/log/exchange_rate.2024-07-09.log', access_key='xxxx', start_date='2024-06-09',
+                        end_date='2024-07-09', current_date='2024-07-09', delta_days=30,
+                        base_currency='AUD', target_currency='NZD')
+    """
+    log_file: str
+    access_key: str
+    start_date: str
+    end_date: str
+    current_date: str
+    delta_days: int
+    base_currency: str
+    target_currency: str
+
+    @classmethod
+    def from_config(cls, start_date=None, end_date=None, base_currency=None, target_currency=None, now=None):
+        """
+        Build the run context from configuration at the time of the call (not at import time)
+        Date range defaults to the configured number of days up to today
+
+        Returns: RunContext
+        """
+        settings = ConfigLoader().get_settings()
+        if not settings.log_file:
+            raise ValueError("LOG_FILE is not set in the .env file or environment")
+        current_datetime = now or datetime.now()
+        current_date = current_datetime.strftime('%Y-%m-%d')
+
+        # Calculate start and end dates for fetching data
+        end_date = end_date or current_date
+        start_date = start_date or (datetime.strptime(end_date, '%Y-%m-%d')
+                                    - timedelta(days=settings.days)).strftime('%Y-%m-%d')
+
+        return cls(log_file=settings.log_file + "." + current_date + ".log",
+                   access_key=settings.api_key,
+                   start_date=start_date,
+                   end_date=end_date,
+                   current_date=current_date,
+                   delta_days=settings.days,
+                   base_currency=base_currency or settings.base_currency,
+                   target_currency=target_currency or settings.target_currency)
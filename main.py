@@ -1,34 +1,24 @@
 import os
-from datetime import datetime
-# Import project utilities to assist logging and loading configurations
+import sys
+# Import project utilities to assist logging
 from utils.logger import setup_logger
-from utils.config_loader import ConfigLoader
+from utils.metrics import metrics, MetricsReporter
 # Import classes to be instantiated
-from exchange_rate.exchange_rate_fetcher import ExchangeRateFetcher
+from exchange_rate import RunContext
+from exchange_rate.exchange_rate_fetcher import ExchangeRateFetcher, FetchError
+from exchange_rate.exchange_rate_cache import ExchangeRateCache
 from exchange_rate.exchange_rate_preprocess import ExchangeRatePreProcessor
 from exchange_rate.exchange_rate_analyze import ExchangeRateAnalyzer
 
 
 def init_variables():
     """
-    Initialize environment variables
+    Initialize run variables
 
     Returns:
-        dict: Environment variables loaded from environmental configuration file and  derived variables
+        RunContext: date range, currencies, access key and log file of this run, derived from configuration at call time
     """
-    config_loader = ConfigLoader()
-    env_variables = config_loader.get_env_variables()
-    current_datetime = datetime.now()
-
-    # Create a log file name by appending the current date to the base file name
-    log_file = env_variables.get('LOG_FILE') + "." + current_datetime.strftime('%Y-%m-%d') + ".log"
-
-    # Construct a config (dictionary) for configuration settings that will be used by main function
-    config_dict = {
-        'log_file': log_file,
-        'current_datetime': current_datetime
-    }
-    return config_dict
+    return RunContext.from_config()
 
 
 # Main function to run the script
@@ -41,28 +31,53 @@ def main():
     c. Analyze and visualize exchange rate data
     """
     # Fetch Variables to configure
-    config_dict = init_variables()
+    context = init_variables()
 
     # Set up logger
     script_name = os.path.basename(__file__)
-    logger = setup_logger(script_name, config_dict['log_file'])
+    logger = setup_logger(script_name, context.log_file)
 
     # Log the start of the process
     logger.info("Initiating process to retrieve exchange rates")
 
-    # Fetch the exchange rates data
-    fetcher = ExchangeRateFetcher()
-    exchange_rate_json = fetcher.get_exchange_rates()
+    # Stage timings and counters of the run are written to the metrics folder (see config_metrics.json)
+    with MetricsReporter().run("main") as metrics_files:
+        run_pipeline(context, logger)
+    for metrics_file in metrics_files:
+        logger.info(f"Metrics written to {metrics_file}")
+
+
+def run_pipeline(context, logger):
+    """
+    Fetch, preprocess, analyze and render the exchange rates of the run context, each stage is timed
+    """
+
+    # Fetch the exchange rates data, only dates missing from the local cache are requested from the API
+    with metrics.timer("pipeline_stage_seconds", stage="fetch"):
+        cache = ExchangeRateCache(context=context)
+        fetcher = ExchangeRateFetcher(context)
+        try:
+            exchange_rate_json = fetcher.get_exchange_rates(cache=cache)
+        except FetchError as e:
+            logger.error(f"Exchange rates could not be fetched: {e}")
+            sys.exit(1)
 
     logger.info("Preprocess data to fix date/rates anomalies")
-    processor = ExchangeRatePreProcessor(exchange_rate_json)
-    exchange_rate_processed = processor.process_data()
+    with metrics.timer("pipeline_stage_seconds", stage="preprocess"):
+        processor = ExchangeRatePreProcessor(exchange_rate_json, context=context)
+        exchange_rate_processed = processor.process_series(f"{context.base_currency}/{context.target_currency}")
 
     # Create an instance of ExchangeRateAnalyzer
-    analyzer = ExchangeRateAnalyzer(exchange_rate_processed)
-
-    # Analyze and visualize data
-    analyzer.visualize_data()
+    with metrics.timer("pipeline_stage_seconds", stage="analyze"):
+        analyzer = ExchangeRateAnalyzer(exchange_rate_processed, context=context)
+
+    # Analyze and visualize data, either on screen or written to a chart file (headless servers)
+    with metrics.timer("pipeline_stage_seconds", stage="render"):
+        if analyzer.render_mode == "file":
+            chart_file = analyzer.render_to_file()
+            logger.info(f"Chart written to {chart_file}")
+        else:
+            analyzer.visualize_data()
 
 
 # Execute the main function if the script is run directly
@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+from unittest.mock import patch
+from utils.config_loader import ConfigLoader, Settings
+
+"""
+Test Case1: Check whether a config file is parsed once for many ConfigLoader instances and reloaded when it changes
+"""
+def test_case1_config_loader_cached_and_reloaded():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_file = os.path.join(temp_dir, "config_module.json")
+        with open(config_file, 'w') as file:
+            json.dump({"moving_average": 7}, file)
+
+        # Many instances, file parsed only once
+        with patch('utils.config_loader.json.load', side_effect=json.load) as mock_json_load:
+            module_configs = [ConfigLoader(module_config_file=config_file).get_module_config() for _ in range(1000)]
+            assert mock_json_load.call_count == 1
+        assert module_configs[-1] == {"moving_average": 7}
+
+        # Changed file (new modification time) is parsed again
+        with open(config_file, 'w') as file:
+            json.dump({"moving_average": 14}, file)
+        stat = os.stat(config_file)
+        os.utime(config_file, (stat.st_atime, stat.st_mtime + 10))
+        assert ConfigLoader(module_config_file=config_file).get_module_config() == {"moving_average": 14}
+
+
+"""
+Test Case2: Check whether settings are validated into a typed object
+"""
+def test_case2_settings_validation():
+    env_config = {'API_KEY': 'key', 'LOG_FILE': '/tmp/exchange_rate', 'LOG_QUEUE': 'true'}
+    settings = Settings.from_config(env_config, {"defaults_exchange_rate": {"days": 30, "base_currency": "aud",
+                                                                            "target_currency": "NZD"}})
+    assert settings.days == 30
+    assert settings.base_currency == "AUD"
+    assert settings.log_queue is True
+
+    for invalid_defaults in ({"days": "30", "base_currency": "AUD", "target_currency": "NZD"},
+                             {"days": 30, "base_currency": "AUDX", "target_currency": "NZD"},
+                             {"days": 30, "base_currency": "AUD"}):
+        try:
+            Settings.from_config(env_config, {"defaults_exchange_rate": invalid_defaults})
+            assert False, "invalid settings should raise ValueError"
+        except ValueError:
+            pass
+
+
+# Running the test
+test_case1_config_loader_cached_and_reloaded()
+test_case2_settings_validation()
@@ -1,4 +1,13 @@
-from exchange_rate.exchange_rate_analyze import ExchangeRateAnalyzer
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from exchange_rate.exchange_rate_analyze import ExchangeRateAnalyzer, IncrementalExchangeRateAnalyzer, \
+    fused_trend, statistics_by_pair, render_pairs, analytics_by_pair, correlation_by_pair, rolling_volatility, \
+    exponential_moving_average, drawdown, correlation_matrix
+from exchange_rate.rate_series import RateSeries
 
 def test_case1_get_statistics():
     # Sample exchange rate data dictionary
@@ -25,4 +34,200 @@ def test_case1_get_statistics():
     assert max_rate == 1.100644
 
 
+def test_case2_incremental_statistics():
+    # Random series of 100 days, appended one day at a time
+    random.seed(3)
+    exchange_rate_dict = {(datetime(2024, 1, 1) + timedelta(days=day)).strftime('%Y-%m-%d'): round(1 + random.random() / 10, 6)
+                          for day in range(100)}
+
+    incremental_analyzer = IncrementalExchangeRateAnalyzer()
+    for count, (date, rate) in enumerate(exchange_rate_dict.items(), start=1):
+        incremental_analyzer.append(date, rate)
+
+        # Compare with full recomputation for the data appended so far (every 10 days and both ends)
+        if count in (1, 2, 3, 100) or count % 10 == 0:
+            analyzer = ExchangeRateAnalyzer(dict(list(exchange_rate_dict.items())[:count]))
+            analyzer.trend_analysis()
+            expected = analyzer.get_statistics()
+            actual = incremental_analyzer.get_statistics()
+            for actual_value, expected_value in zip(actual, expected):
+                assert (actual_value != actual_value and expected_value != expected_value) \
+                    or abs(actual_value - expected_value) < 1e-9
+
+            expected_moving_average = analyzer.df['Moving Average'].iloc[-1]
+            if expected_moving_average != expected_moving_average:
+                assert incremental_analyzer.get_moving_average() is None
+            else:
+                assert abs(incremental_analyzer.get_moving_average() - expected_moving_average) < 1e-9
+            if count > 1:
+                assert abs(incremental_analyzer.rate_of_change - analyzer.df['Rate of Change'].iloc[-1]) < 1e-12
+
+    # Dates appended twice or out of order are rejected and do not change the statistics
+    statistics = incremental_analyzer.get_statistics()
+    for date in ('2024-04-09', '2024-01-15'):
+        try:
+            incremental_analyzer.append(date, 2.0)
+            assert False, "ValueError should have been raised"
+        except ValueError:
+            pass
+    assert incremental_analyzer.count == 100 and incremental_analyzer.get_statistics() == statistics
+
+
+def test_case3_fused_statistics_many_pairs():
+    # 200 days x 5 pairs of random rates
+    rng = np.random.default_rng(5)
+    rates_frame = pd.DataFrame(rng.random((200, 5)) + 1, index=pd.date_range('2024-01-01', periods=200),
+                               columns=[f"AUD/P{index}" for index in range(5)])
+
+    # Statistics and trend of all pairs at once
+    statistics = statistics_by_pair(rates_frame)
+    moving_average, rate_of_change = fused_trend(rates_frame.to_numpy(), 7)
+
+    # Assertions against pandas reductions of each pair
+    for column in rates_frame.columns:
+        series = rates_frame[column]
+        assert np.isclose(statistics.loc[column, 'Mean'], series.mean())
+        assert np.isclose(statistics.loc[column, 'Median'], series.median())
+        assert np.isclose(statistics.loc[column, 'Standard Deviation'], series.std())
+        assert statistics.loc[column, 'Min'] == series.min()
+        assert statistics.loc[column, 'Max'] == series.max()
+    assert np.allclose(moving_average, rates_frame.rolling(window=7).mean().to_numpy(), equal_nan=True)
+    assert np.allclose(rate_of_change, rates_frame.diff().to_numpy(), equal_nan=True)
+
+
+def test_case4_render_charts_to_files():
+    # Two pairs of sample data
+    exchange_rate_dict = {'2024-07-01': 1.097228, '2024-07-02': 1.096445, '2024-07-03': 1.098792,
+                          '2024-07-04': 1.10017, '2024-07-05': 1.098888, '2024-07-06': 1.100644,
+                          '2024-07-07': 1.098638, '2024-07-08': 1.098268}
+    pair_rates = {'AUD/NZD': exchange_rate_dict,
+                  'AUD/USD': {date: rate * 0.6 for date, rate in exchange_rate_dict.items()}}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Single chart rendered to svg and many charts rendered to png by worker processes
+        svg_file = ExchangeRateAnalyzer(exchange_rate_dict, pair='AUD/NZD').render_to_file(temp_dir, 'svg')
+        chart_files = render_pairs(pair_rates, temp_dir, 'png', max_workers=2)
+
+        # Assertions on written files
+        assert os.path.basename(svg_file) == 'exchange_rate_AUD_NZD_2024-07-01_2024-07-08.svg'
+        assert os.path.getsize(svg_file) > 0
+        assert set(chart_files) == {'AUD/NZD', 'AUD/USD'}
+        for chart_file in chart_files.values():
+            with open(chart_file, 'rb') as file:
+                assert file.read(8) == b'\x89PNG\r\n\x1a\n'
+
+
+def test_case5_analyzer_from_rate_series():
+    # Same data as dict and as compact RateSeries
+    exchange_rate_dict = {'2024-07-01': 1.097228, '2024-07-02': 1.096445, '2024-07-03': 1.098792,
+                          '2024-07-04': 1.10017, '2024-07-05': 1.098888}
+    rate_series = RateSeries.from_dict(exchange_rate_dict, pair='AUD/NZD')
+
+    analyzer = ExchangeRateAnalyzer(rate_series)
+
+    # Assertions - same dates and statistics as the dict input
+    assert analyzer.pair == 'AUD/NZD'
+    assert list(analyzer.df['Date'].dt.strftime('%Y-%m-%d')) == list(exchange_rate_dict.keys())
+    assert analyzer.get_statistics() == ExchangeRateAnalyzer(exchange_rate_dict).get_statistics()
+    assert rate_series.to_dict() == exchange_rate_dict
+
+
+def test_case6_extended_analytics_many_pairs():
+    # 300 days x 4 pairs of random walk rates
+    rng = np.random.default_rng(11)
+    rates_frame = pd.DataFrame(np.exp(np.cumsum(rng.normal(0, 0.01, (300, 4)), axis=0)),
+                               index=pd.date_range('2024-01-01', periods=300),
+                               columns=[f"AUD/P{index}" for index in range(4)])
+    values = rates_frame.to_numpy()
+
+    # Analytics of all pairs at once
+    analytics = analytics_by_pair(rates_frame, 30, 20, 365)
+    correlation = correlation_by_pair(rates_frame)
+
+    # Assertions against pandas of each pair
+    returns = np.log(rates_frame).diff()
+    expected_volatility = returns.rolling(window=30).std() * np.sqrt(365)
+    expected_ema = rates_frame.ewm(span=20, adjust=False).mean()
+    expected_drawdown = rates_frame / rates_frame.cummax() - 1
+    assert np.allclose(rolling_volatility(values, 30, 365), expected_volatility.to_numpy(), equal_nan=True)
+    assert np.allclose(exponential_moving_average(values, 20), expected_ema.to_numpy())
+    assert np.allclose(drawdown(values), expected_drawdown.to_numpy())
+    assert np.allclose(analytics['Volatility'], expected_volatility.iloc[-1])
+    assert np.allclose(analytics['EMA'], expected_ema.iloc[-1])
+    assert np.allclose(analytics['Max Drawdown'], expected_drawdown.min())
+    assert np.allclose(correlation.to_numpy(), returns.corr().to_numpy())
+
+    # Single pair analyzer adds the same columns
+    pair_rates = {f"{date:%Y-%m-%d}": rate for date, rate in rates_frame['AUD/P0'].items()}
+    analyzer = ExchangeRateAnalyzer(pair_rates, pair='AUD/P0')
+    max_drawdown_rate = analyzer.extended_analysis()
+    assert np.isclose(max_drawdown_rate, expected_drawdown['AUD/P0'].min())
+    assert np.allclose(analyzer.df['EMA'], expected_ema['AUD/P0'].to_numpy())
+
+
+def test_case7_statistics_and_trend_with_missing_rates():
+    # 120 days x 4 pairs with missing rates, one pair with a single rate and one pair without rates
+    rng = np.random.default_rng(17)
+    values = rng.random((120, 4)) + 1
+    values[rng.random((120, 4)) < 0.15] = np.nan
+    values[:119, 2] = np.nan
+    values[:, 3] = np.nan
+    rates_frame = pd.DataFrame(values, index=pd.date_range('2024-01-01', periods=120),
+                               columns=[f"AUD/P{index}" for index in range(4)])
+
+    statistics = statistics_by_pair(rates_frame)
+    moving_average, rate_of_change = fused_trend(values, 5)
+
+    # Assertions against pandas, which skips missing values
+    assert np.allclose(statistics['Mean'], rates_frame.mean(), equal_nan=True)
+    assert np.allclose(statistics['Median'], rates_frame.median(), equal_nan=True)
+    assert np.allclose(statistics['Standard Deviation'], rates_frame.std(), equal_nan=True)
+    assert np.allclose(statistics['Min'], rates_frame.min(), equal_nan=True)
+    assert np.allclose(statistics['Max'], rates_frame.max(), equal_nan=True)
+    assert np.allclose(moving_average, rates_frame.rolling(window=5).mean().to_numpy(), equal_nan=True)
+    assert np.allclose(rate_of_change, rates_frame.diff().to_numpy(), equal_nan=True)
+
+    # Moving average is available again once the window has passed a gap
+    gap_average, _ = fused_trend(np.array([1.0, 2.0, np.nan, 4.0, 5.0, 6.0]), 2)
+    assert np.allclose(gap_average, [np.nan, 1.5, np.nan, np.nan, 4.5, 5.5], equal_nan=True)
+    analyzer = ExchangeRateAnalyzer(RateSeries(np.arange(120) + 19723, values[:, 0], 'AUD/P0'))
+    assert np.isclose(analyzer.get_statistics()[1], rates_frame['AUD/P0'].median())
+
+
+def test_case8_extended_analytics_with_gaps():
+    # 200 days x 4 pairs of random walk rates with gaps, one pair starting later and one with a single rate
+    rng = np.random.default_rng(23)
+    values = np.exp(np.cumsum(rng.normal(0, 0.01, (200, 4)), axis=0))
+    values[rng.random((200, 4)) < 0.1] = np.nan
+    values[:150, 2] = np.nan
+    values[:199, 3] = np.nan
+    rates_frame = pd.DataFrame(values, index=pd.date_range('2024-01-01', periods=200),
+                               columns=[f"AUD/P{index}" for index in range(4)])
+
+    # Assertions against pandas, gaps only affect the windows containing them
+    returns = np.log(rates_frame).diff()
+    expected_volatility = returns.rolling(window=10).std()
+    expected_ema = rates_frame.ewm(span=7, adjust=False).mean()
+    expected_drawdown = rates_frame / rates_frame.cummax() - 1
+    assert np.allclose(rolling_volatility(values, 10), expected_volatility.to_numpy(), equal_nan=True)
+    assert np.allclose(exponential_moving_average(values, 7), expected_ema.to_numpy(), equal_nan=True)
+    assert np.allclose(drawdown(values), expected_drawdown.to_numpy(), equal_nan=True)
+    assert np.allclose(correlation_matrix(values), returns.corr().to_numpy(), equal_nan=True)
+    assert not np.isnan(rolling_volatility(values, 10)[-30:, 0]).all()
+
+    # Latest available volatility and EMA of each pair
+    analytics = analytics_by_pair(rates_frame, 10, 7)
+    assert np.allclose(analytics['Volatility'], [expected_volatility[column].dropna().iloc[-1]
+                                                 for column in rates_frame.columns[:3]] + [np.nan], equal_nan=True)
+    assert np.allclose(analytics['EMA'], expected_ema.iloc[-1])
+    assert np.allclose(analytics['Max Drawdown'], expected_drawdown.min())
+
+
 test_case1_get_statistics()
+test_case2_incremental_statistics()
+test_case3_fused_statistics_many_pairs()
+test_case4_render_charts_to_files()
+test_case5_analyzer_from_rate_series()
+test_case6_extended_analytics_many_pairs()
+test_case7_statistics_and_trend_with_missing_rates()
+test_case8_extended_analytics_with_gaps()
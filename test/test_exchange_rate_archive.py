@@ -0,0 +1,92 @@
+import os
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+from exchange_rate.exchange_rate_analyze import ExchangeRateAnalyzer, statistics_by_pair, analytics_by_pair
+from exchange_rate.exchange_rate_archive import ExchangeRateArchive
+
+"""
+Test Case1: Check archived rates are read back from the mapped file for any date range and pairs without copying
+"""
+def test_case1_archive_round_trip():
+    # 400 days x 3 pairs, one date missing and AUD/JPY starting later
+    rng = np.random.default_rng(7)
+    rates_frame = pd.DataFrame(rng.random((400, 3)) + 1, index=pd.date_range('2023-01-01', periods=400),
+                               columns=['AUD/NZD', 'AUD/USD', 'AUD/JPY'])
+    rates_frame.iloc[:30, 2] = np.nan
+    with tempfile.TemporaryDirectory() as temp_dir:
+        archive_file = os.path.join(temp_dir, 'rates.xra')
+        ExchangeRateArchive(archive_file).write(rates_frame.drop(rates_frame.index[50]))
+        archive = ExchangeRateArchive(archive_file).open()
+
+        # Assertions - header, pair index and calendar days
+        assert archive.pairs == ['AUD/NZD', 'AUD/USD', 'AUD/JPY']
+        assert archive.get_matrix().shape == (400, 3)
+        assert np.isnan(archive.get_matrix()[50]).all()
+
+        # Assertions - slices are views of the mapped file with the archived values
+        window = archive.get_matrix('2023-03-01', '2023-03-31')
+        assert isinstance(window, np.memmap) and np.shares_memory(window, archive.matrix)
+        assert np.array_equal(window, rates_frame.loc['2023-03-01':'2023-03-31'].to_numpy())
+        rates = archive.get_rates('AUD/USD', '2022-12-01', '2023-01-05')
+        assert np.shares_memory(rates, archive.matrix)
+        assert np.array_equal(rates, rates_frame['AUD/USD'].iloc[:5].to_numpy())
+        frame = archive.get_frame('2024-01-01', '2024-01-03', ['AUD/JPY', 'AUD/NZD'])
+        assert frame.equals(rates_frame.loc['2024-01-01':'2024-01-03', ['AUD/JPY', 'AUD/NZD']])
+        assert len(archive.get_series('AUD/JPY')) == 400 - 30 - 1
+
+        # Assertions - statistics and analytics of the frame skip the missing dates and the later start of AUD/JPY
+        archived_frame = archive.get_frame()
+        expected_frame = rates_frame.drop(rates_frame.index[50])
+        statistics = statistics_by_pair(archived_frame)
+        assert np.allclose(statistics['Mean'], expected_frame.mean())
+        assert np.allclose(statistics['Median'], expected_frame.median())
+        assert np.allclose(statistics['Min'], expected_frame.min())
+        analytics = analytics_by_pair(archived_frame, 7, 5)
+        assert not analytics.isna().any().any()
+        assert np.allclose(analytics['Max Drawdown'], (expected_frame / expected_frame.cummax() - 1).min())
+
+        # Assertions - unknown pairs and other files are rejected
+        try:
+            archive.get_rates('AUD/EUR')
+            assert False, "KeyError expected"
+        except KeyError:
+            pass
+        with open(os.path.join(temp_dir, 'other.xra'), 'wb') as other_file:
+            other_file.write(b'{"rates": {}}')
+        try:
+            ExchangeRateArchive(os.path.join(temp_dir, 'other.xra')).open()
+            assert False, "ValueError expected"
+        except ValueError:
+            pass
+        archive.close()
+
+"""
+Test Case2: Check analyzer reads a pair from the archive and archives are pickled by path for worker processes
+"""
+def test_case2_archive_readers():
+    exchange_rate_dict = {'2024-07-01': 1.097228, '2024-07-02': 1.096445, '2024-07-03': 1.098792,
+                          '2024-07-04': 1.10017, '2024-07-05': 1.098888}
+    rates_frame = pd.DataFrame({'AUD/NZD': exchange_rate_dict,
+                                'AUD/USD': {date: rate * 0.6 for date, rate in exchange_rate_dict.items()}})
+    with tempfile.TemporaryDirectory() as temp_dir:
+        archive = ExchangeRateArchive(os.path.join(temp_dir, 'rates.xra')).write(rates_frame)
+
+        # Same statistics as the analyzer of the dict and as statistics_by_pair of the frame
+        analyzer = ExchangeRateAnalyzer.from_archive(archive, 'AUD/NZD', '2024-07-02', '2024-07-09')
+        assert analyzer.pair == 'AUD/NZD'
+        expected = dict(list(exchange_rate_dict.items())[1:])
+        assert analyzer.get_statistics() == ExchangeRateAnalyzer(expected).get_statistics()
+        statistics = statistics_by_pair(archive.get_frame())
+        assert np.isclose(statistics.loc['AUD/USD', 'Mean'], rates_frame['AUD/USD'].mean())
+
+        # Assertions - pickle holds the path only and the copy maps the file again
+        pickled = pickle.dumps(archive)
+        assert len(pickled) < 1000
+        assert np.array_equal(pickle.loads(pickled).get_rates('AUD/USD'), archive.get_rates('AUD/USD'))
+        archive.close()
+
+# Running the test
+test_case1_archive_round_trip()
+test_case2_archive_readers()
@@ -0,0 +1,61 @@
+import os
+import tempfile
+from unittest.mock import patch
+from exchange_rate import RunContext
+from exchange_rate.exchange_rate_cache import ExchangeRateCache
+from exchange_rate.exchange_rate_fetcher import ExchangeRateFetcher
+
+"""
+Test Case1: Check whether stored rates are read back and only the dates not in cache are reported as missing
+"""
+def test_case1_exchange_rate_cache():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = ExchangeRateCache(cache_file=os.path.join(temp_dir, "rates.sqlite"))
+
+        # Response for 2024-06-01 to 2024-06-05 with 2024-06-03 not returned by the API
+        json_data = {"success": True, "timeseries": True, "base": "AUD",
+                     "rates": {"2024-06-01": {"NZD": 1.07808}, "2024-06-02": {"NZD": 1.078204},
+                               "2024-06-04": {"NZD": 1.077024}, "2024-06-05": {"NZD": 1.076672}}}
+        cache.store_timeseries(json_data, ["NZD"], "2024-06-01", "2024-06-05")
+
+        # Assertions - dates not returned by API are not read back, but are not requested again either
+        assert cache.get_rates("AUD", "NZD", "2024-06-01", "2024-06-10") == {
+            "2024-06-01": 1.07808, "2024-06-02": 1.078204, "2024-06-04": 1.077024, "2024-06-05": 1.076672}
+        assert cache.missing_ranges("AUD", "NZD", "2024-05-30", "2024-06-08") == [
+            ("2024-05-30", "2024-05-31"), ("2024-06-06", "2024-06-08")]
+        assert cache.missing_ranges("AUD", "USD", "2024-06-01", "2024-06-02") == [("2024-06-01", "2024-06-02")]
+        assert cache.get_timeseries("AUD", "NZD", "2024-06-04", "2024-06-04")["rates"] == {"2024-06-04": {"NZD": 1.077024}}
+
+"""
+Test Case2: Check whether fetcher requests only the date range missing from cache
+"""
+@patch('exchange_rate.exchange_rate_fetcher.setup_logger')
+@patch('requests.get')
+def test_case2_exchange_rate_cache_fetcher(mock_requests_get, mock_setup_logger):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = ExchangeRateCache(cache_file=os.path.join(temp_dir, "rates.sqlite"))
+        cache.store_timeseries({"base": "AUD", "rates": {"2024-07-05": {"NZD": 1.098888}, "2024-07-06": {"NZD": 1.100644},
+                                                         "2024-07-07": {"NZD": 1.098638}}},
+                               ["NZD"], "2024-07-05", "2024-07-07")
+
+        # Mock requests.get method, only the missing dates are returned
+        mock_requests_get.return_value.json.return_value = {
+            "success": True, "timeseries": True, "base": "AUD",
+            "rates": {"2024-07-08": {"NZD": 1.098292}, "2024-07-09": {"NZD": 1.098625}}}
+
+        # Calling the method under test twice, second call must be served from cache
+        fetcher = ExchangeRateFetcher(RunContext.from_config(start_date='2024-07-05', end_date='2024-07-09'))
+        pair_data = fetcher.get_exchange_rates_batch([("AUD", "NZD")], cache=cache)
+        fetcher.get_exchange_rates_batch([("AUD", "NZD")], cache=cache)
+
+        # Assertions - one request for the missing range and full range returned
+        assert mock_requests_get.call_count == 1
+        assert mock_requests_get.call_args.kwargs["params"]["start_date"] == "2024-07-08"
+        assert mock_requests_get.call_args.kwargs["params"]["end_date"] == "2024-07-09"
+        assert list(pair_data[("AUD", "NZD")]["rates"].keys()) == [
+            "2024-07-05", "2024-07-06", "2024-07-07", "2024-07-08", "2024-07-09"]
+
+
+# Running the test
+test_case1_exchange_rate_cache()
+test_case2_exchange_rate_cache_fetcher()
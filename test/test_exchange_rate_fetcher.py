@@ -1,5 +1,17 @@
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
 from unittest.mock import patch
-from exchange_rate.exchange_rate_fetcher import ExchangeRateFetcher
+import requests
+from exchange_rate import RunContext
+from exchange_rate.exchange_rate_cache import ExchangeRateCache
+from exchange_rate.exchange_rate_fetcher import ExchangeRateFetcher, FetchError
+from utils.metrics import metrics
 
 """
 Test Case1: Test whether data is retreived correctly by checking for four dates and their exchange rate values
@@ -159,7 +171,394 @@ def test_case3_exchange_rate_fetcher(mock_requests_get, mock_setup_logger, mock_
     assert result["error"]["info"] == "Resource not found"
 
 
+"""
+Test Case4: Test whether pairs are grouped by base currency, one request is made per base and response is split per pair
+"""
+@patch('exchange_rate.exchange_rate_fetcher.ConfigLoader')
+@patch('exchange_rate.exchange_rate_fetcher.setup_logger')
+@patch('requests.get')
+def test_case4_exchange_rate_fetcher_batch(mock_requests_get, mock_setup_logger, mock_config_loader):
+    # Mock ConfigLoader's return value
+    mock_config_instance = mock_config_loader.return_value
+    mock_config_instance.get_module_config.return_value = {
+        "api_url": "https://api.exchangeratesapi.io",
+        "end_point": "timeseries"
+    }
+
+    # Mock requests.get method, each base currency returns rates for all requested symbols
+    mock_response_aud = {
+        "success": True,
+        "timeseries": True,
+        "start_date": "2024-07-08",
+        "end_date": "2024-07-09",
+        "base": "AUD",
+        "rates": {
+            "2024-07-08": {"NZD": 1.098625, "USD": 0.674421},
+            "2024-07-09": {"NZD": 1.098292, "USD": 0.674812}
+        }
+    }
+    mock_response_eur = {
+        "success": True,
+        "timeseries": True,
+        "start_date": "2024-07-08",
+        "end_date": "2024-07-09",
+        "base": "EUR",
+        "rates": {
+            "2024-07-08": {"GBP": 0.845301},
+            "2024-07-09": {"GBP": 0.845742}
+        }
+    }
+    mock_requests_get.return_value.json.side_effect = [mock_response_aud, mock_response_eur]
+
+    # Initialize ExchangeRateFetcher
+    exchange_rate_fetcher = ExchangeRateFetcher()
+
+    # Calling the method under test with a duplicate pair to check it is requested only once
+    currency_pairs = [("AUD", "NZD"), ("EUR", "GBP"), ("AUD", "USD"), ("AUD", "NZD")]
+    result = exchange_rate_fetcher.get_exchange_rates_batch(currency_pairs)
+
+    # Assertions on number of requests and symbols sent for each base currency
+    assert mock_requests_get.call_count == 2
+    assert mock_requests_get.call_args_list[0].kwargs["params"]["base"] == "AUD"
+    assert mock_requests_get.call_args_list[0].kwargs["params"]["symbols"] == "NZD,USD"
+    assert mock_requests_get.call_args_list[1].kwargs["params"]["base"] == "EUR"
+    assert mock_requests_get.call_args_list[1].kwargs["params"]["symbols"] == "GBP"
+
+    # Assertions to validate the result is split into one series per pair
+    assert set(result.keys()) == {("AUD", "NZD"), ("AUD", "USD"), ("EUR", "GBP")}
+    assert result[("AUD", "NZD")]["base"] == "AUD"
+    assert result[("AUD", "NZD")]["rates"] == {"2024-07-08": {"NZD": 1.098625}, "2024-07-09": {"NZD": 1.098292}}
+    assert result[("AUD", "USD")]["rates"] == {"2024-07-08": {"USD": 0.674421}, "2024-07-09": {"USD": 0.674812}}
+    assert result[("EUR", "GBP")]["rates"]["2024-07-09"]["GBP"] == 0.845742
+
+
+class StubTimeseriesHandler(BaseHTTPRequestHandler):
+    """
+    Local stub of the timeseries end point, returns a fixed rate for every requested symbol and date window
+    """
+    protocol_version = "HTTP/1.1"
+    client_ports = set()
+
+    def do_GET(self):
+        params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        StubTimeseriesHandler.client_ports.add(self.client_address[1])
+        body = json.dumps({
+            "success": True,
+            "timeseries": True,
+            "start_date": params["start_date"],
+            "end_date": params["end_date"],
+            "base": params["base"],
+            "rates": {params["start_date"]: {symbol: 1.5 for symbol in params["symbols"].split(",")}}
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+"""
+Test Case5: Test concurrent fetch against a local stub server, results keep request order and connections are reused
+"""
+@patch('exchange_rate.exchange_rate_fetcher.ConfigLoader')
+@patch('exchange_rate.exchange_rate_fetcher.setup_logger')
+def test_case5_exchange_rate_fetcher_concurrent(mock_setup_logger, mock_config_loader):
+    # Start local stub HTTP server on a free port
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubTimeseriesHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    StubTimeseriesHandler.client_ports.clear()
+
+    # Mock ConfigLoader's return value to point to the stub server
+    mock_config_instance = mock_config_loader.return_value
+    mock_config_instance.get_module_config.return_value = {
+        "api_url": f"http://127.0.0.1:{server.server_address[1]}",
+        "end_point": "timeseries",
+        "max_workers": 2,
+        "rate_limit_per_second": 20
+    }
+
+    try:
+        # Initialize ExchangeRateFetcher
+        exchange_rate_fetcher = ExchangeRateFetcher()
+
+        # Calling the method under test with eight date windows
+        fetch_requests = [("AUD", ["NZD", "USD"], f"2024-07-0{day}", f"2024-07-0{day}") for day in range(1, 9)]
+        start_time = time.monotonic()
+        result = exchange_rate_fetcher.get_exchange_rates_concurrent(fetch_requests)
+        elapsed = time.monotonic() - start_time
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # Assertions to validate results are returned in the same order as requests
+    assert [data["start_date"] for data in result] == [request[2] for request in fetch_requests]
+    assert result[3]["rates"]["2024-07-04"] == {"NZD": 1.5, "USD": 1.5}
+
+    # Assertions to validate connections are pooled and requests are rate limited (8 requests at 20 per second)
+    assert len(StubTimeseriesHandler.client_ports) <= 2
+    assert elapsed >= 0.3
+
+
+"""
+Test Case6: Test backfill splits the range into windows and resumes after a failed window without fetching stored windows
+"""
+@patch('exchange_rate.exchange_rate_fetcher.ConfigLoader')
+@patch('exchange_rate.exchange_rate_fetcher.setup_logger')
+def test_case6_exchange_rate_fetcher_backfill(mock_setup_logger, mock_config_loader):
+    # Mock ConfigLoader's return value with 10 day windows
+    mock_config_instance = mock_config_loader.return_value
+    mock_config_instance.get_module_config.return_value = {
+        "api_url": "https://api.exchangeratesapi.io",
+        "end_point": "timeseries",
+        "max_workers": 1,
+        "configure_start_date": "2024-01-01",
+        "configure_end_date": "2024-01-25",
+        "backfill_window_days": 10
+    }
+
+    # Mock fetch_timeseries, returns one rate per day and fails once for the last window after retries
+    requested_windows = []
+
+    def mock_fetch_timeseries(base, symbols, logger, window_start, window_end, session):
+        requested_windows.append((window_start, window_end))
+        if window_start == "2024-01-21" and requested_windows.count((window_start, window_end)) == 1:
+            raise FetchError("503 Server Error")
+        dates = ExchangeRateCache.date_range(window_start, window_end)
+        return {"success": True, "base": base, "rates": {date: {"NZD": float(date[-2:])} for date in dates}}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = ExchangeRateCache(cache_file=os.path.join(temp_dir, "rates.sqlite"))
+        exchange_rate_fetcher = ExchangeRateFetcher()
+        exchange_rate_fetcher.fetch_timeseries = mock_fetch_timeseries
+
+        # First run fails on the last window, the pair is reported as failed instead of returned
+        first_result = exchange_rate_fetcher.backfill([("AUD", "NZD")], cache)
+        assert first_result == {}
+        assert list(exchange_rate_fetcher.failed_pairs) == [("AUD", "NZD")]
+
+        # Second run resumes with only the failed window
+        result = exchange_rate_fetcher.backfill([("AUD", "NZD")], cache)
+
+    # Assertions on windows requested and merged result
+    assert requested_windows == [("2024-01-01", "2024-01-10"), ("2024-01-11", "2024-01-20"),
+                                 ("2024-01-21", "2024-01-25"), ("2024-01-21", "2024-01-25")]
+    rates = result[("AUD", "NZD")]["rates"]
+    assert list(rates.keys()) == list(ExchangeRateCache.date_range("2024-01-01", "2024-01-25"))
+    assert rates["2024-01-25"] == {"NZD": 25.0}
+
+
+
+def make_response(status_code, json_data=None, headers=None):
+    # Build a real requests.Response so raise_for_status behaves like the API
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = "https://api.exchangeratesapi.io/timeseries"
+    response.headers.update(headers or {})
+    response.raw = io.BytesIO(json.dumps(json_data or {}).encode())
+    return response
+
+
+"""
+Test Case7: Test retry on 503 with Retry-After and on connection error, then success without exiting
+"""
+@patch('exchange_rate.exchange_rate_fetcher.ConfigLoader')
+@patch('exchange_rate.exchange_rate_fetcher.setup_logger')
+@patch('exchange_rate.exchange_rate_fetcher.time.sleep')
+@patch('requests.get')
+def test_case7_exchange_rate_fetcher_retry(mock_requests_get, mock_sleep, mock_setup_logger, mock_config_loader):
+    # Mock ConfigLoader's return value
+    mock_config_instance = mock_config_loader.return_value
+    mock_config_instance.get_module_config.return_value = {
+        "api_url": "https://api.exchangeratesapi.io",
+        "end_point": "timeseries",
+        "max_retries": 3,
+        "backoff_base_seconds": 1,
+        "backoff_max_seconds": 10,
+        "request_timeout_seconds": 5
+    }
+
+    # 503 with Retry-After, then a dropped connection, then the rates
+    rates = {"success": True, "base": "AUD", "rates": {"2024-07-09": {"NZD": 1.1}}}
+    mock_requests_get.side_effect = [
+        make_response(503, headers={"Retry-After": "2"}),
+        requests.exceptions.ConnectionError("connection reset"),
+        make_response(200, rates)
+    ]
+
+    metrics.reset()
+    exchange_rate_fetcher = ExchangeRateFetcher()
+    result = exchange_rate_fetcher.get_exchange_rates()
+
+    # Assertions on result, delays and timeout
+    assert result == rates
+    assert sum(counter["value"] for counter in metrics.snapshot()["counters"]
+               if counter["name"] == "fetch_retries_total") == 2
+    assert mock_requests_get.call_count == 3
+    assert mock_sleep.call_args_list[0].args[0] == 2.0
+    assert 0 <= mock_sleep.call_args_list[1].args[0] <= 2
+    assert mock_requests_get.call_args.kwargs["timeout"] == 5
+
+    # Retries exhausted on 429 raise FetchError, a 404 is not retried
+    mock_requests_get.reset_mock()
+    mock_requests_get.side_effect = [make_response(429)] * 4
+    try:
+        exchange_rate_fetcher.get_exchange_rates()
+        assert False, "FetchError should have been raised"
+    except FetchError:
+        pass
+    assert mock_requests_get.call_count == 4
+
+    mock_requests_get.reset_mock()
+    mock_requests_get.side_effect = [make_response(404)]
+    try:
+        exchange_rate_fetcher.get_exchange_rates()
+        assert False, "FetchError should have been raised"
+    except FetchError:
+        pass
+    assert mock_requests_get.call_count == 1
+
+
+"""
+Test Case8: Test a failing base currency does not stop the batch and only failed pairs are fetched again
+"""
+@patch('exchange_rate.exchange_rate_fetcher.ConfigLoader')
+@patch('exchange_rate.exchange_rate_fetcher.setup_logger')
+def test_case8_exchange_rate_fetcher_partial_failure(mock_setup_logger, mock_config_loader):
+    # Mock ConfigLoader's return value
+    mock_config_instance = mock_config_loader.return_value
+    mock_config_instance.get_module_config.return_value = {
+        "api_url": "https://api.exchangeratesapi.io",
+        "end_point": "timeseries",
+        "max_workers": 2
+    }
+
+    # Mock fetch_timeseries, USD requests fail and EUR requests return an API error body on the first attempt only
+    requested_bases = []
+
+    def mock_fetch_timeseries(base, symbols, logger, window_start=None, window_end=None, session=None):
+        requested_bases.append(base)
+        if base == "USD" and requested_bases.count("USD") == 1:
+            raise FetchError("503 Server Error")
+        if base == "EUR" and requested_bases.count("EUR") == 1:
+            return {"success": False, "error": {"code": 104, "info": "Usage limit reached"}}
+        return {"success": True, "base": base, "rates": {"2024-07-09": {symbol: 1.5 for symbol in symbols}}}
+
+    exchange_rate_fetcher = ExchangeRateFetcher()
+    exchange_rate_fetcher.fetch_timeseries = mock_fetch_timeseries
+    pairs = [("AUD", "NZD"), ("USD", "EUR"), ("USD", "JPY"), ("EUR", "GBP")]
+
+    for concurrent in (False, True):
+        requested_bases.clear()
+        result = exchange_rate_fetcher.get_exchange_rates_batch(pairs, concurrent=concurrent)
+
+        # Successful pair is returned, failed pairs are recorded
+        assert list(result) == [("AUD", "NZD")]
+        assert sorted(exchange_rate_fetcher.failed_pairs) == [("EUR", "GBP"), ("USD", "EUR"), ("USD", "JPY")]
+        assert "Usage limit reached" in exchange_rate_fetcher.failed_pairs[("EUR", "GBP")]
+
+        # Retry fetches only the failed base currencies
+        retried = exchange_rate_fetcher.retry_failed(concurrent=concurrent)
+        assert sorted(retried) == [("EUR", "GBP"), ("USD", "EUR"), ("USD", "JPY")]
+        assert retried[("USD", "JPY")]["rates"]["2024-07-09"] == {"JPY": 1.5}
+        assert exchange_rate_fetcher.failed_pairs == {}
+        assert sorted(requested_bases) == ["AUD", "EUR", "EUR", "USD", "USD"]
+
+"""
+Test Case9: Test streamed responses are parsed date by date into arrays and into the cache, with the same rates as json
+"""
+@patch('exchange_rate.exchange_rate_fetcher.ConfigLoader')
+@patch('exchange_rate.exchange_rate_fetcher.setup_logger')
+@patch('requests.get')
+def test_case9_exchange_rate_fetcher_stream(mock_requests_get, mock_setup_logger, mock_config_loader):
+    # Mock ConfigLoader's return value with tiny chunks so values are split across chunks
+    mock_config_instance = mock_config_loader.return_value
+    mock_config_instance.get_module_config.return_value = {
+        "api_url": "https://api.exchangeratesapi.io",
+        "end_point": "timeseries",
+        "stream_responses": True,
+        "stream_chunk_size": 7
+    }
+
+    # Response for 2024-06-01 to 2024-06-05 with 2024-06-03 not returned by the API
+    rates = {"success": True, "timeseries": True, "base": "AUD",
+             "rates": {"2024-06-01": {"NZD": 1.07808, "USD": 0.66321}, "2024-06-02": {"NZD": 1.078204, "USD": 0.66402},
+                       "2024-06-04": {"NZD": 1.077024, "USD": 0.66511}, "2024-06-05": {"NZD": 1.076672, "USD": 0.6649}}}
+    mock_requests_get.side_effect = lambda *args, **kwargs: make_response(200, rates)
+
+    exchange_rate_fetcher = ExchangeRateFetcher(RunContext.from_config(start_date="2024-06-01", end_date="2024-06-05"))
+    logger = mock_setup_logger.return_value
+
+    # Streamed into preallocated arrays covering every date of the window
+    series = exchange_rate_fetcher.stream_timeseries("AUD", ["NZD", "USD"], logger, "2024-06-01", "2024-06-05")
+    assert series[("AUD", "USD")].rates.tolist()[:2] == [0.66321, 0.66402]
+    assert series[("AUD", "NZD")].to_dict()["2024-06-05"] == 1.076672
+    assert len(series[("AUD", "NZD")]) == 5
+    assert mock_requests_get.call_args.kwargs["stream"] is True
+
+    # Streamed into the cache, same rows as storing the json response
+    with tempfile.TemporaryDirectory() as temp_dir:
+        streamed_cache = ExchangeRateCache(cache_file=os.path.join(temp_dir, "streamed.sqlite"))
+        json_cache = ExchangeRateCache(cache_file=os.path.join(temp_dir, "json.sqlite"))
+        pair_data = exchange_rate_fetcher.get_exchange_rates_batch([("AUD", "NZD"), ("AUD", "USD")],
+                                                                   cache=streamed_cache)
+        json_cache.store_timeseries(rates, ["NZD", "USD"], "2024-06-01", "2024-06-05")
+        for base, target in [("AUD", "NZD"), ("AUD", "USD")]:
+            assert pair_data[(base, target)] == json_cache.get_timeseries(base, target, "2024-06-01", "2024-06-05")
+            assert streamed_cache.missing_ranges(base, target, "2024-06-01", "2024-06-05") == []
+
+
+"""
+Test Case10: Test a truncated streamed response raises FetchError and stores nothing in the cache
+"""
+@patch('exchange_rate.exchange_rate_fetcher.ConfigLoader')
+@patch('exchange_rate.exchange_rate_fetcher.setup_logger')
+@patch('requests.get')
+def test_case10_exchange_rate_fetcher_stream_truncated(mock_requests_get, mock_setup_logger, mock_config_loader):
+    # Mock ConfigLoader's return value
+    mock_config_instance = mock_config_loader.return_value
+    mock_config_instance.get_module_config.return_value = {
+        "api_url": "https://api.exchangeratesapi.io",
+        "end_point": "timeseries",
+        "stream_chunk_size": 16
+    }
+
+    # Response cut in the middle of the rates object
+    response = make_response(200)
+    response.raw = io.BytesIO(b'{"success": true, "base": "AUD", "rates": {"2024-06-01": {"NZD": 1.07808}, "2024-06-0')
+    mock_requests_get.return_value = response
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = ExchangeRateCache(cache_file=os.path.join(temp_dir, "rates.sqlite"))
+        try:
+            ExchangeRateFetcher().stream_timeseries("AUD", ["NZD"], mock_setup_logger.return_value,
+                                                    "2024-06-01", "2024-06-02", cache=cache)
+            assert False, "FetchError should have been raised"
+        except FetchError:
+            pass
+        assert cache.get_rates("AUD", "NZD", "2024-06-01", "2024-06-02") == {}
+
+        # API error body without rates, the dates are not recorded as missing so they are fetched again
+        mock_requests_get.return_value = make_response(200, {"success": False,
+                                                             "error": {"code": 104, "info": "Usage limit reached"}})
+        try:
+            ExchangeRateFetcher().stream_timeseries("AUD", ["NZD"], mock_setup_logger.return_value,
+                                                    "2024-06-01", "2024-06-02", cache=cache)
+            assert False, "FetchError should have been raised"
+        except FetchError as e:
+            assert "Usage limit reached" in str(e)
+        assert cache.missing_ranges("AUD", "NZD", "2024-06-01", "2024-06-02") == [("2024-06-01", "2024-06-02")]
+
 # Running the test
 test_case1_exchange_rate_fetcher()
 test_case2_exchange_rate_fetcher()
 test_case3_exchange_rate_fetcher()
+test_case4_exchange_rate_fetcher_batch()
+test_case5_exchange_rate_fetcher_concurrent()
+test_case6_exchange_rate_fetcher_backfill()
+test_case7_exchange_rate_fetcher_retry()
+test_case8_exchange_rate_fetcher_partial_failure()
+test_case9_exchange_rate_fetcher_stream()
+test_case10_exchange_rate_fetcher_stream_truncated()
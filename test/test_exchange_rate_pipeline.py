@@ -0,0 +1,78 @@
+import os
+import tempfile
+from unittest.mock import patch
+from benchmark.synthetic_data import generate_timeseries, synthetic_pairs
+from exchange_rate import RunContext
+from exchange_rate.exchange_rate_analyze import ExchangeRateAnalyzer
+from exchange_rate.exchange_rate_pipeline import ExchangeRatePipeline
+from exchange_rate.exchange_rate_preprocess import ExchangeRatePreProcessor
+from utils.metrics import metrics
+
+"""
+Test Case1: Check pairs sharded across worker processes give the same statistics as the serial pipeline
+and a pair without data or rates is reported as an error without stopping the other pairs
+"""
+@patch('exchange_rate.exchange_rate_pipeline.ConfigLoader')
+def test_case1_pipeline_statistics_and_errors(mock_config_loader):
+    mock_config_loader.return_value.get_module_config.return_value = {
+        "max_workers": 2,
+        "pairs_per_task": 2,
+        "render": False
+    }
+    context = RunContext.from_config(start_date="2024-01-01", end_date="2024-03-31")
+    pairs = synthetic_pairs(7)
+    pair_data = {(base, target): generate_timeseries(base, [target], context.start_date, context.end_date, 0.2, 3)
+                 for base, target in pairs[:5]}
+    pair_data[pairs[5]] = {"rates": {}}
+
+    metrics.reset()
+    results = ExchangeRatePipeline(context).run(pairs, pair_data)
+    timers = {(timer["name"], tuple(timer["labels"].items())): timer["count"] for timer in metrics.snapshot()["timers"]}
+    metrics.reset()
+
+    # Assertions - results keep pair order, statistics match the serial path
+    assert list(results) == [f"{base}/{target}" for base, target in pairs]
+    for base, target in pairs[:5]:
+        processed = ExchangeRatePreProcessor(pair_data[(base, target)], target=target, context=context).process_series()
+        mean_rate, median_rate, std_dev, min_rate, max_rate = ExchangeRateAnalyzer(processed, context=context).get_statistics()
+        pair_result = results[f"{base}/{target}"]
+        assert pair_result.error is None
+        assert round(pair_result.statistics["mean"], 9) == round(mean_rate, 9)
+        assert pair_result.statistics["max"] == max_rate
+        assert pair_result.chart_file is None
+
+    # Assertions - pair without rates and pair without data fail on their own
+    assert "no rates returned" in results[f"{pairs[5][0]}/{pairs[5][1]}"].error
+    assert results[f"{pairs[6][0]}/{pairs[6][1]}"].error == "Fetch failed: no data returned"
+
+    # Assertions - metrics recorded by the worker processes are merged into this process
+    assert timers[("preprocess_seconds", (("strategy", "midpoint"),))] == 5
+    assert timers[("analyze_seconds", (("step", "statistics"),))] == 5
+    assert timers[("pipeline_pair_seconds", ())] == 6
+
+"""
+Test Case2: Check charts are rendered by the worker processes
+"""
+@patch('exchange_rate.exchange_rate_pipeline.ConfigLoader')
+def test_case2_pipeline_render(mock_config_loader):
+    mock_config_loader.return_value.get_module_config.return_value = {
+        "max_workers": 2,
+        "pairs_per_task": 1,
+        "render": True
+    }
+    context = RunContext.from_config(start_date="2024-06-01", end_date="2024-06-30")
+    pairs = synthetic_pairs(2)
+    pair_data = {(base, target): generate_timeseries(base, [target], context.start_date, context.end_date, 0.1, 3)
+                 for base, target in pairs}
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        results = ExchangeRatePipeline(context).run(pairs, pair_data, output_dir)
+
+        # Assertions - one chart per pair in the output folder
+        chart_files = sorted(os.path.basename(pair_result.chart_file) for pair_result in results.values())
+        assert chart_files == sorted(os.listdir(output_dir))
+        assert chart_files[0] == "exchange_rate_AUD_NZD_2024-06-01_2024-06-30.png"
+
+# Running the test
+test_case1_pipeline_statistics_and_errors()
+test_case2_pipeline_render()
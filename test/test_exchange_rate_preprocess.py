@@ -1,5 +1,9 @@
+import random
+import pandas as pd
+from datetime import datetime, timedelta
 from unittest.mock import patch, Mock
-from exchange_rate.exchange_rate_preprocess import ExchangeRatePreProcessor
+from exchange_rate import RunContext
+from exchange_rate.exchange_rate_preprocess import ExchangeRatePreProcessor, ExchangeRateFramePreProcessor
 import exchange_rate
 
 """
@@ -94,9 +98,170 @@ def test_case3_exchange_rate_preprocess(mock_setup_logger):
     assert processed_data['2024-07-09'] == 1.098292  # Verify interpolated value
 
 
+"""
+Test Case4: Check whether binary search gap filling gives identical output to the original linear scan implementation
+"""
+def reference_find_nearest_dates(rates_data, date):
+    # Original implementation of find_nearest_dates, sorts and scans all dates for every missing date
+    dates = list(rates_data.keys())
+    dates.sort()
+    prev_date, next_date = None, None
+    for iter_date in dates:
+        if iter_date <= date:
+            prev_date = iter_date
+        if iter_date >= date:
+            next_date = iter_date
+            break
+    return prev_date, next_date
+
+
+@patch('exchange_rate.exchange_rate_preprocess.setup_logger')
+def test_case4_exchange_rate_preprocess_equivalence(mock_setup_logger):
+    # Two years of data with random gaps, including gaps at both borders
+    random.seed(7)
+    rates = {}
+    iteration_date = datetime(2020, 1, 1)
+    while iteration_date <= datetime(2021, 12, 31):
+        if random.random() > 0.35:
+            rates[iteration_date.strftime('%Y-%m-%d')] = {"NZD": round(1 + random.random() / 10, 6)}
+        iteration_date += timedelta(days=1)
+    rates.pop('2020-01-01', None)
+    rates.pop('2021-12-31', None)
+    mock_json_data = {"success": True, "timeseries": True, "base": "AUD", "rates": rates}
+
+    # Expected output using the original linear scan for nearest dates
+    context = RunContext.from_config(start_date='2020-01-01', end_date='2021-12-31')
+    reference_processor = ExchangeRatePreProcessor(mock_json_data, target="NZD", context=context)
+    reference_processor.find_nearest_dates = reference_find_nearest_dates
+    expected_data = reference_processor.process_data()
+
+    # Call process_data method
+    processed_data = ExchangeRatePreProcessor(mock_json_data, target="NZD", context=context).process_data()
+
+    # Assertions
+    assert len(processed_data) == 731
+    assert list(processed_data.keys()) == list(expected_data.keys())
+    assert processed_data == expected_data
+
+
+"""
+Test Case5: Check whether vectorized preprocessing of many pairs gives the same values as preprocessing pair by pair
+"""
+@patch('exchange_rate.exchange_rate_preprocess.setup_logger')
+def test_case5_exchange_rate_frame_preprocess(mock_setup_logger):
+    # Three pairs with different gaps, including gaps at both borders and a known date before the range
+    random.seed(11)
+    pair_data = {}
+    for target in ["NZD", "USD", "JPY"]:
+        rates = {}
+        iteration_date = datetime(2024, 5, 30)
+        while iteration_date <= datetime(2024, 6, 29):
+            if random.random() > 0.4:
+                rates[iteration_date.strftime('%Y-%m-%d')] = {target: round(1 + random.random(), 6)}
+            iteration_date += timedelta(days=1)
+        pair_data[("AUD", target)] = {"success": True, "base": "AUD", "rates": rates}
+
+    # Call process_data method of vectorized preprocessor
+    context = RunContext.from_config(start_date='2024-06-01', end_date='2024-06-30')
+    processed_frame = ExchangeRateFramePreProcessor.from_pair_data(pair_data, context=context).process_data()
+
+    # Assertions against pair by pair preprocessing
+    assert list(processed_frame.columns) == ["AUD/NZD", "AUD/USD", "AUD/JPY"]
+    assert len(processed_frame) == 30
+    for (base, target), json_data in pair_data.items():
+        expected_data = ExchangeRatePreProcessor(json_data, target=target, context=context).process_data()
+        column = processed_frame[f"{base}/{target}"]
+        assert list(column.index.strftime('%Y-%m-%d')) == list(expected_data.keys())
+        for value, expected_value in zip(column.tolist(), expected_data.values()):
+            assert abs(value - expected_value) < 1e-12
+
+
+"""
+Test Case6: Check each interpolation strategy on a known gap (2024-06-06 Thu is known, 2024-06-07 Fri to 2024-06-10 Mon missing)
+"""
+@patch('exchange_rate.exchange_rate_preprocess.setup_logger')
+def test_case6_exchange_rate_interpolation_strategies(mock_setup_logger):
+    rates_frame = pd.DataFrame({"AUD/NZD": [1.0, 1.5], "AUD/USD": [2.0, None]},
+                               index=["2024-06-06", "2024-06-11"])
+
+    # Midpoint, forward fill and linear over every calendar day
+    midpoint = ExchangeRateFramePreProcessor(rates_frame, "midpoint").process_data("2024-06-06", "2024-06-11")
+    forward = ExchangeRateFramePreProcessor(rates_frame, "forward_fill").process_data("2024-06-06", "2024-06-11")
+    linear = ExchangeRateFramePreProcessor(rates_frame, "linear").process_data("2024-06-06", "2024-06-11")
+    business_day = ExchangeRateFramePreProcessor(rates_frame, "business_day").process_data("2024-06-06", "2024-06-11")
+
+    # Assertions
+    assert midpoint["AUD/NZD"].tolist() == [1.0, 1.25, 1.25, 1.25, 1.25, 1.5]
+    assert forward["AUD/NZD"].tolist() == [1.0, 1.0, 1.0, 1.0, 1.0, 1.5]
+    assert [round(value, 6) for value in linear["AUD/NZD"].tolist()] == [1.0, 1.1, 1.2, 1.3, 1.4, 1.5]
+    assert linear["AUD/USD"].tolist() == [2.0] * 6  # no next value, previous value is used
+    assert list(business_day.index.strftime('%Y-%m-%d')) == ["2024-06-06", "2024-06-07", "2024-06-10", "2024-06-11"]
+    assert business_day["AUD/NZD"].tolist() == [1.0, 1.25, 1.25, 1.5]
+
+    # Single pair preprocessor uses the same kernels when another strategy is configured
+    context = RunContext.from_config(start_date='2024-06-06', end_date='2024-06-11')
+    pre_processor = ExchangeRatePreProcessor({"rates": {"2024-06-06": {"NZD": 1.0}, "2024-06-11": {"NZD": 1.5}}},
+                                             target="NZD", context=context)
+    pre_processor.interpolation = "linear"
+    processed_data = pre_processor.process_data()
+    assert list(processed_data.keys())[1] == '2024-06-07'
+    assert round(processed_data['2024-06-08'], 6) == 1.2
+
+
+"""
+Test Case7: Check whether compact RateSeries output matches the dict output and converts back to the same dict
+"""
+@patch('exchange_rate.exchange_rate_preprocess.setup_logger')
+def test_case7_exchange_rate_preprocess_series(mock_setup_logger):
+    # One year of data with random gaps
+    random.seed(13)
+    rates = {}
+    iteration_date = datetime(2023, 1, 1)
+    while iteration_date <= datetime(2023, 12, 31):
+        if random.random() > 0.3:
+            rates[iteration_date.strftime('%Y-%m-%d')] = {"NZD": round(1 + random.random() / 10, 6)}
+        iteration_date += timedelta(days=1)
+    mock_json_data = {"success": True, "timeseries": True, "base": "AUD", "rates": rates}
+    context = RunContext.from_config(start_date='2023-01-01', end_date='2023-12-31')
+
+    # Call process_series and process_data methods
+    pre_processor = ExchangeRatePreProcessor(mock_json_data, target="NZD", context=context)
+    rate_series = pre_processor.process_series("AUD/NZD")
+    processed_data = pre_processor.process_data()
+
+    # Assertions on compact arrays and dict adapter
+    assert rate_series.day_ordinals.dtype == 'int32' and rate_series.rates.dtype == 'float64'
+    assert len(rate_series) == 365
+    assert str(rate_series.dates()[0]) == '2023-01-01'
+    assert list(rate_series.to_dict().keys()) == list(processed_data.keys())
+    for value, expected_value in zip(rate_series.to_dict().values(), processed_data.values()):
+        assert abs(value - expected_value) < 1e-12
+
+
+"""
+Test Case8: Check whether an unknown interpolation strategy in the configuration is rejected when the preprocessor is created
+"""
+@patch('exchange_rate.exchange_rate_preprocess.ConfigLoader')
+def test_case8_exchange_rate_unknown_interpolation(mock_config_loader):
+    mock_config_loader.return_value.get_module_config.return_value = {"interpolation": "lineer"}
+    context = RunContext.from_config(start_date='2024-06-06', end_date='2024-06-11')
+
+    # Assertions - error names the strategy and the allowed strategies
+    try:
+        ExchangeRatePreProcessor({"rates": {"2024-06-06": {"NZD": 1.0}}}, target="NZD", context=context)
+        assert False, "ValueError should have been raised"
+    except ValueError as e:
+        assert "'lineer'" in str(e)
+        assert "'midpoint', 'forward_fill', 'linear', 'business_day'" in str(e)
+
+
 # Run the test function
 
 test_case1_exchange_rate_preprocess()
 test_case2_exchange_rate_preprocess()
 test_case3_exchange_rate_preprocess()
-
+test_case4_exchange_rate_preprocess_equivalence()
+test_case5_exchange_rate_frame_preprocess()
+test_case6_exchange_rate_interpolation_strategies()
+test_case7_exchange_rate_preprocess_series()
+test_case8_exchange_rate_unknown_interpolation()
@@ -0,0 +1,157 @@
+import dataclasses
+import gzip
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from unittest.mock import patch
+from exchange_rate import RunContext
+from exchange_rate.exchange_rate_analyze import ExchangeRateAnalyzer
+from exchange_rate.exchange_rate_cache import ExchangeRateCache
+from exchange_rate.exchange_rate_fetcher import ExchangeRateFetcher, FetchError
+from exchange_rate.exchange_rate_preprocess import ExchangeRatePreProcessor
+
+
+class StubRatesHandler(BaseHTTPRequestHandler):
+    """
+    Local stub of the timeseries end point, returns a rate for every date of the window except 2024-06-03
+    """
+    protocol_version = "HTTP/1.1"
+    request_count = 0
+
+    def do_GET(self):
+        StubRatesHandler.request_count += 1
+        params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        symbols = params["symbols"].split(",")
+        dates = [date for date in ExchangeRateCache.date_range(params["start_date"], params["end_date"])
+                 if date != "2024-06-03"]
+        body = json.dumps({
+            "success": True,
+            "timeseries": True,
+            "start_date": params["start_date"],
+            "end_date": params["end_date"],
+            "base": params["base"],
+            "rates": {date: {symbol: 1 + int(date[-2:]) / 100 for symbol in symbols} for date in dates}
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def fetcher_config(transport_mode, fixture_dir, api_url="https://api.exchangeratesapi.io"):
+    return {
+        "api_url": api_url,
+        "end_point": "timeseries",
+        "max_retries": 2,
+        "stream_chunk_size": 16,
+        "transport_mode": transport_mode,
+        "fixture_dir": fixture_dir
+    }
+
+
+"""
+Test Case1: Check responses recorded from a live server are replayed with the server stopped, without the access key
+"""
+@patch('exchange_rate.exchange_rate_fetcher.ConfigLoader')
+@patch('exchange_rate.exchange_rate_fetcher.setup_logger')
+def test_case1_record_and_replay(mock_setup_logger, mock_config_loader):
+    context = dataclasses.replace(RunContext.from_config(start_date="2024-06-01", end_date="2024-06-05"),
+                                  access_key="secret-key")
+    logger = mock_setup_logger.return_value
+
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        # Record from a local stub server
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubRatesHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            mock_config_loader.return_value.get_module_config.return_value = fetcher_config(
+                "record", fixture_dir, f"http://127.0.0.1:{server.server_address[1]}")
+            recorded = ExchangeRateFetcher(context).get_exchange_rates()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        # Fixture is compressed and does not contain the access key
+        fixture_files = os.listdir(fixture_dir)
+        assert len(fixture_files) == 1 and fixture_files[0].endswith(".json.gz")
+        with gzip.open(os.path.join(fixture_dir, fixture_files[0]), "rb") as fixture_file:
+            assert b"secret-key" not in fixture_file.read()
+
+        # Replay with no server, as json and as a stream
+        StubRatesHandler.request_count = 0
+        mock_config_loader.return_value.get_module_config.return_value = fetcher_config("replay", fixture_dir)
+        exchange_rate_fetcher = ExchangeRateFetcher(dataclasses.replace(context, access_key="other-key"))
+        assert exchange_rate_fetcher.get_exchange_rates() == recorded
+        series = exchange_rate_fetcher.stream_timeseries("AUD", ["NZD"], logger, "2024-06-01", "2024-06-05")
+
+    # Assertions on replayed data, no request reached the server
+    assert StubRatesHandler.request_count == 0
+    assert recorded["rates"]["2024-06-05"] == {"NZD": 1.05}
+    assert series[("AUD", "NZD")].to_dict()["2024-06-02"] == 1.02
+
+"""
+Test Case2: Check a request without fixture fails immediately in replay mode instead of reaching the network
+"""
+@patch('exchange_rate.exchange_rate_fetcher.ConfigLoader')
+@patch('exchange_rate.exchange_rate_fetcher.setup_logger')
+@patch('exchange_rate.exchange_rate_fetcher.time.sleep')
+def test_case2_replay_missing_fixture(mock_sleep, mock_setup_logger, mock_config_loader):
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        mock_config_loader.return_value.get_module_config.return_value = fetcher_config("replay", fixture_dir)
+        exchange_rate_fetcher = ExchangeRateFetcher(RunContext.from_config(start_date="2024-06-01",
+                                                                           end_date="2024-06-05"))
+        try:
+            exchange_rate_fetcher.get_exchange_rates()
+            assert False, "FetchError should have been raised"
+        except FetchError as e:
+            assert "No fixture recorded" in str(e)
+
+    # Missing fixtures are not retried
+    assert mock_sleep.call_count == 0
+
+"""
+Test Case3: Check the full fetch, preprocess and analyze pipeline runs offline from recorded fixtures
+"""
+@patch('exchange_rate.exchange_rate_fetcher.ConfigLoader')
+@patch('exchange_rate.exchange_rate_fetcher.setup_logger')
+def test_case3_replay_pipeline(mock_setup_logger, mock_config_loader):
+    context = RunContext.from_config(start_date="2024-06-01", end_date="2024-06-05")
+
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        # Record once from a local stub server
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubRatesHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            mock_config_loader.return_value.get_module_config.return_value = fetcher_config(
+                "record", fixture_dir, f"http://127.0.0.1:{server.server_address[1]}")
+            ExchangeRateFetcher(context).get_exchange_rates()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        # Pipeline from replayed response
+        mock_config_loader.return_value.get_module_config.return_value = fetcher_config("replay", fixture_dir)
+        exchange_rate_json = ExchangeRateFetcher(context).get_exchange_rates()
+
+    processor = ExchangeRatePreProcessor(exchange_rate_json, context=context)
+    exchange_rate_processed = processor.process_series(f"{context.base_currency}/{context.target_currency}")
+    mean_rate, median_rate, std_dev, min_rate, max_rate = ExchangeRateAnalyzer(exchange_rate_processed,
+                                                                               context=context).get_statistics()
+
+    # Missing 2024-06-03 is interpolated from 2024-06-02 and 2024-06-04
+    assert len(exchange_rate_processed) == 5
+    assert round(mean_rate, 6) == 1.03
+    assert min_rate == 1.01
+    assert max_rate == 1.05
+
+# Running the test
+test_case1_record_and_replay()
+test_case2_replay_missing_fixture()
+test_case3_replay_pipeline()
@@ -0,0 +1,120 @@
+import json
+from urllib.request import urlopen
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from exchange_rate import RunContext
+from exchange_rate.exchange_rate_service import ExchangeRateService, RateStore
+
+"""
+Test Case1: Check whether service refresh loads preprocessed rates and answers rate, range and statistics queries
+"""
+@patch('exchange_rate.exchange_rate_service.ExchangeRateCache')
+@patch('exchange_rate.exchange_rate_service.setup_logger')
+@patch('exchange_rate.exchange_rate_preprocess.setup_logger')
+@patch('exchange_rate.exchange_rate_service.ExchangeRateFetcher')
+def test_case1_exchange_rate_service(mock_fetcher, mock_preprocess_logger, mock_service_logger, mock_cache):
+    # Mock fetcher returning two pairs, AUD/NZD missing 2024-07-03
+    mock_fetcher.return_value.get_exchange_rates_batch.return_value = {
+        ("AUD", "NZD"): {"base": "AUD", "rates": {"2024-07-01": {"NZD": 1.0}, "2024-07-02": {"NZD": 2.0},
+                                                  "2024-07-04": {"NZD": 4.0}, "2024-07-05": {"NZD": 5.0}}},
+        ("AUD", "USD"): {"base": "AUD", "rates": {"2024-07-01": {"USD": 0.6}, "2024-07-05": {"USD": 0.7}}}
+    }
+
+    context = RunContext.from_config(start_date='2024-07-01', end_date='2024-07-05')
+    service = ExchangeRateService([("AUD", "NZD"), ("AUD", "USD")], context)
+    service.refresh()
+
+    # Function API
+    assert service.rate_at("AUD/NZD", "2024-07-03") == 3.0
+    assert service.rate_at("AUD/NZD", "2024-08-01") is None
+    assert service.get_range("AUD/NZD", "2024-07-04", "2024-07-10") == {"2024-07-04": 4.0, "2024-07-05": 5.0}
+    statistics = service.get_statistics("AUD/NZD", "2024-07-01", "2024-07-05")
+    assert statistics["count"] == 5 and statistics["mean"] == 3.0 and statistics["median"] == 3.0
+
+    # HTTP API on a free port
+    host, port = service.serve_http("127.0.0.1", 0)
+    try:
+        with urlopen(f"http://{host}:{port}/rate?pair=AUD/USD&date=2024-07-03") as response:
+            assert abs(json.load(response)["rate"] - 0.65) < 1e-12
+        with urlopen(f"http://{host}:{port}/stats?pair=AUD/NZD&start=2024-07-02&end=2024-07-04") as response:
+            assert json.load(response)["max"] == 4.0
+        with urlopen(f"http://{host}:{port}/pairs") as response:
+            assert json.load(response) == ["AUD/NZD", "AUD/USD"]
+    finally:
+        service.stop()
+
+"""
+Test Case2: Check analytics and correlation queries over a window, also through the HTTP API
+"""
+@patch('exchange_rate.exchange_rate_service.ExchangeRateCache')
+@patch('exchange_rate.exchange_rate_service.setup_logger')
+@patch('exchange_rate.exchange_rate_preprocess.setup_logger')
+@patch('exchange_rate.exchange_rate_service.ExchangeRateFetcher')
+def test_case2_exchange_rate_service_analytics(mock_fetcher, mock_preprocess_logger, mock_service_logger, mock_cache):
+    # Mock fetcher returning two pairs, AUD/USD moving opposite to AUD/NZD
+    nzd_rates = [1.0, 1.1, 1.05, 0.9, 1.0, 1.2]
+    dates = [f"2024-07-0{day}" for day in range(1, 7)]
+    mock_fetcher.return_value.get_exchange_rates_batch.return_value = {
+        ("AUD", "NZD"): {"base": "AUD", "rates": {date: {"NZD": rate} for date, rate in zip(dates, nzd_rates)}},
+        ("AUD", "USD"): {"base": "AUD", "rates": {date: {"USD": 1 / rate} for date, rate in zip(dates, nzd_rates)}}
+    }
+
+    context = RunContext.from_config(start_date='2024-07-01', end_date='2024-07-06')
+    service = ExchangeRateService([("AUD", "NZD"), ("AUD", "USD")], context)
+    service.volatility_window, service.ema_span, service.annualization_days = 3, 2, None
+    service.refresh()
+
+    # Function API
+    analytics = service.get_analytics("AUD/NZD", "2024-07-01", "2024-07-06")
+    assert analytics["count"] == 6
+    assert abs(analytics["max_drawdown"] - (0.9 / 1.1 - 1)) < 1e-12
+    assert analytics["volatility"] > 0
+    correlation = service.get_correlation(None, "2024-06-01", "2024-07-05")
+    assert correlation["pairs"] == ["AUD/NZD", "AUD/USD"]
+    assert (correlation["start"], correlation["end"]) == ("2024-07-01", "2024-07-05")
+    assert abs(correlation["matrix"][0][1] + 1.0) < 1e-12
+
+    # HTTP API on a free port
+    host, port = service.serve_http("127.0.0.1", 0)
+    try:
+        with urlopen(f"http://{host}:{port}/analytics?pair=AUD/NZD&start=2024-07-01&end=2024-07-02") as response:
+            body = json.load(response)
+            assert body["count"] == 2 and body["volatility"] is None
+        with urlopen(f"http://{host}:{port}/correlation?pairs=AUD/USD,AUD/NZD&start=2024-07-01&end=2024-07-06") as response:
+            assert json.load(response)["matrix"][0][0] == 1.0
+    finally:
+        service.stop()
+
+"""
+Test Case3: Check business day frames keep their dates, windows outside the stored range are empty and
+rates not available are returned as None (valid JSON)
+"""
+def test_case3_rate_store_dates_and_missing_rates():
+    # Friday 2024-07-05 to Tuesday 2024-07-09 without the weekend, AUD/USD not available on Monday
+    processed_frame = pd.DataFrame({'AUD/NZD': [1.0, 2.0, 3.0], 'AUD/USD': [0.6, np.nan, 0.7]},
+                                   index=pd.to_datetime(['2024-07-05', '2024-07-08', '2024-07-09']))
+    store = RateStore()
+    store.load_frame(processed_frame)
+
+    # Assertions - rates stay on their dates, weekend dates are not stored
+    assert store.rate_at("AUD/NZD", "2024-07-08") == 2.0
+    assert store.rate_at("AUD/NZD", "2024-07-06") is None
+    assert store.get_range("AUD/NZD", "2024-07-06", "2024-07-09") == {"2024-07-08": 2.0, "2024-07-09": 3.0}
+
+    # Assertions - window after the stored range
+    assert store.get_statistics("AUD/NZD", "2024-08-01", "2024-08-31") == \
+        {'count': 0, 'mean': None, 'median': None, 'std_dev': None, 'min': None, 'max': None}
+    assert store.get_range("AUD/NZD", "2024-08-01", "2024-08-31") == {}
+
+    # Assertions - missing rate is None, responses are valid JSON
+    assert store.rate_at("AUD/USD", "2024-07-08") is None
+    body = json.dumps(store.get_range("AUD/USD", "2024-07-01", "2024-07-09"), allow_nan=False)
+    assert json.loads(body) == {"2024-07-05": 0.6, "2024-07-08": None, "2024-07-09": 0.7}
+    assert store.get_correlation(["AUD/NZD", "AUD/USD"], "2024-07-01", "2024-07-09")["end"] == "2024-07-09"
+
+
+# Running the test
+test_case1_exchange_rate_service()
+test_case2_exchange_rate_service_analytics()
+test_case3_rate_store_dates_and_missing_rates()
@@ -0,0 +1,103 @@
+import io
+import json
+import os
+import tempfile
+from unittest.mock import patch
+import numpy as np
+import requests
+from benchmark.synthetic_data import generate_timeseries
+from exchange_rate import RunContext
+from exchange_rate.exchange_rate_analyze import fused_statistics, fused_trend
+from exchange_rate.exchange_rate_cache import ExchangeRateCache
+from exchange_rate.exchange_rate_fetcher import ExchangeRateFetcher
+from exchange_rate.exchange_rate_preprocess import ExchangeRatePreProcessor
+from exchange_rate.exchange_rate_streaming import ExchangeRateStreamingPipeline, StreamingGapFiller, StreamingTrend
+from exchange_rate.rate_stream import stream_to_series
+
+"""
+Test Case1: Check chunks filled one at a time give the same rates, moving average and statistics as the whole series
+for every interpolation strategy, also when a gap spans several chunks
+"""
+def test_case1_streaming_matches_batch():
+    context = RunContext.from_config(start_date="2020-01-01", end_date="2020-12-31")
+    json_data = generate_timeseries("AUD", ["NZD"], context.start_date, context.end_date, gap_density=0.6, seed=2)
+    del json_data["rates"]["2020-01-01"]
+
+    for interpolation in ["midpoint", "forward_fill", "linear", "business_day"]:
+        processor = ExchangeRatePreProcessor(json_data, target="NZD", context=context)
+        processor.interpolation = interpolation
+        batch = processor.process_series()
+
+        # Stream 7 day chunks through the gap filler and trend
+        gap_filler = StreamingGapFiller(interpolation)
+        trend = StreamingTrend(7)
+        trend_chunks = []
+        for chunk_start, chunk_end in ExchangeRateFetcher.split_window(context.start_date, context.end_date, 7):
+            chunk = stream_to_series(json_data["rates"].items(), "AUD", ["NZD"], chunk_start, chunk_end)[("AUD", "NZD")]
+            trend_chunks.append(trend.process(gap_filler.process(chunk)))
+        trend_chunks.append(trend.process(gap_filler.finish()))
+
+        # Assertions against the whole series
+        moving_average, rate_of_change = fused_trend(batch.rates, 7)
+        assert np.array_equal(np.concatenate([chunk.day_ordinals for chunk in trend_chunks]), batch.day_ordinals)
+        assert np.allclose(np.concatenate([chunk.rates for chunk in trend_chunks]), batch.rates, rtol=0, atol=1e-12)
+        assert np.allclose(np.concatenate([chunk.moving_average for chunk in trend_chunks]), moving_average,
+                           equal_nan=True)
+        assert np.allclose(np.concatenate([chunk.rate_of_change for chunk in trend_chunks]), rate_of_change,
+                           equal_nan=True)
+        assert np.allclose(trend.statistics.get_statistics(), fused_statistics(batch.rates))
+
+
+def mock_streamed_response(*args, **kwargs):
+    # Streamed API response generated for the requested window
+    params = kwargs["params"]
+    json_data = generate_timeseries(params["base"], params["symbols"].split(","), params["start_date"],
+                                    params["end_date"], gap_density=0.3, seed=4)
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(json.dumps(json_data).encode())
+    return response
+
+"""
+Test Case2: Check the pipeline fetches a pair one window at a time, matches the batch statistics and reads
+cached windows on the next run without requests
+"""
+@patch('exchange_rate.exchange_rate_streaming.ConfigLoader')
+@patch('requests.get', side_effect=mock_streamed_response)
+def test_case2_streaming_pipeline(mock_requests_get, mock_config_loader):
+    mock_config_loader.return_value.get_module_config.return_value = {
+        "window_days": 30,
+        "interpolation": "linear",
+        "moving_average": 5
+    }
+    context = RunContext.from_config(start_date="2024-01-01", end_date="2024-03-31")
+    pipeline = ExchangeRateStreamingPipeline(context)
+
+    chunk_sizes = []
+    statistics = pipeline.run([("AUD", "NZD")], on_chunk=lambda pair, chunk: chunk_sizes.append(len(chunk)))
+
+    # Assertions on windows requested and statistics of the whole range
+    windows = [(call.kwargs["params"]["start_date"], call.kwargs["params"]["end_date"])
+               for call in mock_requests_get.call_args_list]
+    assert windows == ExchangeRateFetcher.split_window("2024-01-01", "2024-03-31", 30)
+    assert sum(chunk_sizes) == 91 and max(chunk_sizes) <= 60
+    batch_rates = {}
+    for window_start, window_end in windows:
+        batch_rates.update(mock_streamed_response(params={"base": "AUD", "symbols": "NZD", "start_date": window_start,
+                                                          "end_date": window_end}).json()["rates"])
+    processor = ExchangeRatePreProcessor({"rates": batch_rates}, target="NZD", context=context)
+    processor.interpolation = "linear"
+    assert np.allclose(statistics["AUD/NZD"], fused_statistics(processor.process_series().rates))
+
+    # Cached windows are not requested again
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = ExchangeRateCache(cache_file=os.path.join(temp_dir, "rates.sqlite"), context=context)
+        pipeline.run([("AUD", "NZD")], cache=cache)
+        request_count = mock_requests_get.call_count
+        cached_statistics = pipeline.run([("AUD", "NZD")], cache=cache)
+    assert mock_requests_get.call_count == request_count
+    assert np.allclose(cached_statistics["AUD/NZD"], statistics["AUD/NZD"])
+
+# Running the test
+test_case1_streaming_matches_batch()
+test_case2_streaming_pipeline()
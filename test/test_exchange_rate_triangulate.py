@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from exchange_rate import RunContext
+from exchange_rate.exchange_rate_triangulate import ExchangeRateTriangulator
+
+"""
+Test Case1: Check whether cross rates are derived from rates against the pivot currency
+"""
+def test_case1_exchange_rate_triangulate():
+    # Rates of 1 EUR in each currency on two dates
+    pivot_frame = pd.DataFrame({"AUD": [1.60, 1.62], "NZD": [1.76, 1.80], "JPY": [174.0, 175.5]},
+                               index=pd.to_datetime(["2024-07-08", "2024-07-09"]))
+    triangulator = ExchangeRateTriangulator(pivot_frame, "EUR")
+
+    # Single cross pair e.g. NZD/JPY via EUR
+    nzd_jpy = triangulator.cross_rate("NZD", "JPY")
+    assert np.allclose(nzd_jpy.to_numpy(), [174.0 / 1.76, 175.5 / 1.80])
+
+    # Many pairs at once, including pairs with the pivot currency
+    cross_frame = triangulator.cross_pairs([("AUD", "NZD"), ("EUR", "AUD"), ("JPY", "EUR")])
+    assert list(cross_frame.columns) == ["AUD/NZD", "EUR/AUD", "JPY/EUR"]
+    assert np.allclose(cross_frame["AUD/NZD"].to_numpy(), [1.76 / 1.60, 1.80 / 1.62])
+    assert np.allclose(cross_frame["EUR/AUD"].to_numpy(), [1.60, 1.62])
+
+    # Full grid, diagonal is 1 and matrix[i, j] * matrix[j, i] == 1
+    matrix = triangulator.cross_matrix()
+    assert matrix.shape == (2, 4, 4)
+    assert np.allclose(np.diagonal(matrix, axis1=1, axis2=2), 1.0)
+    assert np.allclose(matrix * np.swapaxes(matrix, 1, 2), 1.0)
+    assert triangulator.cross_matrix() is matrix
+
+
+"""
+Test Case2: Check whether fetch makes a single request against the pivot and fills missing dates
+"""
+@patch('exchange_rate.exchange_rate_triangulate.setup_logger')
+@patch('exchange_rate.exchange_rate_preprocess.setup_logger')
+@patch('exchange_rate.exchange_rate_fetcher.setup_logger')
+@patch('requests.get')
+def test_case2_exchange_rate_triangulate_fetch(mock_requests_get, mock_fetcher_logger, mock_preprocess_logger,
+                                               mock_triangulate_logger):
+    mock_requests_get.return_value.json.return_value = {
+        "success": True, "timeseries": True, "base": "EUR",
+        "rates": {"2024-07-07": {"AUD": 1.6, "NZD": 1.7}, "2024-07-09": {"AUD": 1.8, "NZD": 1.9}}}
+
+    context = RunContext.from_config(start_date='2024-07-07', end_date='2024-07-09')
+    triangulator = ExchangeRateTriangulator.fetch(["AUD", "NZD", "EUR"], "EUR", context=context)
+
+    # Assertions - one request with all symbols and cross rate on the interpolated date
+    assert mock_requests_get.call_count == 1
+    assert mock_requests_get.call_args.kwargs["params"]["symbols"] == "AUD,NZD"
+    assert np.isclose(triangulator.cross_rate("AUD", "NZD").loc["2024-07-08"], 1.8 / 1.7)
+
+
+# Running the test
+test_case1_exchange_rate_triangulate()
+test_case2_exchange_rate_triangulate_fetch()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+from utils.logger import setup_logger, shutdown_logging
+
+"""
+Test Case1: Check whether repeated setup_logger calls reuse one handler per file and each line is written once
+"""
+def test_case1_logger_handler_reused():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_file = os.path.join(temp_dir, "exchange_rate.log")
+
+        for _ in range(5):
+            logger = setup_logger("test_logger_reused", log_file)
+        other_logger = setup_logger("test_logger_other", log_file)
+        logger.info("line one")
+        other_logger.info("line two")
+
+        # Assertions - one handler attached and shared by both loggers
+        assert len(logger.handlers) == 1
+        assert logger.handlers[0] is other_logger.handlers[0]
+        shutdown_logging()
+
+        with open(log_file) as file:
+            lines = file.read().splitlines()
+        assert len(lines) == 2
+        assert lines[0].endswith("test_logger_reused - line one")
+
+
+"""
+Test Case2: Check whether records are written by the background queue listener
+"""
+def test_case2_logger_queue_handler():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_file = os.path.join(temp_dir, "exchange_rate.log")
+
+        logger = setup_logger("test_logger_queue", log_file, use_queue=True)
+        for index in range(100):
+            logger.debug(f"queued line {index}")
+
+        # Stopping listeners flushes the queue before the file is read
+        shutdown_logging()
+        with open(log_file) as file:
+            lines = file.read().splitlines()
+        assert len(lines) == 100
+        assert lines[-1].endswith("queued line 99")
+        assert logger.handlers == []
+
+
+"""
+Test Case3: Check whether a logger moving to a new log file (e.g. next day) stops writing to the earlier files
+"""
+def test_case3_logger_log_file_changes():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_files = [os.path.join(temp_dir, f"exchange_rate_2024070{day}.log") for day in range(1, 4)]
+
+        for log_file in log_files:
+            logger = setup_logger("test_logger_daily", log_file)
+            logger.info(f"line of {os.path.basename(log_file)}")
+
+        # Assertions - only the handler of the latest file is attached, each file has its own line only
+        assert len(logger.handlers) == 1
+        shutdown_logging()
+        for log_file in log_files:
+            with open(log_file) as file:
+                lines = file.read().splitlines()
+            assert len(lines) == 1
+            assert lines[0].endswith(f"line of {os.path.basename(log_file)}")
+
+
+# Running the test
+test_case1_logger_handler_reused()
+test_case2_logger_queue_handler()
+test_case3_logger_log_file_changes()
@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+from unittest.mock import patch
+from exchange_rate import RunContext
+from exchange_rate.exchange_rate_preprocess import ExchangeRatePreProcessor
+from utils.metrics import MetricsRegistry, MetricsReporter, metrics
+
+"""
+Test Case1: Check counters, gauges and timers are aggregated by labels and written in Prometheus text format
+"""
+def test_case1_metrics_registry():
+    registry = MetricsRegistry()
+    registry.increment("fetch_requests_total", status=200)
+    registry.increment("fetch_requests_total", status=200)
+    registry.increment("fetch_requests_total", status=503)
+    registry.increment("fetch_response_bytes_total", 2048)
+    registry.set_gauge("peak_memory_bytes", 1000)
+    registry.observe("fetch_request_seconds", 0.25, end_point="timeseries")
+    with registry.timer("fetch_request_seconds", end_point="timeseries"):
+        pass
+
+    snapshot = registry.snapshot()
+    prometheus = registry.to_prometheus()
+
+    # Assertions on aggregation and output format
+    assert {"name": "fetch_requests_total", "labels": {"status": "200"}, "value": 2} in snapshot["counters"]
+    assert snapshot["timers"][0]["count"] == 2 and snapshot["timers"][0]["max"] == 0.25
+    assert prometheus.count("# TYPE exchange_rate_fetch_requests_total counter") == 1
+    assert 'exchange_rate_fetch_requests_total{status="503"} 1' in prometheus
+    assert "exchange_rate_fetch_response_bytes_total 2048" in prometheus
+    assert 'exchange_rate_fetch_request_seconds_count{end_point="timeseries"} 2' in prometheus
+    assert "# TYPE exchange_rate_peak_memory_bytes gauge" in prometheus
+
+    # Snapshot of another registry (e.g. a worker process) is added
+    registry.merge(snapshot)
+    merged = registry.snapshot()
+    assert {"name": "fetch_requests_total", "labels": {"status": "200"}, "value": 4} in merged["counters"]
+    assert merged["timers"][0]["count"] == 4 and merged["timers"][0]["max"] == 0.25
+
+"""
+Test Case2: Check a run writes json and Prometheus metrics, cProfile and allocation reports when enabled in config
+"""
+@patch('utils.metrics.ConfigLoader')
+def test_case2_metrics_reporter(mock_config_loader):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        mock_config_loader.return_value.get_module_config.return_value = {
+            "enabled": True,
+            "output_dir": temp_dir,
+            "output_formats": ["json", "prometheus"],
+            "profile": True,
+            "trace_memory": True
+        }
+
+        # Preprocess a month with two missing dates as the run
+        json_data = {"rates": {"2024-06-01": {"NZD": 1.07}, "2024-06-02": {"NZD": 1.08}, "2024-06-05": {"NZD": 1.09}}}
+        context = RunContext.from_config(start_date="2024-06-01", end_date="2024-06-05")
+        with MetricsReporter().run("test") as written_files:
+            ExchangeRatePreProcessor(json_data, target="NZD", context=context).process_series()
+
+        # Assertions on written files and recorded metrics
+        extensions = sorted(os.path.basename(path).split(".", 1)[1] for path in written_files)
+        assert extensions == ["allocations.txt", "metrics.json", "prof", "profile.txt", "prom"]
+        with open([path for path in written_files if path.endswith(".metrics.json")][0]) as metrics_file:
+            snapshot = json.load(metrics_file)
+
+    counters = {counter["name"]: counter["value"] for counter in snapshot["counters"]}
+    assert counters["preprocess_dates_total"] == 5
+    assert counters["preprocess_dates_filled_total"] == 2
+    assert [gauge["name"] for gauge in snapshot["gauges"]] == ["peak_memory_bytes"]
+    assert {timer["name"] for timer in snapshot["timers"]} == {"preprocess_seconds", "run_seconds"}
+    metrics.reset()
+
+# Running the test
+test_case1_metrics_registry()
+test_case2_metrics_reporter()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+from unittest.mock import patch
+from benchmark.pipeline_benchmark import PipelineBenchmark
+from benchmark.synthetic_data import SyntheticExchangeRateFetcher, generate_timeseries, synthetic_pairs
+
+"""
+Test Case1: Check synthetic responses are deterministic, keep both edge dates and miss about gap_density of the dates
+"""
+def test_case1_generate_timeseries():
+    json_data = generate_timeseries("AUD", ["NZD", "USD"], "2020-01-01", "2020-12-31", gap_density=0.3, seed=5)
+
+    # Assertions on shape, edges and gap share
+    assert json_data == generate_timeseries("AUD", ["NZD", "USD"], "2020-01-01", "2020-12-31", gap_density=0.3, seed=5)
+    assert "2020-01-01" in json_data["rates"] and "2020-12-31" in json_data["rates"]
+    assert 0.2 < 1 - len(json_data["rates"]) / 366 < 0.4
+    assert all(set(day_rates) == {"NZD", "USD"} for day_rates in json_data["rates"].values())
+    assert len(synthetic_pairs(15)) == 15
+
+"""
+Test Case2: Check the stub fetcher answers batches offline and every stage of a scenario is timed
+"""
+@patch('benchmark.pipeline_benchmark.ConfigLoader')
+def test_case2_run_scenario(mock_config_loader):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        mock_config_loader.return_value.get_module_config.return_value = {
+            "end_date": "2024-07-09",
+            "repeat": 1,
+            "scenarios": [{"name": "small", "days": 60, "gap_density": 0.2, "pairs": 3}],
+            "baseline_file": os.path.join(temp_dir, "baseline.json")
+        }
+        benchmark = PipelineBenchmark()
+        results = benchmark.run()
+
+        # Stub fetcher splits one request per base currency back into pairs
+        fetcher = SyntheticExchangeRateFetcher(0.2, 0, benchmark.context)
+        pair_data = fetcher.get_exchange_rates_batch(synthetic_pairs(3))
+        assert list(pair_data) == synthetic_pairs(3)
+
+        # Baseline round trip, results compared with themselves have no regression
+        benchmark.save_baseline(results)
+        assert benchmark.compare(results, benchmark.load_baseline()) == []
+
+    # Assertions on measured stages
+    assert list(results["small"]) == ["fetch", "process_data", "find_nearest_dates", "process_series",
+                                      "frame_preprocess", "analyze", "visualize"]
+    assert all(result["seconds"] >= 0 and result["peak_kb"] >= 0 for result in results["small"].values())
+
+"""
+Test Case3: Check slower or larger stages beyond tolerance are reported, small absolute differences are ignored
+"""
+@patch('benchmark.pipeline_benchmark.ConfigLoader')
+def test_case3_compare_baseline(mock_config_loader):
+    mock_config_loader.return_value.get_module_config.return_value = {
+        "baseline_file": "benchmark/baseline.json",
+        "time_tolerance": 0.5,
+        "memory_tolerance": 0.25,
+        "min_seconds": 0.005,
+        "min_peak_kb": 64
+    }
+    benchmark = PipelineBenchmark()
+    baseline = {"year": {"process_data": {"seconds": 0.02, "peak_kb": 400},
+                         "analyze": {"seconds": 0.001, "peak_kb": 30}}}
+    results = {"year": {"process_data": {"seconds": 0.05, "peak_kb": 900},
+                        "analyze": {"seconds": 0.003, "peak_kb": 60},
+                        "visualize": {"seconds": 0.3, "peak_kb": 1000}}}
+
+    # Assertions - process_data regressed in time and memory, analyze is within absolute slack, visualize is new
+    regressions = benchmark.compare(results, baseline)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("year process_data time")
+    assert regressions[1].startswith("year process_data peak memory")
+
+# Running the test
+test_case1_generate_timeseries()
+test_case2_run_scenario()
+test_case3_compare_baseline()
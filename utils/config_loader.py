@@ -1,51 +1,170 @@
 import os
 import json
+import threading
+from dataclasses import dataclass
+from typing import Optional
 from dotenv import load_dotenv
 from config import *
 
 
+class ConfigRegistry:
+    def __init__(self):
+        """
+        Process wide cache of parsed configuration files
+        Each file is parsed once and parsed again only when its modification time changes (hot reload)
+        """
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_mtime(file_path):
+        try:
+            return os.path.getmtime(file_path)
+        except OSError:
+            return None
+
+    def get_json(self, config_file):
+        """
+        Returns: dict parsed from the json config file, empty dict when the file is missing or invalid
+        """
+        config_file = os.path.abspath(config_file)
+        mtime = self.get_mtime(config_file)
+        with self.lock:
+            entry = self.entries.get(config_file)
+            if entry is not None and entry[0] == mtime:
+                return entry[1]
+
+            config_dict = {}
+            try:
+                with open(config_file, 'r') as file:
+                    config_dict = json.load(file)
+            except FileNotFoundError:
+                print(f"Config file '{config_file}' not found.")
+            except json.JSONDecodeError:
+                print(f"Error decoding JSON config file '{config_file}'.")
+
+            self.entries[config_file] = (mtime, config_dict)
+            return config_dict
+
+    def get_env(self, env_file):
+        """
+        Load the .env file into environment variables, values already set in the environment take precedence
+        on first load, a changed .env file overrides them on reload
+
+        Returns: dict of environment variables used by the project
+        """
+        env_file = os.path.abspath(env_file)
+        mtime = self.get_mtime(env_file)
+        with self.lock:
+            entry = self.entries.get(env_file)
+            if entry is not None and entry[0] == mtime:
+                return entry[1]
+
+            env_config = {}
+            try:
+                load_dotenv(env_file, override=entry is not None)
+                env_config = {
+                    'BASE_PATH': os.getenv('BASE_PATH'),
+                    'API_KEY': os.getenv('API_KEY'),
+                    'LOG_DIR': os.getenv('LOG_DIR'),
+                    'LOG_FILE': os.getenv('LOG_FILE'),
+                    'LOG_QUEUE': os.getenv('LOG_QUEUE')
+                }
+            except Exception as e:
+                print(f"Error loading environment variables: {e}")
+
+            self.entries[env_file] = (mtime, env_config)
+            return env_config
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# Registry shared by all ConfigLoader instances of the process
+config_registry = ConfigRegistry()
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Validated project settings from .env and config_common.json
+    """
+    api_key: Optional[str]
+    log_file: Optional[str]
+    log_queue: bool
+    days: int
+    base_currency: str
+    target_currency: str
+
+    @classmethod
+    def from_config(cls, env_config, common_config):
+        """
+        Validate configuration dicts into Settings
+
+        Returns: Settings, raises ValueError when a setting is missing or invalid
+        """
+        defaults_exchange_rate = common_config.get('defaults_exchange_rate', {})
+        days = defaults_exchange_rate.get('days')
+        if not isinstance(days, int) or isinstance(days, bool) or days < 0:
+            raise ValueError(f"defaults_exchange_rate.days must be a non negative integer, got {days!r}")
+        for key in ('base_currency', 'target_currency'):
+            currency = defaults_exchange_rate.get(key)
+            if not isinstance(currency, str) or len(currency) != 3:
+                raise ValueError(f"defaults_exchange_rate.{key} must be a 3 letter currency code, got {currency!r}")
+
+        return cls(api_key=env_config.get('API_KEY'),
+                   log_file=env_config.get('LOG_FILE'),
+                   log_queue=str(env_config.get('LOG_QUEUE') or '').lower() in ('1', 'true', 'yes'),
+                   days=days,
+                   base_currency=defaults_exchange_rate['base_currency'].upper(),
+                   target_currency=defaults_exchange_rate['target_currency'].upper())
+
+
 class ConfigLoader:
     def __init__(self, env_file='.env', common_config_file='config_common.json', module_config_file=None):
+        """
+        Configuration of the project, files are parsed once per process through config_registry
+        and reloaded only when they change
+        """
         self.env_file = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))+"/"+env_file
         self.common_config_file = os.path.join(os.path.dirname(__file__), '..', 'config', common_config_file)
+        self.module_config_file = None
         if module_config_file:
             self.module_config_file = os.path.join(os.path.dirname(__file__), '..', 'config', module_config_file)
 
-        self.env_config = {}
-        self.common_config = {}
-        self.module_config = {}
-
-        self.load_env_config()
-        self.load_json_config(self.common_config_file, self.common_config)
-        if module_config_file:
-            self.load_json_config(self.module_config_file, self.module_config)
-
     def load_env_config(self):
-        try:
-            load_dotenv(self.env_file)
-            self.env_config = {
-                'BASE_PATH': os.getenv('BASE_PATH'),
-                'API_KEY': os.getenv('API_KEY'),
-                'LOG_DIR': os.getenv('LOG_DIR'),
-                'LOG_FILE': os.getenv('LOG_FILE')
-            }
-        except Exception as e:
-            print(f"Error loading environment variables: {e}")
-
-    def load_json_config(self, config_file, config_dict):
-        try:
-            with open(config_file, 'r') as file:
-                config_dict.update(json.load(file))
-        except FileNotFoundError:
-            print(f"Config file '{config_file}' not found.")
-        except json.JSONDecodeError:
-            print(f"Error decoding JSON config file '{config_file}'.")
+        return config_registry.get_env(self.env_file)
+
+    def load_json_config(self, config_file):
+        return config_registry.get_json(config_file)
 
     def get_env_variables(self):
-        return self.env_config
+        return dict(self.load_env_config())
 
     def get_common_config(self):
-        return self.common_config
+        return dict(self.load_json_config(self.common_config_file))
 
     def get_module_config(self):
-        return self.module_config
+        if not self.module_config_file:
+            return {}
+        return dict(self.load_json_config(self.module_config_file))
+
+    def get_settings(self):
+        """
+        Returns: validated Settings, cached until .env or common config file changes
+        """
+        env_config = self.load_env_config()
+        common_config = self.load_json_config(self.common_config_file)
+
+        # Cached settings are valid while both parsed files are the same cached objects
+        key = ('settings', self.env_file, os.path.abspath(self.common_config_file))
+        with config_registry.lock:
+            entry = config_registry.entries.get(key)
+            if entry is not None and entry[0] is env_config and entry[1] is common_config:
+                return entry[2]
+
+        settings = Settings.from_config(env_config, common_config)
+        with config_registry.lock:
+            config_registry.entries[key] = (env_config, common_config, settings)
+        return settings
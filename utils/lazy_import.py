@@ -0,0 +1,18 @@
+import importlib
+
+
+class LazyModule:
+    def __init__(self, name):
+        """
+        Module proxy that imports the module on first attribute access
+        Used for heavy libraries (pandas, numpy, matplotlib), so importing project modules stays fast
+
+        name - full module name e.g. 'matplotlib.pyplot'
+        """
+        self.name = name
+        self.module = None
+
+    def __getattr__(self, attribute):
+        if self.module is None:
+            self.module = importlib.import_module(self.name)
+        return getattr(self.module, attribute)
@@ -1,15 +1,110 @@
+import atexit
 import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
 
+# Handlers created so far, one per log file, shared by all loggers writing to that file
+file_handlers = {}
+queue_listeners = []
+registry_lock = threading.Lock()
 
-def setup_logger(name, log_file, level=logging.DEBUG):
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s')
 
-    handler = logging.FileHandler(log_file)
-    handler.setFormatter(formatter)
-    handler.flush()
+def setup_logger(name, log_file, level=logging.DEBUG, use_queue=None):
+    """
+    Return the named logger writing to log_file
+    The handler of a log file is created only once and reused, so calling this again does not add handlers,
+    open more files or write a log line more than once. When the log file of a logger changes (e.g. a new dated
+    log file), handlers of its earlier files are detached, and closed once no logger uses them.
+
+    use_queue - write through a QueueHandler, file writes then happen on a background QueueListener thread.
+                Defaults to LOG_QUEUE environment variable (true/1/yes)
+    """
+    if use_queue is None:
+        use_queue = str(os.getenv('LOG_QUEUE', '')).lower() in ('1', 'true', 'yes')
+
+    handler = get_file_handler(log_file, use_queue)
 
     logger = logging.getLogger(name)
     logger.setLevel(level)
-    logger.addHandler(handler)
+    if handler not in logger.handlers:
+        # Earlier log files of this logger
+        with registry_lock:
+            earlier_handlers = [registered for registered in file_handlers.values()
+                                if registered is not handler and registered in logger.handlers]
+        for earlier_handler in earlier_handlers:
+            logger.removeHandler(earlier_handler)
+            release_handler(earlier_handler)
+        logger.addHandler(handler)
+
+    return logger
+
+
+def release_handler(handler):
+    """
+    Close a registered handler and remove it from the registry when no logger uses it anymore
+    """
+    loggers = [logging.getLogger(name) for name in list(logging.root.manager.loggerDict)]
+    if any(handler in logger.handlers for logger in loggers):
+        return
+    with registry_lock:
+        for key, registered in list(file_handlers.items()):
+            if registered is handler:
+                del file_handlers[key]
+        for listener in [listener for listener in queue_listeners if listener.queue is getattr(handler, 'queue', None)]:
+            listener.stop()
+            for listener_handler in listener.handlers:
+                listener_handler.close()
+            queue_listeners.remove(listener)
+    handler.close()
+
+
+def get_file_handler(log_file, use_queue=False):
+    """
+    Return the registered handler of a log file, creating it on first use
+    """
+    key = (os.path.abspath(log_file), use_queue)
+    with registry_lock:
+        handler = file_handlers.get(key)
+        if handler is not None:
+            return handler
+
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setFormatter(formatter)
+
+        if use_queue:
+            # Log records are put on a queue, the listener thread writes them to the file
+            log_queue = queue.SimpleQueue()
+            listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+            listener.start()
+            queue_listeners.append(listener)
+            handler = QueueHandler(log_queue)
+        else:
+            handler = file_handler
+
+        file_handlers[key] = handler
+        return handler
+
+
+def shutdown_logging():
+    """
+    Stop queue listeners (flushing pending records) and close all registered file handlers
+    """
+    with registry_lock:
+        for listener in queue_listeners:
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+        queue_listeners.clear()
+
+        for handler in file_handlers.values():
+            for logger in [logging.getLogger(name) for name in list(logging.root.manager.loggerDict)]:
+                if handler in logger.handlers:
+                    logger.removeHandler(handler)
+            handler.close()
+        file_handlers.clear()
+
 
-    return logger
\ No newline at end of file
+atexit.register(shutdown_logging)
@@ -0,0 +1,241 @@
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from utils.config_loader import ConfigLoader
+
+
+class MetricsRegistry:
+    def __init__(self, prefix="exchange_rate"):
+        """
+        In-memory counters, gauges and timers of a run, shared across threads
+        Each metric is identified by name and labels e.g. increment('fetch_retries_total', status='503')
+
+        prefix - prepended to every metric name in the Prometheus output
+        """
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.timers = {}
+
+    @staticmethod
+    def key(name, labels):
+        return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+    def increment(self, name, value=1, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self.lock:
+            self.gauges[self.key(name, labels)] = value
+
+    def observe(self, name, seconds, **labels):
+        """
+        Record one duration of a timer, count, total and maximum are kept
+        """
+        key = self.key(name, labels)
+        with self.lock:
+            count, total, maximum = self.timers.get(key, (0, 0.0, 0.0))
+            self.timers[key] = (count + 1, total + seconds, max(maximum, seconds))
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """
+        Time the block and record it with observe, also when the block raises
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start_time, **labels)
+
+    def merge(self, snapshot):
+        """
+        Add the metrics of a snapshot e.g. from a worker process, counters and timers are summed, gauges replaced
+        """
+        with self.lock:
+            for counter in snapshot["counters"]:
+                key = self.key(counter["name"], counter["labels"])
+                self.counters[key] = self.counters.get(key, 0) + counter["value"]
+            for gauge in snapshot["gauges"]:
+                self.gauges[self.key(gauge["name"], gauge["labels"])] = gauge["value"]
+            for timer in snapshot["timers"]:
+                key = self.key(timer["name"], timer["labels"])
+                count, total, maximum = self.timers.get(key, (0, 0.0, 0.0))
+                self.timers[key] = (count + timer["count"], total + timer["sum"], max(maximum, timer["max"]))
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.timers.clear()
+
+    def snapshot(self):
+        """
+        Returns: dict of counters, gauges and timers, each a list sorted by name e.g.
+                 {"counters": [{"name": "fetch_requests_total", "labels": {"status": "200"}, "value": 3}], ...,
+                  "timers": [{"name": "fetch_request_seconds", "labels": {}, "count": 3, "sum": 0.52, "max": 0.21}]}
+        """
+        with self.lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            gauges = [{"name": name, "labels": dict(labels), "value": value}
+                      for (name, labels), value in sorted(self.gauges.items())]
+            timers = [{"name": name, "labels": dict(labels), "count": count, "sum": round(total, 6),
+                       "max": round(maximum, 6)}
+                      for (name, labels), (count, total, maximum) in sorted(self.timers.items())]
+        return {"counters": counters, "gauges": gauges, "timers": timers}
+
+    def to_prometheus(self):
+        """
+        Returns: metrics in Prometheus text exposition format, timers are written as summaries (count and sum)
+        """
+        snapshot = self.snapshot()
+        lines = []
+        written_types = set()
+
+        def add_type(metric_name, metric_type):
+            if metric_name not in written_types:
+                lines.append(f"# TYPE {metric_name} {metric_type}")
+                written_types.add(metric_name)
+
+        for counter in snapshot["counters"]:
+            metric_name = f"{self.prefix}_{counter['name']}"
+            add_type(metric_name, "counter")
+            lines.append(f"{metric_name}{self.format_labels(counter['labels'])} {counter['value']}")
+        for gauge in snapshot["gauges"]:
+            metric_name = f"{self.prefix}_{gauge['name']}"
+            add_type(metric_name, "gauge")
+            lines.append(f"{metric_name}{self.format_labels(gauge['labels'])} {gauge['value']}")
+        for timer in snapshot["timers"]:
+            metric_name = f"{self.prefix}_{timer['name']}"
+            add_type(metric_name, "summary")
+            labels = self.format_labels(timer['labels'])
+            lines.append(f"{metric_name}_count{labels} {timer['count']}")
+            lines.append(f"{metric_name}_sum{labels} {timer['sum']}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def format_labels(labels):
+        if not labels:
+            return ""
+        escaped = {label: value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+                   for label, value in labels.items()}
+        return "{" + ",".join(f'{label}="{value}"' for label, value in escaped.items()) + "}"
+
+
+# Metrics of the current process, used by fetcher, preprocessor and analyzer
+metrics = MetricsRegistry()
+
+
+class MetricsReporter:
+    def __init__(self, registry=None):
+        """
+        Write the metrics of a run to files and run the optional cProfile/tracemalloc hooks set in config_metrics.json
+
+        registry - MetricsRegistry to report, defaults to the process wide registry
+        """
+        self.registry = registry or metrics
+
+        # Generate the module configuration file name based on script name
+        config_file = "config_" + os.path.splitext(os.path.basename(__file__))[0] + ".json"
+
+        # Create a ConfigLoader instance and load module specific configurations
+        config_loader = ConfigLoader(module_config_file=config_file)
+        module_config = config_loader.get_module_config()
+
+        # Assigning output settings, output folder is relative to project folder
+        self.enabled = module_config.get("enabled", True)
+        self.output_dir = os.path.join(os.path.dirname(__file__), '..', module_config.get("output_dir", "metrics"))
+        self.output_formats = module_config.get("output_formats", ["json"])
+
+        # Assigning profiling hooks
+        self.profile = module_config.get("profile", False)
+        self.trace_memory = module_config.get("trace_memory", False)
+        self.top_allocations = module_config.get("top_allocations", 10)
+
+    @contextmanager
+    def run(self, run_name="run"):
+        """
+        Collect metrics of the block as one run, the registry is cleared at the start
+        At the end the metrics (and profile/allocation reports when enabled) are written to the output folder,
+        also when the block raises
+
+        Returns: list of written file paths, filled when the block ends
+        """
+        written_files = []
+        if not self.enabled:
+            yield written_files
+            return
+
+        self.registry.reset()
+        profiler = cProfile.Profile() if self.profile else None
+        if self.trace_memory:
+            tracemalloc.start()
+        if profiler is not None:
+            profiler.enable()
+
+        start_time = time.perf_counter()
+        try:
+            yield written_files
+        finally:
+            self.registry.observe("run_seconds", time.perf_counter() - start_time, run=run_name)
+            if profiler is not None:
+                profiler.disable()
+
+            os.makedirs(self.output_dir, exist_ok=True)
+            file_prefix = os.path.join(self.output_dir, f"{run_name}_{datetime.now():%Y%m%d_%H%M%S}")
+            if self.trace_memory:
+                written_files.append(self.write_allocations(file_prefix))
+            if profiler is not None:
+                written_files.extend(self.write_profile(profiler, file_prefix))
+            written_files.extend(self.write_metrics(file_prefix))
+
+    def write_metrics(self, file_prefix):
+        """
+        Returns: paths of the metrics files, one per configured format (json, prometheus)
+        """
+        written_files = []
+        if "json" in self.output_formats:
+            with open(f"{file_prefix}.metrics.json", "w") as metrics_file:
+                json.dump(self.registry.snapshot(), metrics_file, indent=2)
+            written_files.append(f"{file_prefix}.metrics.json")
+        if "prometheus" in self.output_formats:
+            with open(f"{file_prefix}.prom", "w") as metrics_file:
+                metrics_file.write(self.registry.to_prometheus())
+            written_files.append(f"{file_prefix}.prom")
+        return written_files
+
+    def write_allocations(self, file_prefix):
+        """
+        Record peak traced memory as a gauge and write the largest allocations by line, then stop tracing
+
+        Returns: path of the allocation report
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        top_stats = tracemalloc.take_snapshot().statistics('lineno')[:self.top_allocations]
+        tracemalloc.stop()
+
+        self.registry.set_gauge("peak_memory_bytes", peak)
+        with open(f"{file_prefix}.allocations.txt", "w") as allocations_file:
+            allocations_file.write(f"Peak traced memory: {peak} bytes, current: {current} bytes\n")
+            allocations_file.writelines(f"{stat}\n" for stat in top_stats)
+        return f"{file_prefix}.allocations.txt"
+
+    @staticmethod
+    def write_profile(profiler, file_prefix):
+        """
+        Returns: paths of the cProfile dump (open with pstats or snakeviz) and a text report by cumulative time
+        """
+        profiler.dump_stats(f"{file_prefix}.prof")
+        with open(f"{file_prefix}.profile.txt", "w") as profile_file:
+            pstats.Stats(profiler, stream=profile_file).sort_stats("cumulative").print_stats(30)
+        return [f"{file_prefix}.prof", f"{file_prefix}.profile.txt"]
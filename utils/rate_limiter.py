@@ -0,0 +1,34 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class HostRateLimiter:
+    def __init__(self, requests_per_second=None):
+        """
+        Limit the number of requests sent to each host, shared across threads
+
+        requests_per_second - maximum requests per second to one host, None or 0 disables the limit
+        """
+        self.min_interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = {}
+
+    def wait(self, url):
+        """
+        Block the calling thread until a request to the host of the url is allowed
+        """
+        if not self.min_interval:
+            return
+
+        host = urlparse(url).netloc
+
+        # Reserve the next free slot for the host while holding the lock, then sleep outside the lock
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.min_interval
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)